@@ -2,6 +2,45 @@ general_config = {
     # 1. De la carga
     # cada cuanto tiempo debe medir y enviar información la sonda. Opciones: "1h", "0.5h"
     "delta_tiempo": "0.5h",
+    # Qué hacer cuando varias transmisiones caen en el mismo intervalo de delta_tiempo. Opciones: "primero", "reasignar", "promediar"
+    # "primero": se deja la primera; "reasignar": se mueven a un intervalo vecino libre, sin cambiar el orden de envío; "promediar": se promedian (la dirección como vector)
+    "estrategia_de_fechas_redondeadas_duplicadas": "primero",
+    # Columnas que definen un dato duplicado explícito. None = la fila completa; p. ej. ["tspan_de_envio"] = misma fecha de envío
+    "columnas_clave_de_duplicados": None,
+    # Hueco máximo entre dos datos completos que se interpola; los huecos más largos se dejan con NaN
+    "maximo_hueco_de_interpolacion": "4h",
+    # Reglas de control de calidad (se evalúan en eliminar_datos_espurios). Tipos:
+    # "rango": fuera de [minimo, maximo]; "pico": dato cuyo cambio con el anterior y con el siguiente es mayor a maximo_cambio_por_hora;
+    # "sensor_atascado": mismo valor en 'repeticiones' datos seguidos; "voltaje_minimo": voltaje < minimo;
+    # "salto_de_posicion": velocidad entre posiciones consecutivas mayor a velocidad_maxima (m/s).
+    # "anular": "fila" anula toda la fila; "variable" solo la variable revisada. "activa": False la desactiva (por defecto solo está activa rapidez_maxima, la regla original).
+    # "bit": posición de la regla en la columna qc_flags (0 a 13, sin repetir; no cambiarlo si ya hay datos procesados con esa regla).
+    # Qué hacer con los datos marcados. Opciones: "nan" (se reemplazan con NaN, como antes),
+    # "banderas" (se marcan en la columna qc_flags y se conservan los valores originales; quien lea los datos debe enmascararlos
+    # con aplicar_mascara_de_calidad). Al guardar se escribe junto a los datos qué regla corresponde a cada bit y al cargar se valida.
+    "modo_de_control_de_calidad": "nan",
+    "reglas_de_control_de_calidad": [
+        {"bit": 0, "nombre": "rapidez_maxima", "tipo": "rango", "variable": "rap_corriente", "maximo": 2.0, "anular": "fila", "activa": True},
+        {"bit": 1, "nombre": "temperatura_fuera_de_rango", "tipo": "rango", "variable": "temperatura_mar", "minimo": -2.0, "maximo": 40.0, "anular": "variable", "activa": False},
+        {"bit": 2, "nombre": "pico_de_temperatura", "tipo": "pico", "variable": "temperatura_mar", "maximo_cambio_por_hora": 5.0, "anular": "variable", "activa": False},
+        {"bit": 3, "nombre": "temperatura_atascada", "tipo": "sensor_atascado", "variable": "temperatura_mar", "repeticiones": 48, "anular": "variable", "activa": False},
+        {"bit": 4, "nombre": "voltaje_bajo", "tipo": "voltaje_minimo", "variable": "voltaje", "minimo": 3.0, "anular": "fila", "activa": False},
+        {"bit": 5, "nombre": "salto_de_posicion", "tipo": "salto_de_posicion", "velocidad_maxima": 5.0, "anular": "fila", "activa": False},
+    ],
+    # Política de tipos de datos al terminar el procesamiento (aplicar_politica_de_tipos): float32 para los sensores,
+    # category para el texto y enteros con nulos del menor tamaño posible. False (predeterminado) conserva los tipos tal como quedan;
+    # con True cambian los tipos de los datos que se guardan (p. ej. los "" del texto pasan a NaN).
+    "compactar_tipos_de_datos": False,
+    # Representación de la malla de fechas. Opciones: "densa" (una fila por cada delta_tiempo, con NaN donde no hubo transmisión),
+    # "dispersa" (solo las filas recibidas; la malla se calcula cuando se necesita a partir del primer y último dato y delta_tiempo)
+    "representacion_de_la_malla": "densa",
+    # Modo sin copias de procesar_datos_de_sondas: se activa el Copy-on-Write de pandas (1.5 o posterior), así los recortes por rango y
+    # reset_index son vistas y esos datos solo se copian cuando una etapa los modifica (take, reindex y las máscaras siguen copiando).
+    # Contrato: cada etapa es dueña del diccionario que recibe (puede modificar y devolver los mismos dataframes o vistas de ellos);
+    # el diccionario de entrada no se vuelve a usar.
+    "modo_sin_copias": False,
+    # Depuración: reporta al final de procesar_datos_de_sondas cuántos MB copió cada etapa (columnas que dejan de compartir memoria)
+    "auditar_copias": False,
     # Ruta al archivo excel con información de las sondas
     "ruta_al_excel_de_despliegue_de_sondas": "C:\\Users\\Atmosfera\\Desktop\\datos_procesados\\2026_02_despliegues_de_DORIS",
     # Formato: 'AAAA-MM-DD HH:MM:SS'
@@ -10,6 +49,16 @@ general_config = {
     # Ruta a la carpeta con los datos crudos
     "carpeta_de_datos_crudos": "C:\\Users\\Atmosfera\\Desktop\\datos_crudos\\doris\\todos_los_datos",
     # "carpeta_de_datos_crudos": "C:\\Users\\Atmosfera\\Desktop\\datos_procesados\\doris\\10.1\\202603\\pruebas_lab", # Para pruebas de lab
+    # Cantidad de hilos/procesos para leer los CSV de las sondas en paralelo (1 = lectura secuencial)
+    "numero_de_trabajadores_de_carga": 8,
+    # Tipo de paralelismo para la lectura de los CSV. Opciones: "hilos", "procesos"
+    "tipo_de_paralelismo_de_carga": "hilos",
+    # Motor de lectura de los CSV. Opciones: "c", "pyarrow" (requiere tener instalado pyarrow)
+    "motor_de_lectura_csv": "c",
+    # Carga incremental: solo se leen las filas nuevas de cada CSV y se agregan a un almacén persistente por sonda
+    "carga_incremental": False,
+    # Ruta a la carpeta del almacén de la carga incremental (datos por sonda y marcas de agua)
+    "carpeta_del_almacen_incremental": "C:\\Users\\Atmosfera\\Desktop\\datos_procesados\\doris\\almacen_incremental",
     "cantidad_de_decimales": 4,  # Cantidad de decimales a los que se redondearán los datos
     # Ruta a los datos de batimetría del GOM
     "ruta_a_datos_batimetria": "C:\\programacion\\codigos_python\\bases_de_datos\\batimetria_GEBCO_GOM_2023.nc",
@@ -33,6 +82,8 @@ general_config = {
     # "carpeta_de_guardado_de_datos_procesados": "C:\\Users\\Atmosfera\\Desktop\\datos_procesados\\doris\\10.1\\202603\\", # Para pruebas de lab
     # Nombre del archivo para guardar los datos procesados (formato pickle)
     "nombre_del_archivo_de_datos_procesados": "datos_procesados_sondas_oceanograficas",
+    # Formato de guardado de los datos procesados. Opciones: "pickle", "parquet" (particionado por sonda y año-mes, requiere instalar pyarrow)
+    "formato_de_datos_procesados": "pickle",
     "nombre_del_archivo_de_datos_previos_a_la_fecha_de_estudio": "datos_previos_al_estudio",
     "nombre_del_excel_de_porcentajes": "porcentajes_de_las_sondas",
     # Ruta a la carpeta para guardar las figuras
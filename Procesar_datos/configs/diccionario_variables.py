@@ -16,6 +16,25 @@ var_names = {
     "voltaje": ["volt", "Voltage", "voltage"]
 }
 
+# Este diccionario define el tipo de dato con el que se lee cada variable de los archivos de datos crudos.
+# El key es el nombre estandarizado de la variable y debe coincidir con el key de la variable var_names.
+# tspan_de_envio no aparece porque se convierte a fecha durante la lectura.
+# La latitud y la longitud se mantienen en float64 para no perder precisión en las posiciones
+# (y la distancia acumulada con el GPS, que crece hasta miles de kilómetros).
+var_dtypes = {
+    "latitud": "float64",
+    "longitud": "float64",
+    "distancia": "float32",
+    "temperatura_mar": "float32",
+    "rap_corriente": "float32",
+    "dir_corriente": "float32",
+    "dir_corriente_texto": "category",
+    "u_corriente": "float32",
+    "v_corriente": "float32",
+    "voltaje": "float32",
+    "distancia_acumulada_gps": "float64"
+}
+
 # Este diccionario proporciona etiquetas legibles para cada variable, que se utilizan en los gráficos y reportes.
 # El key es el nombre estandarizado de la variable y debe coincidir con el key de la variable var_names
 # El value es la etiqueta con unidades.
@@ -25,7 +44,12 @@ ylabels = {
     "dir_corriente": "Dir (°)",
     "u_corriente": "u (m/s)",
     "v_corriente": "v (m/s)",
-    "voltaje": "Volt (V)"
+    "voltaje": "Volt (V)",
+    # Deriva calculada con la trayectoria GPS (agregar_deriva_por_gps)
+    "desplazamiento_gps": "Despl GPS (m)",
+    "rap_deriva_gps": "Rap GPS (m/s)",
+    "dir_deriva_gps": "Dir GPS (°)",
+    "distancia_acumulada_gps": "Dist acum GPS (m)"
 }
 
 puertos = {
@@ -1,38 +1,187 @@
 #################### FUNCIONES DE ACCESO A CONFIGURACIÓN ####################
+import os
+import importlib
+import functools
+import contextvars
+from contextlib import contextmanager
+from types import MappingProxyType
 import pandas as pd
 import configs.configuracion_general
 
+# Claves de la configuración que son fechas ('AAAA-MM-DD HH:MM:SS'); se convierten a pd.Timestamp una sola vez
+_claves_de_fechas = ["fecha_de_inicio_del_analisis", "fecha_de_fin_del_analisis"]
+
+# Foto inmutable de la configuración general y fecha de modificación del archivo con la que se creó
+_foto_de_configuracion = None
+_mtime_de_configuracion = None
+
+def _congelar(valor):
+    """Convierte listas y diccionarios anidados en tuplas y MappingProxyType (solo lectura)."""
+    if isinstance(valor, dict):
+        return MappingProxyType({clave: _congelar(v) for clave, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+def _descongelar(valor):
+    """Devuelve una copia editable (list/dict) de un valor de la foto de configuración."""
+    if isinstance(valor, MappingProxyType):
+        return {clave: _descongelar(v) for clave, v in valor.items()}
+    if isinstance(valor, tuple):
+        return [_descongelar(v) for v in valor]
+    return valor
+
+def _crear_foto_de_configuracion(general_config: dict) -> MappingProxyType:
+    """Crea la foto inmutable de la configuración con las fechas ya convertidas a pd.Timestamp."""
+    configuracion = dict(general_config)
+    for clave in _claves_de_fechas:
+        if isinstance(configuracion[clave], str):
+            configuracion[clave] = pd.to_datetime(configuracion[clave], format="%Y-%m-%d %H:%M:%S")
+    return _congelar(configuracion)
+
+def obtener_configuracion_general() -> MappingProxyType:
+    """Devuelve la foto inmutable de la configuración general (configs/configuracion_general.py).
+    El archivo solo se vuelve a cargar (importlib.reload) si cambió su fecha de modificación."""
+    global _foto_de_configuracion, _mtime_de_configuracion
+    mtime = os.stat(configs.configuracion_general.__file__).st_mtime_ns
+    if _foto_de_configuracion is None or mtime != _mtime_de_configuracion:
+        importlib.reload(configs.configuracion_general)
+        _foto_de_configuracion = _crear_foto_de_configuracion(configs.configuracion_general.general_config)
+        _mtime_de_configuracion = mtime
+    return _foto_de_configuracion
+
+def recargar_configuracion() -> MappingProxyType:
+    """Fuerza la recarga de la configuración general aunque el archivo no haya cambiado."""
+    global _foto_de_configuracion
+    _foto_de_configuracion = None
+    return obtener_configuracion_general()
+
+#################### CONTEXTO DE EJECUCIÓN ####################
+# Un contexto de ejecución es una foto de la configuración con cambios (otro mes, otra campaña, otras carpetas).
+# Mientras un contexto está activo todos los get_* lo usan en lugar de la configuración general. Como se guarda en
+# un ContextVar, cada hilo/tarea tiene su propio contexto y varias configuraciones pueden correr en el mismo proceso.
+_contexto_de_ejecucion = contextvars.ContextVar("contexto_de_ejecucion", default=None)
+
+def crear_contexto_de_ejecucion(**cambios) -> MappingProxyType:
+    """Crea un contexto de ejecución a partir de la configuración general y los cambios dados.
+
+    Ejemplo:
+        contexto = crear_contexto_de_ejecucion(fecha_de_inicio_del_analisis="2026-02-01 00:00:00",
+                                               fecha_de_fin_del_analisis="2026-02-28 23:59:59",
+                                               seriales_de_sondas=["4878219"])
+    """
+    configuracion = _descongelar(obtener_configuracion_general())
+    claves_desconocidas = set(cambios) - set(configuracion)
+    if claves_desconocidas:
+        raise ValueError(f"Las claves {sorted(claves_desconocidas)} no existen en la configuración general.")
+    configuracion.update(cambios)
+    return _crear_foto_de_configuracion(configuracion)
+
+@contextmanager
+def usar_contexto_de_ejecucion(contexto: MappingProxyType = None):
+    """Activa un contexto de ejecución dentro de un bloque 'with'. Si contexto es None se usa el contexto que ya esté activo
+    o, si no hay ninguno, la foto de la configuración general: el archivo se revisa una sola vez al entrar al bloque y
+    todos los get_* del bloque usan esa misma foto."""
+    if contexto is None:
+        contexto = _contexto_de_ejecucion.get()
+        if contexto is not None:
+            yield contexto
+            return
+        contexto = obtener_configuracion_general()
+    token = _contexto_de_ejecucion.set(contexto)
+    try:
+        yield contexto
+    finally:
+        _contexto_de_ejecucion.reset(token)
+
+def acepta_contexto_de_ejecucion(funcion):
+    """Decorador que agrega el parámetro opcional 'contexto' a una función y la ejecuta dentro de ese contexto."""
+    @functools.wraps(funcion)
+    def funcion_con_contexto(*args, contexto: MappingProxyType = None, **kwargs):
+        with usar_contexto_de_ejecucion(contexto):
+            return funcion(*args, **kwargs)
+    return funcion_con_contexto
+
+def obtener_configuracion() -> MappingProxyType:
+    """Devuelve la configuración activa: el contexto de ejecución si hay uno activo o la configuración general
+    (fuera de un contexto cada llamada revisa la fecha de modificación del archivo; las funciones con
+    @acepta_contexto_de_ejecucion la revisan una sola vez por llamada)."""
+    contexto = _contexto_de_ejecucion.get()
+    if contexto is not None:
+        return contexto
+    return obtener_configuracion_general()
+
 def _get_config_value(key):
-    """Obtiene un valor de la configuración general de forma dinámica"""
-    import importlib
-    importlib.reload(configs.configuracion_general)
-    return configs.configuracion_general.general_config[key]
+    """Obtiene un valor de la configuración activa, sin copiarlo: las listas se devuelven como tuplas y los diccionarios
+    como MappingProxyType (solo lectura). Para modificarlos se debe hacer una copia (list(...), dict(...))."""
+    return obtener_configuracion()[key]
 
 def get_fecha_de_inicio_del_analisis():
-     fecha = _get_config_value("fecha_de_inicio_del_analisis")
-     fecha = pd.to_datetime(fecha, format="%Y-%m-%d %H:%M:%S")
-     return fecha
+     return _get_config_value("fecha_de_inicio_del_analisis")
 
 def get_fecha_de_fin_del_analisis():
-     fecha = _get_config_value("fecha_de_fin_del_analisis")
-     fecha = pd.to_datetime(fecha, format="%Y-%m-%d %H:%M:%S")
-     return fecha
+     return _get_config_value("fecha_de_fin_del_analisis")
 
 def get_delta_tiempo():
     return _get_config_value("delta_tiempo")
 
+def get_estrategia_de_fechas_redondeadas_duplicadas():
+    return _get_config_value("estrategia_de_fechas_redondeadas_duplicadas")
+
+def get_columnas_clave_de_duplicados():
+    return _get_config_value("columnas_clave_de_duplicados")
+
+def get_maximo_hueco_de_interpolacion():
+    return _get_config_value("maximo_hueco_de_interpolacion")
+
+def get_reglas_de_control_de_calidad():
+    return _get_config_value("reglas_de_control_de_calidad")
+
+def get_modo_de_control_de_calidad():
+    return _get_config_value("modo_de_control_de_calidad")
+
+def get_compactar_tipos_de_datos():
+    return _get_config_value("compactar_tipos_de_datos")
+
+def get_representacion_de_la_malla():
+    return _get_config_value("representacion_de_la_malla")
+
+def get_modo_sin_copias():
+    return _get_config_value("modo_sin_copias")
+
+def get_auditar_copias():
+    return _get_config_value("auditar_copias")
+
 def get_ruta_al_excel_de_despliegue_de_sondas():
     return _get_config_value("ruta_al_excel_de_despliegue_de_sondas")
 
 def get_carpeta_datos_crudos():
     return _get_config_value("carpeta_de_datos_crudos")
 
+def get_numero_de_trabajadores_de_carga():
+    return _get_config_value("numero_de_trabajadores_de_carga")
+
+def get_tipo_de_paralelismo_de_carga():
+    return _get_config_value("tipo_de_paralelismo_de_carga")
+
+def get_motor_de_lectura_csv():
+    return _get_config_value("motor_de_lectura_csv")
+
+def get_carga_incremental():
+    return _get_config_value("carga_incremental")
+
+def get_carpeta_del_almacen_incremental():
+    return _get_config_value("carpeta_del_almacen_incremental")
+
 def get_carpeta_guardado_datos_procesados():
     return _get_config_value("carpeta_de_guardado_de_datos_procesados")
 
 def get_nombre_archivo_datos_procesados():
     return _get_config_value("nombre_del_archivo_de_datos_procesados")
 
+def get_formato_de_datos_procesados():
+    return _get_config_value("formato_de_datos_procesados")
+
 def get_nombre_del_archivo_de_datos_previos_a_la_fecha_de_estudio():
     return _get_config_value("nombre_del_archivo_de_datos_previos_a_la_fecha_de_estudio")
 
@@ -1,6 +1,12 @@
 from configs.diccionario_variables import *
 # Funciones asociadas al diccionario de variables
 
+# Búsqueda inversa nombre crudo -> nombre estandarizado (se construye una sola vez)
+_nombre_crudo_a_estandarizado = {}
+for _estandarizado, _variantes in var_names.items():
+    for _variante in _variantes:
+        _nombre_crudo_a_estandarizado.setdefault(_variante, _estandarizado)
+
 def obtener_nombres_estandarizados(nombres_de_columnas_crudas: list) -> list:
     """
     Cambia los nombres de las columnas de un DataFrame a nombres estandarizados
@@ -26,6 +32,29 @@ def obtener_nombres_estandarizados(nombres_de_columnas_crudas: list) -> list:
             print(f"Advertencia: La variable '{nombre}' no tiene un nombre estandarizado definido. Agregalo al archivo configs/diccionario_variables.py.")
     return nombres_estandarizados
 
+def mapear_encabezado_crudo(nombres_de_columnas_crudas: list) -> dict:
+    """
+    Relaciona cada columna del encabezado crudo con su nombre estandarizado según var_names.
+    Las columnas que no tienen nombre estandarizado no se incluyen (no se leerán del archivo).
+
+    Parámetros:
+    nombres_de_columnas_crudas (list): Lista de nombres de columnas del encabezado del CSV.
+
+    Retorna:
+    dict: {nombre_crudo: nombre_estandarizado} solo para las columnas reconocidas.
+    """
+    mapa = {}
+    for nombre in nombres_de_columnas_crudas:
+        estandarizado = _nombre_crudo_a_estandarizado.get(nombre)
+        if estandarizado is None:
+            print(f"Advertencia: La variable '{nombre}' no tiene un nombre estandarizado definido y no se leerá. Agregalo al archivo configs/diccionario_variables.py.")
+            continue
+        mapa[nombre] = estandarizado
+    return mapa
+
+def get_var_dtypes():
+    return var_dtypes
+
 def get_ylabels(var_names):
     return [ylabels[var] for var in var_names]
 
@@ -0,0 +1,49 @@
+import os
+import functools
+from dotenv import load_dotenv
+
+# Resolución de rutas compartida por Procesar_datos y crear_documentos.
+# Este módulo no importa nada del proyecto para poder usarse desde los dos paquetes:
+#   Procesar_datos:    from configs.manager_rutas import *
+#   crear_documentos:  from Procesar_datos.configs.manager_rutas import *
+
+@functools.lru_cache(maxsize=1)
+def _cargar_variables_de_entorno() -> dict:
+    """Carga el archivo .env una sola vez por proceso y devuelve las variables de rutas."""
+    load_dotenv() # Cargar variables de entorno desde el archivo .env
+    return {"ruta_al_NAS": os.getenv("ruta_al_NAS")}
+
+def get_ruta_al_NAS():
+    """Devuelve la ruta al NAS definida en el archivo .env (None si no está definida)."""
+    return _cargar_variables_de_entorno()["ruta_al_NAS"]
+
+@functools.lru_cache(maxsize=None)
+def resolver_ruta(carpeta: str, usar_NAS: bool = True) -> str:
+    """Devuelve la ruta completa a una carpeta o archivo.
+    Si usar_NAS es True y 'ruta_al_NAS' está definida en el .env, la carpeta se concatena a la ruta al NAS;
+    si no, se devuelve la carpeta tal cual."""
+    ruta_al_NAS = get_ruta_al_NAS()
+    if usar_NAS and ruta_al_NAS:
+        return os.path.join(ruta_al_NAS, carpeta)
+    return carpeta
+
+def validar_rutas(rutas: dict) -> list:
+    """Verifica al inicio de una corrida que existan las rutas dadas.
+
+    Parámetros:
+        rutas (dict): {nombre_descriptivo: ruta_completa} de carpetas o archivos.
+
+    Retorna:
+        Lista con los nombres de las rutas que no existen (vacía si todas existen).
+    """
+    rutas_faltantes = []
+    for nombre, ruta in rutas.items():
+        if not ruta or not os.path.exists(ruta):
+            print(f"Advertencia: No se encontró la ruta de '{nombre}': {ruta}")
+            rutas_faltantes.append(nombre)
+    return rutas_faltantes
+
+def limpiar_cache_de_rutas() -> None:
+    """Vuelve a leer el .env y a resolver las rutas la próxima vez que se pidan (p. ej. tras cambiar el .env)."""
+    _cargar_variables_de_entorno.cache_clear()
+    resolver_ruta.cache_clear()
@@ -1,47 +1,50 @@
 # Imports generales
+import io
 import os
+import json
+import hashlib
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 import pandas as pd
 import numpy as np
-from dotenv import load_dotenv
 
 ################### NO TOCAR #########################
 # Utilidades
 from services.Correctores.corrector_utils import *
 from services.Utils.utilidades import *
+from services.Carga.metadatos_de_despliegue import *
+from services.Carga.indice_de_archivos_crudos import indexar_archivos_crudos
 # Carga asociadas a las configuraciones y a las variables
 from configs.manager_configuracion import *
 from configs.manager_diccionario_variables import *
 
 #################### FUNCIONES #########################
 
+@acepta_contexto_de_ejecucion
 def buscar_nombre_de_archivo_de_sonda():
     """A partir de la lista se seriales de las sondas indicadas en el archivo de configuración,
     se generan las rutas a cada archivo CSV correspondiente de la sonda.
+    Una sonda puede tener varios archivos (p. ej. exportaciones mensuales y el archivo _TOTAL); en ese caso
+    el serial aparece repetido en 'seriales_encontrados' una vez por archivo.
     Retorna:
         rutas_de_sondas: lista de rutas completas a los archivos CSV de las sondas encontradas -> lista de strings
         seriales_encontrados: lista de seriales de sondas para las que se encontraron archivos CSV -> lista de strings
     """
     carpeta_de_datos_crudos = crear_ruta_a_carpeta(get_carpeta_datos_crudos())
-    archivos_en_carpeta = os.listdir(carpeta_de_datos_crudos)
+    indice_de_archivos = indexar_archivos_crudos(carpeta_de_datos_crudos) # {serial: [rutas]}, en caché mientras la carpeta no cambie
 
     seriales_de_sondas = get_seriales_sondas()
-    if not archivos_en_carpeta:
-        raise FileNotFoundError(f"No se encontraron archivos en la carpeta: {carpeta_de_datos_crudos}") 
+    if not indice_de_archivos:
+        raise FileNotFoundError(f"No se encontraron archivos CSV en la carpeta: {carpeta_de_datos_crudos}") 
     if not seriales_de_sondas:
         raise ValueError("La lista de seriales de sondas está vacía.")  
 
-    archivos_csv = []
-    for archivo in archivos_en_carpeta:
-        if archivo.endswith('.csv'):
-            archivos_csv.append(archivo)
-    
     rutas_de_sondas = []
     seriales_encontrados = []
     for serial_de_sonda in seriales_de_sondas:
-        for archivo in archivos_csv:
-            if serial_de_sonda in archivo:
-                rutas_de_sondas.append(os.path.join(carpeta_de_datos_crudos,archivo))
-                seriales_encontrados.append(serial_de_sonda)
+        for ruta_de_sonda in indice_de_archivos.get(serial_de_sonda, []):
+            rutas_de_sondas.append(ruta_de_sonda)
+            seriales_encontrados.append(serial_de_sonda)
 
 
     for serial_de_sonda in seriales_de_sondas:
@@ -50,40 +53,312 @@ def buscar_nombre_de_archivo_de_sonda():
 
     return rutas_de_sondas, seriales_encontrados
 
-def cargar_datos_de_sonda(rutas_de_sondas: list, seriales_de_sondas: list)-> dict:
+def leer_csv_tipado(fuente, serial: str, motor: str = "c", encabezado_crudo: list = None) -> pd.DataFrame:
+    """ Lee un CSV de una sonda leyendo solo las columnas que tienen nombre estandarizado en var_names.
+    El encabezado se lee una sola vez y se relaciona con var_names; las columnas se leen directamente con los tipos
+    de var_dtypes (float32/category) y 'tspan_de_envio' se convierte a fecha durante la lectura.
+    Si alguna celda de una columna numérica no es un número, la columna se convierte con pd.to_numeric(errors="coerce"):
+    esas celdas quedan con NaN y el archivo se carga igual.
+
+    Parámetros:
+        fuente: Ruta al archivo CSV o buffer con su contenido.
+        serial (str): Serial de la sonda (para los mensajes).
+        motor (str): Motor de lectura de pandas. Opciones: "c", "pyarrow".
+        encabezado_crudo (list): Nombres de columnas crudas. Si se da, se asume que la fuente no tiene encabezado.
+
+    Retorna:
+        pd.DataFrame con los nombres de columnas estandarizados.
+    """
+    posicion_inicial = fuente.tell() if hasattr(fuente, "seek") else None
+    if encabezado_crudo is None:
+        encabezado_crudo = pd.read_csv(fuente, nrows=0).columns.tolist()
+        if posicion_inicial is not None: # si es un buffer se regresa al inicio para leer los datos
+            fuente.seek(posicion_inicial)
+        opciones_de_encabezado = {"header": 0}
+    else:
+        opciones_de_encabezado = {"header": None, "names": encabezado_crudo}
+
+    mapa_de_nombres = mapear_encabezado_crudo(encabezado_crudo)
+    columnas_de_fecha = [crudo for crudo, estandarizado in mapa_de_nombres.items() if estandarizado == "tspan_de_envio"]
+    if not columnas_de_fecha:
+        raise ValueError(f"El archivo de la sonda {serial} no tiene una columna de fechas reconocida en var_names['tspan_de_envio'].")
+
+    var_dtypes = get_var_dtypes()
+    tipos = {crudo: var_dtypes[estandarizado] for crudo, estandarizado in mapa_de_nombres.items() if estandarizado in var_dtypes}
+
+    opciones_de_fecha = {}
+    if motor != "pyarrow": # el motor pyarrow reconoce las fechas ISO por sí mismo
+        opciones_de_fecha = {"parse_dates": columnas_de_fecha, "date_format": "%Y-%m-%dT%H:%M:%S.000Z"}
+
+    def leer(tipos_de_lectura: dict) -> pd.DataFrame:
+        return pd.read_csv(fuente,
+                           usecols=list(mapa_de_nombres.keys()),
+                           dtype=tipos_de_lectura,
+                           engine=motor,
+                           **opciones_de_encabezado,
+                           **opciones_de_fecha)
+
+    try:
+        df = leer(tipos)
+    except ValueError:
+        # Alguna celda no es numérica: se vuelve a leer sin forzar los tipos numéricos y esas celdas quedan con NaN
+        if posicion_inicial is not None:
+            fuente.seek(posicion_inicial)
+        df = leer({crudo: tipo for crudo, tipo in tipos.items() if tipo == "category"})
+        for crudo, tipo in tipos.items():
+            if tipo == "category":
+                continue
+            valores = pd.to_numeric(df[crudo], errors="coerce")
+            celdas_no_numericas = int((valores.isna() & df[crudo].notna()).sum())
+            if celdas_no_numericas > 0:
+                print(f"Advertencia: La sonda {serial} tiene {celdas_no_numericas} valores no numéricos en '{crudo}'. Se reemplazan con NaN.")
+            df[crudo] = valores.astype(tipo)
+    df = df.rename(columns=mapa_de_nombres)
+
+    # pyarrow entrega las fechas con zona horaria (UTC); se dejan sin zona como en el resto del proyecto
+    if isinstance(df["tspan_de_envio"].dtype, pd.DatetimeTZDtype):
+        df["tspan_de_envio"] = df["tspan_de_envio"].dt.tz_convert(None)
+    elif not pd.api.types.is_datetime64_any_dtype(df["tspan_de_envio"]):
+        df = cambiar_fechas_a_pd_datetime(df, serial)
+
+    return df
+
+def leer_archivo_de_sonda(ruta_de_sonda: str, serial: str, motor: str = "c") -> tuple:
+    """ Lee un archivo CSV de una sonda con 'leer_csv_tipado' (nombres estandarizados y 'tspan_de_envio' en pd.datetime).
+    Se ejecuta dentro de los hilos/procesos de 'cargar_datos_de_sonda', por eso no lanza excepciones:
+    el error se devuelve como texto para que un archivo dañado no detenga la carga de las demás sondas.
+
+    Retorna:
+        (dataframe, None) si la lectura fue correcta o (None, mensaje_de_error) si falló -> tupla
+    """
+    try:
+        df = leer_csv_tipado(ruta_de_sonda, serial, motor=motor)
+        return df, None
+    except FileNotFoundError:
+        return None, f"Archivo no encontrado: {ruta_de_sonda}"
+    except pd.errors.EmptyDataError:
+        return None, f"El archivo está vacío: {ruta_de_sonda}"
+    except Exception as e:
+        return None, f"Ocurrió un error al cargar los datos de la sonda {ruta_de_sonda}: {e}"
+
+@acepta_contexto_de_ejecucion
+def cargar_datos_de_sonda(rutas_de_sondas: list, 
+                          seriales_de_sondas: list,
+                          numero_de_trabajadores: int = None,
+                          tipo_de_paralelismo: str = None)-> dict:
     """ Esta función se encarga de cargar los datos de cada archivos CSV de cada sonda
     a partir de las rutas a los archivos CSV y de los seriales de sondas encontrados por la función 'buscar_nombre_de_archivo_de_sonda'.
     La salida es un diccionario cuyos keys son los seriales de las sondas y los valores son los dataframes son los dataframes crudos de cada sonda.
     Cada dataframe tiene los nombres de columnas estandarizadas y la columna de fechas 'tspan_de_envio' en formato pd.datetime.
+
+    Los archivos se leen en paralelo con un pool de hilos o de procesos. Los errores se reportan por archivo,
+    de modo que un archivo dañado no detiene la carga de las demás sondas.
+    Si una sonda tiene varios archivos, todos se leen en paralelo y se combinan con 'combinar_archivos_de_una_sonda'.
+
+    Parámetros:
+        numero_de_trabajadores (int): Cantidad de hilos/procesos. Si es None se usa el de la configuración general (1 = secuencial).
+        tipo_de_paralelismo (str): "hilos" o "procesos". Si es None se usa el de la configuración general.
+
+    Si 'carga_incremental' está activo en la configuración general se usa 'cargar_datos_de_sonda_incremental'.
     """
-    
+    if get_carga_incremental():
+        return cargar_datos_de_sonda_incremental(rutas_de_sondas, seriales_de_sondas)
+
+    if numero_de_trabajadores is None:
+        numero_de_trabajadores = get_numero_de_trabajadores_de_carga()
+    if tipo_de_paralelismo is None:
+        tipo_de_paralelismo = get_tipo_de_paralelismo_de_carga()
+    if tipo_de_paralelismo not in ["hilos", "procesos"]:
+        raise ValueError(f"Tipo de paralelismo no válido: {tipo_de_paralelismo}. Opciones: 'hilos', 'procesos'.")
+
+    motor = get_motor_de_lectura_csv()
+    if motor == "pyarrow" and importlib.util.find_spec("pyarrow") is None:
+        print("Advertencia: pyarrow no está instalado. Se usará el motor de lectura 'c'.")
+        motor = "c"
+
+    tareas = list(zip(seriales_de_sondas, rutas_de_sondas))
+    resultados = [None] * len(tareas)
+
+    if numero_de_trabajadores <= 1 or len(tareas) <= 1:
+        for itarea, (serial, ruta_de_sonda) in enumerate(tareas):
+            resultados[itarea] = leer_archivo_de_sonda(ruta_de_sonda, serial, motor)
+    else:
+        Pool = ProcessPoolExecutor if tipo_de_paralelismo == "procesos" else ThreadPoolExecutor
+        with Pool(max_workers=min(numero_de_trabajadores, len(tareas))) as pool:
+            futuros = {pool.submit(leer_archivo_de_sonda, ruta_de_sonda, serial, motor): itarea for itarea, (serial, ruta_de_sonda) in enumerate(tareas)}
+            for futuro in as_completed(futuros):
+                itarea = futuros[futuro]
+                try:
+                    resultados[itarea] = futuro.result()
+                except Exception as e: # p. ej. un proceso del pool que terminó de forma abrupta
+                    resultados[itarea] = (None, f"Ocurrió un error al cargar los datos de la sonda {tareas[itarea][1]}: {e}")
+
+    # Se agrupan los archivos de cada sonda en el mismo orden de los seriales de entrada
+    archivos_por_serial = {}
+    archivos_con_error = []
+    for (serial, ruta_de_sonda), (df, error) in zip(tareas, resultados):
+        if error:
+            print(error)
+            archivos_con_error.append(ruta_de_sonda)
+            continue
+        archivos_por_serial.setdefault(serial, []).append(df)
+
     output_dir = {}
+    for serial, dataframes in archivos_por_serial.items():
+        output_dir[serial] = combinar_archivos_de_una_sonda(dataframes, serial)
+        print(f"Datos cargados correctamente para la sonda: {serial}")
 
-    for iserial, serial in enumerate(seriales_de_sondas):
-        ruta_de_sonda = rutas_de_sondas[iserial] # Ruta completa al archivo CSV de la sonda
-        try:
-            output_dir[serial] = pd.read_csv(ruta_de_sonda)
-            
-            # Buscar los nombres de columnas de los datos crudos
-            nombres_columnas_crudos = output_dir[serial].columns.tolist()
-            nombres_de_columnas_estandarizados = obtener_nombres_estandarizados(nombres_columnas_crudos)
+    if archivos_con_error:
+        print(f"No se pudieron cargar {len(archivos_con_error)} de {len(tareas)} archivos: {archivos_con_error}")
 
-            # Asignar nombres de columnas esperados
-            output_dir[serial].columns = nombres_de_columnas_estandarizados # Asignar nombres de columnas
-            
-            # Cambiar el formato de datos de tspan a pandas datetime
-            output_dir[serial] = cambiar_fechas_a_pd_datetime(output_dir[serial], serial)
+    return output_dir
+
+def combinar_archivos_de_una_sonda(dataframes: list, serial: str) -> pd.DataFrame:
+    """ Une en un solo dataframe los archivos CSV de una misma sonda (p. ej. exportaciones mensuales y el archivo _TOTAL).
+    Los datos se concatenan, se ordenan con un ordenamiento estable por 'tspan_de_envio' y se eliminan
+    las transmisiones repetidas en los periodos donde los archivos se traslapan (se conserva la primera).
+    """
+    if len(dataframes) == 1:
+        return dataframes[0]
+
+    df = pd.concat(dataframes, ignore_index=True)
+    # concat convierte a object las columnas categóricas con categorías distintas entre archivos
+    columnas_categoricas = {columna for data in dataframes for columna in data.columns if isinstance(data[columna].dtype, pd.CategoricalDtype)}
+    for columna in columnas_categoricas:
+        df[columna] = df[columna].astype("category")
+    df = df.sort_values(by="tspan_de_envio", kind="mergesort")
+    cantidad_de_filas = len(df)
+    df = df.drop_duplicates(subset="tspan_de_envio", keep="first").reset_index(drop=True)
+
+    print(f"Sonda {serial}: se combinaron {len(dataframes)} archivos ({cantidad_de_filas - len(df)} transmisiones traslapadas eliminadas).")
+    return df
+
+
+def leer_bytes_nuevos(ruta_de_sonda: str, desde_byte: int = 0) -> tuple:
+    """ Lee el contenido de un archivo a partir de 'desde_byte' hasta el último salto de línea completo.
+    Una última línea incompleta (archivo que se sigue escribiendo) se deja para la siguiente lectura.
+
+    Retorna:
+        (contenido, byte_final) -> tupla (bytes, int). 'byte_final' es la posición desde la que debe continuar la siguiente lectura.
+    """
+    with open(ruta_de_sonda, "rb") as archivo:
+        archivo.seek(desde_byte)
+        contenido = archivo.read()
+
+    fin_de_la_ultima_linea = contenido.rfind(b"\n") + 1 # 0 si no hay ninguna línea completa
+    return contenido[:fin_de_la_ultima_linea], desde_byte + fin_de_la_ultima_linea
+
+def calcular_huella_del_archivo(ruta_de_sonda: str, hasta_byte: int, tamanio_de_bloque: int = 4096) -> str:
+    """ Huella (sha256) del inicio del archivo y de los últimos bytes antes de 'hasta_byte'.
+    Si al volver a leer el archivo la huella cambió, el archivo se reescribió y 'hasta_byte' ya no es una posición válida
+    para continuar la lectura (podría caer a mitad de una línea)."""
+    huella = hashlib.sha256()
+    with open(ruta_de_sonda, "rb") as archivo:
+        huella.update(archivo.read(min(tamanio_de_bloque, hasta_byte)))
+        archivo.seek(max(hasta_byte - tamanio_de_bloque, 0))
+        huella.update(archivo.read(hasta_byte - max(hasta_byte - tamanio_de_bloque, 0)))
+    return huella.hexdigest()
+
+@acepta_contexto_de_ejecucion
+def cargar_datos_de_sonda_incremental(rutas_de_sondas: list, seriales_de_sondas: list) -> dict:
+    """ Versión incremental de 'cargar_datos_de_sonda'.
+    Para cada archivo se guarda una marca de agua (tamaño, mtime, bytes leídos, encabezado y último 'tspan_de_envio')
+    en 'marcas_de_agua.json' dentro de la carpeta del almacén incremental. En las siguientes corridas:
+        - si el archivo no cambió no se lee;
+        - si el archivo creció solo se leen los bytes nuevos (la cola del CSV);
+        - si el archivo es nuevo o se reescribió (es más pequeño que lo leído o cambió la huella de los bytes ya leídos,
+          ver calcular_huella_del_archivo) se lee completo.
+    Si la lectura de la cola falla, la marca de agua del archivo se descarta y en la siguiente corrida se lee completo.
+    Las filas nuevas se agregan al almacén persistente de cada sonda (<serial>.pkl) con 'combinar_archivos_de_una_sonda'.
+
+    Retorna:
+        dict: {serial: dataframe con toda la historia de la sonda}, igual que 'cargar_datos_de_sonda'.
+    """
+    carpeta_del_almacen = crear_ruta_a_carpeta(get_carpeta_del_almacen_incremental())
+    os.makedirs(carpeta_del_almacen, exist_ok=True)
+    ruta_de_marcas_de_agua = os.path.join(carpeta_del_almacen, "marcas_de_agua.json")
+
+    marcas_de_agua = {}
+    if os.path.isfile(ruta_de_marcas_de_agua):
+        with open(ruta_de_marcas_de_agua, "r", encoding="utf-8") as archivo:
+            marcas_de_agua = json.load(archivo)
+
+    motor = get_motor_de_lectura_csv()
+    if motor == "pyarrow" and importlib.util.find_spec("pyarrow") is None:
+        print("Advertencia: pyarrow no está instalado. Se usará el motor de lectura 'c'.")
+        motor = "c"
+
+    rutas_por_serial = {}
+    for serial, ruta_de_sonda in zip(seriales_de_sondas, rutas_de_sondas):
+        rutas_por_serial.setdefault(serial, []).append(ruta_de_sonda)
+
+    output_dir = {}
+    for serial, rutas in rutas_por_serial.items():
+        ruta_del_almacen = os.path.join(carpeta_del_almacen, f"{serial}.pkl")
+        almacen = pd.read_pickle(ruta_del_almacen) if os.path.isfile(ruta_del_almacen) else None
+        if almacen is None: # sin almacén las marcas de agua de la sonda ya no son válidas
+            marcas_de_agua[serial] = {}
+        marcas_de_la_sonda = marcas_de_agua.setdefault(serial, {})
+
+        datos_nuevos = []
+        for ruta_de_sonda in rutas:
+            nombre_de_archivo = os.path.basename(ruta_de_sonda)
+            try:
+                estado = os.stat(ruta_de_sonda)
+                marca = marcas_de_la_sonda.get(nombre_de_archivo)
+
+                if marca and estado.st_size == marca["tamanio"] and estado.st_mtime_ns == marca["mtime_ns"]:
+                    continue # el archivo no cambió desde la última corrida
+
+                es_cola = (bool(marca) and estado.st_size >= marca["bytes_leidos"]
+                           and marca.get("huella") == calcular_huella_del_archivo(ruta_de_sonda, marca["bytes_leidos"]))
+                desde_byte = marca["bytes_leidos"] if es_cola else 0
+                contenido, byte_final = leer_bytes_nuevos(ruta_de_sonda, desde_byte)
+
+                if es_cola:
+                    encabezado_crudo = marca["encabezado"]
+                else:
+                    encabezado_crudo = pd.read_csv(io.BytesIO(contenido), nrows=0).columns.tolist()
+
+                df = None
+                if contenido.strip():
+                    df = leer_csv_tipado(io.BytesIO(contenido), serial, motor=motor, encabezado_crudo=encabezado_crudo if es_cola else None)
+                    if es_cola and marca.get("ultimo_tspan_de_envio"):
+                        df = df[df["tspan_de_envio"] > pd.Timestamp(marca["ultimo_tspan_de_envio"])]
+                    if not df.empty:
+                        datos_nuevos.append(df)
+
+                ultimo_tspan_de_envio = marca.get("ultimo_tspan_de_envio") if marca else None
+                if df is not None and not df.empty:
+                    ultimo_tspan_de_envio = str(df["tspan_de_envio"].max())
+
+                marcas_de_la_sonda[nombre_de_archivo] = {
+                    "tamanio": estado.st_size,
+                    "mtime_ns": estado.st_mtime_ns,
+                    "bytes_leidos": byte_final,
+                    "huella": calcular_huella_del_archivo(ruta_de_sonda, byte_final),
+                    "encabezado": encabezado_crudo,
+                    "ultimo_tspan_de_envio": ultimo_tspan_de_envio,
+                }
+                print(f"Sonda {serial}: {0 if df is None else len(df)} filas nuevas en {nombre_de_archivo} ({'cola' if es_cola else 'lectura completa'}).")
+            except Exception as e:
+                print(f"Ocurrió un error al cargar los datos de la sonda {ruta_de_sonda}: {e}")
+                marcas_de_la_sonda.pop(nombre_de_archivo, None) # la siguiente corrida lee el archivo completo
+
+        if datos_nuevos:
+            almacen = combinar_archivos_de_una_sonda(([almacen] if almacen is not None else []) + datos_nuevos, serial)
+            almacen.to_pickle(ruta_del_almacen)
+
+        if almacen is not None:
+            output_dir[serial] = almacen
             print(f"Datos cargados correctamente para la sonda: {serial}")
-        except FileNotFoundError:
-            print(f"Archivo no encontrado: {ruta_de_sonda}")
-        except pd.errors.EmptyDataError:
-            print(f"El archivo está vacío: {ruta_de_sonda}")
-        except Exception as e:
-            print(f"Ocurrió un error al cargar los datos de la sonda {ruta_de_sonda}: {e}")
 
-    return output_dir
+    with open(ruta_de_marcas_de_agua, "w", encoding="utf-8") as archivo:
+        json.dump(marcas_de_agua, archivo, indent=4)
 
+    return output_dir
 
+@acepta_contexto_de_ejecucion
 def leer_excel_de_despliegue_de_sondas_corregido() -> pd.DataFrame:
     """ Lee el archivo Excel que contiene la información de despliegue de las sondas y devuelve un dataframe con datos de despliegue de las sondas 
     para las que se encontraron datos.
@@ -95,25 +370,21 @@ def leer_excel_de_despliegue_de_sondas_corregido() -> pd.DataFrame:
         latitud_de_despliegue = float
         longitud_de_despliegue = float
         campania = string
+
+    El Excel se lee una sola vez por proceso (ver services/Carga/metadatos_de_despliegue.py).
     """
-    ruta_al_excel_de_despliegue_de_sondas = crear_ruta_a_carpeta(get_ruta_al_excel_de_despliegue_de_sondas())   
-    ruta_al_excel_de_despliegue_de_sondas = ruta_al_excel_de_despliegue_de_sondas + "_corregido.xlsx"
     try:
-
-        df_excel = pd.read_excel(ruta_al_excel_de_despliegue_de_sondas)
-        df_excel.dropna(subset=['serial_de_sonda'], inplace=True) # elimino ausentes o nulos para que la conversion no de error
-        df_excel['serial_de_sonda'] = df_excel['serial_de_sonda'].astype(float).astype(int).astype(str)
-        
-        return df_excel
-    
+        return leer_excel_de_despliegue(corregido=True)
     except FileNotFoundError:
-        raise FileNotFoundError(f"No se encontró el archivo Excel en la ruta: {ruta_al_excel_de_despliegue_de_sondas}")
+        raise
     except Exception as e:
         raise ValueError(f"Ocurrió un error al leer el archivo Excel: {e}")
 
 
+@acepta_contexto_de_ejecucion
 def seleccionar_rango_de_fechas(diccionario: dict, 
-                                buscar_fechas_anteriores_al_estudio: bool = False)-> dict:
+                                buscar_fechas_anteriores_al_estudio: bool = False,
+                                incluir_fechas_anteriores_al_estudio: bool = False)-> dict:
     """ Selecciona los datos dentro del rango de fechas.
     Este rango puede ser el definido en la configuración general 
     o 
@@ -122,6 +393,8 @@ def seleccionar_rango_de_fechas(diccionario: dict,
     Parámetros:
         diccionario (dict): Diccionario con los dataframes de cada sonda.
         buscar_fechas_anteriores_al_estudio (bool): Si es True, el rango de fechas se define desde la fecha de la primera medición hasta la fecha de inicio del análisis.
+        incluir_fechas_anteriores_al_estudio (bool): Si es True, el rango va desde la fecha de la primera medición hasta el fin del análisis
+            (datos previos y datos del estudio juntos, ver 'procesar_datos_de_sondas').
     
     Retorna:
         dict: Diccionario con los dataframes de cada sonda filtrados por el rango de fechas.
@@ -131,16 +404,12 @@ def seleccionar_rango_de_fechas(diccionario: dict,
     fecha_de_inicio_del_analisis = get_fecha_de_inicio_del_analisis()
     fecha_de_fin_del_analisis = get_fecha_de_fin_del_analisis()
     
-    ruta_al_excel_de_despliegue_de_sondas = crear_ruta_a_carpeta(get_ruta_al_excel_de_despliegue_de_sondas())   
-    ruta_al_excel_de_despliegue_de_sondas = ruta_al_excel_de_despliegue_de_sondas + "_corregido.xlsx"
-    df_excel = pd.read_excel(ruta_al_excel_de_despliegue_de_sondas)
-    df_excel.dropna(subset=['serial_de_sonda'], inplace=True) # elimino ausentes o nulos para que la conversion no de error
-    df_excel['serial_de_sonda'] = df_excel['serial_de_sonda'].astype(float).astype(int).astype(str)
+    # Fechas de despliegue de todas las sondas en una sola consulta al Excel de despliegue (en caché)
+    fechas_de_despliegue = unir_despliegue_a_sondas(list(diccionario.keys()), ["fecha_y_hora_de_despliegue_maniobra"])["fecha_y_hora_de_despliegue_maniobra"]
     
     for serial in list(diccionario.keys()):
-        idx = df_excel[df_excel['serial_de_sonda'] == serial].index[0]
         # Caso general: se usan las fechas definidas en la configuración general
-        fecha_de_primera_medicion = pd.to_datetime(df_excel.loc[idx, "fecha_y_hora_de_despliegue_maniobra"], format="%Y-%m-%d %H:%M:%S")    # del excel de despliegue
+        fecha_de_primera_medicion = fechas_de_despliegue[serial]    # del excel de despliegue
         fecha_de_la_ultima_medicion = diccionario[serial]["tspan_de_envio"].max() # de los datos cargados
         fecha_de_inicio = max(fecha_de_inicio_del_analisis, fecha_de_primera_medicion) # fecha de inicio es la menor entre la fecha de inicio del análisis y la fecha de la primera medición
         fecha_de_fin = min(fecha_de_fin_del_analisis, fecha_de_la_ultima_medicion) # fecha de fin es la mayor entre la fecha de fin del análisis y la fecha de la última medición
@@ -159,30 +428,43 @@ def seleccionar_rango_de_fechas(diccionario: dict,
             mask = (df["tspan_de_envio"] < fecha_de_inicio)  
             if mask.empty:
                 msg = f"La sonda {serial} no tiene datos anteriores a la fecha de inicio del análisis o a la fecha de la primera medición)."
+
+        # Datos previos y datos del estudio juntos: desde la liberación hasta el fin del análisis
+        if incluir_fechas_anteriores_al_estudio:
+            mask = (df["tspan_de_envio"] >= fecha_de_primera_medicion) & (df["tspan_de_envio"] <= fecha_de_fin)
+            if not mask.any():
+                msg = f"La sonda {serial} no tiene datos entre la fecha de despliegue y el fin del análisis."
         
         pre_output = df.loc[mask].reset_index(drop=True)
         
         if msg:
             print(msg)
         
-        output_dic[serial] = pre_output.copy()
+        output_dic[serial] = pre_output # df.loc[mask] ya es un dataframe nuevo, no hace falta otra copia
 
     return output_dic
 
-def buscar_y_eliminar_duplicados(diccionario: dict)-> dict:
-    """ Busca y elimina los datos duplicados en cada dataframe del diccionario dado.
+@acepta_contexto_de_ejecucion
+def buscar_y_eliminar_duplicados(diccionario: dict, devolver_reporte: bool = False):
+    """ Busca y elimina los datos duplicados en cada dataframe del diccionario dado, en una sola pasada por sonda
+    (hash de cada fila, ver eliminar_duplicados_por_hash). Las columnas que definen un duplicado se toman de
+    'columnas_clave_de_duplicados' en la configuración general (None = todas las columnas).
     Retorna un diccionario con los dataframes sin datos duplicados.
+    Si devolver_reporte es True retorna (diccionario, reporte), con reporte = {serial: cantidad de duplicados eliminados}.
     """
+    reporte = {}
     if not diccionario:
-        return diccionario  # Retorna el diccionario vacío si no hay datos
+        return (diccionario, reporte) if devolver_reporte else diccionario  # Retorna el diccionario vacío si no hay datos
     
+    columnas_clave = get_columnas_clave_de_duplicados()
     seriales_encontrados = list(diccionario.keys())
     for serial in seriales_encontrados: # los keys del diccionario son el número de serie de cada sonda
-        df = diccionario[serial] # DataFrame de la sonda antes del filtrado
-        duplicados_explicitos = buscar_duplicados_explicitos(data = df)
-        diccionario[serial] = eliminar_datos_duplicados(data = df, duplicados_explicitos = duplicados_explicitos, serial_de_sonda = serial)
+        df = diccionario[serial] # DataFrame de la sonda; los duplicados se eliminan en el mismo objeto
+        reporte[serial] = eliminar_duplicados_por_hash(data = df, columnas_clave = columnas_clave)
+        if reporte[serial] > 0:
+            print(f"Se encontraron {reporte[serial]} datos duplicados en la sonda {serial}. Eliminándolos...")
     
-    return diccionario
+    return (diccionario, reporte) if devolver_reporte else diccionario
 
 
 def ordernar_datos_por_fecha(diccionario: dict) -> dict:
@@ -197,44 +479,105 @@ def ordernar_datos_por_fecha(diccionario: dict) -> dict:
         diccionario[serial] = ordenar_df_por_fecha(data = df,serial_de_sonda=serial)
     return diccionario
 
+@acepta_contexto_de_ejecucion
 def crear_tspan_redondeado(diccionario: dict)->dict:
-    """ recibe el diccionario que contiene los dataframe de cada sonda y modifica el tspan de cada dataframe.
-    Regla de redondeo:
+    """ recibe el diccionario que contiene los dataframe de cada sonda y agrega el tspan redondeado de cada dataframe.
+    Regla de redondeo: cada fecha se lleva al inicio de su intervalo de delta_tiempo (configuración general).
+    Con delta_tiempo = "0.5h":
     Si HH:MM es < 30 mins se redondea a HH:00
     Si HH:MM es >=30 y <=59 se redondea a HH:30"""
     if not diccionario:
         return diccionario  # Retorna el diccionario vacío si no hay datos
     
+    delta_tiempo = get_delta_tiempo()
     seriales_encontrados = list(diccionario.keys())
     for serial in seriales_encontrados:
         df = diccionario[serial]
-        tspan_mod = [tspan_value.replace(minute=0) if tspan_value.minute < 30 else tspan_value.replace(minute=30) for tspan_value in df["tspan_de_envio"]]
-        df["tspan_rounded"] = tspan_mod
+        df["tspan_rounded"] = asignar_intervalo_de_tiempo(df["tspan_de_envio"], delta_tiempo)
         diccionario[serial] = df
     
     return diccionario
 
-def existen_fechas_redondeadas_duplicadas(diccionario: dict) -> bool:
-    """ Verifica si existen fechas redondeadas duplicadas en los dataframes del diccionario.
+@acepta_contexto_de_ejecucion
+def limpiar_datos_de_sondas(diccionario: dict, incluir_fechas_anteriores_al_estudio: bool = True, devolver_reporte: bool = False):
+    """ Equivale a seleccionar_rango_de_fechas -> buscar_y_eliminar_duplicados -> ordernar_datos_por_fecha -> crear_tspan_redondeado,
+    pero cada sonda se recorre una sola vez (ver limpiar_datos_de_sonda).
+    El rango va desde la fecha de despliegue (Excel de despliegue) hasta el fin del análisis; si incluir_fechas_anteriores_al_estudio
+    es False, desde la fecha más tardía entre el despliegue y el inicio del análisis.
+
+    Retorna:
+        El diccionario {serial: dataframe}. Si devolver_reporte es True retorna (diccionario, reporte),
+        con reporte = {serial: cantidad de duplicados eliminados}.
+    """
+    output_dic = {}
+    reporte = {}
+    if not diccionario:
+        return (output_dic, reporte) if devolver_reporte else output_dic  # Retorna el diccionario vacío si no hay datos
+
+    fecha_de_inicio_del_analisis = pd.Timestamp(get_fecha_de_inicio_del_analisis())
+    fecha_de_fin_del_analisis = pd.Timestamp(get_fecha_de_fin_del_analisis())
+    delta_tiempo = get_delta_tiempo()
+    columnas_clave = get_columnas_clave_de_duplicados()
+
+    # Fechas de despliegue de todas las sondas en una sola consulta al Excel de despliegue (en caché)
+    fechas_de_despliegue = unir_despliegue_a_sondas(list(diccionario.keys()), ["fecha_y_hora_de_despliegue_maniobra"])["fecha_y_hora_de_despliegue_maniobra"]
+
+    for serial, df in diccionario.items():
+        fecha_de_inicio = fechas_de_despliegue[serial]
+        if not incluir_fechas_anteriores_al_estudio and not pd.isna(fecha_de_inicio):
+            fecha_de_inicio = max(fecha_de_inicio_del_analisis, fecha_de_inicio)
+
+        output_dic[serial], reporte[serial] = limpiar_datos_de_sonda(data=df,
+                                                                     fecha_de_inicio=fecha_de_inicio,
+                                                                     fecha_de_fin=fecha_de_fin_del_analisis,
+                                                                     delta_tiempo=delta_tiempo,
+                                                                     columnas_clave=columnas_clave)
+        if reporte[serial] > 0:
+            print(f"Se encontraron {reporte[serial]} datos duplicados en la sonda {serial}. Eliminándolos...")
+        if output_dic[serial].empty:
+            print(f"La sonda {serial} no tiene datos entre la fecha de despliegue y el fin del análisis.")
+
+    return (output_dic, reporte) if devolver_reporte else output_dic
+
+@acepta_contexto_de_ejecucion
+def existen_fechas_redondeadas_duplicadas(diccionario: dict) -> dict:
+    """ Verifica si existen fechas redondeadas duplicadas (varias transmisiones en el mismo intervalo) en los dataframes del diccionario
+    y las resuelve según 'estrategia_de_fechas_redondeadas_duplicadas' de la configuración general:
+        "primero": se deja solo la primera ocurrencia y se eliminan las demás.
+        "reasignar": las transmisiones sobrantes se mueven a un intervalo vecino libre (anterior o siguiente), sin cambiar el orden de envío.
+        "promediar": las transmisiones del mismo intervalo se promedian (la dirección como vector).
     seriales_encontrados: lista de seriales de sondas para las que se encontraron archivos CSV -> lista de strings
     """
     output_dic = {}
     if not diccionario:
         return output_dic  # Retorna el diccionario vacío si no hay datos
     
+    estrategia = get_estrategia_de_fechas_redondeadas_duplicadas()
+    if estrategia not in ["primero", "reasignar", "promediar"]:
+        raise ValueError(f"Estrategia de fechas redondeadas duplicadas no válida: {estrategia}. Opciones: 'primero', 'reasignar', 'promediar'.")
+    delta_tiempo = get_delta_tiempo()
+
     seriales_encontrados = list(diccionario.keys())
     for serial in seriales_encontrados:
         df = diccionario[serial]
-        duplicados_implicitos = df[df["tspan_rounded"].duplicated()]
-        if not duplicados_implicitos.empty:
-            print(f"Las siguientes fechas redondeadas están duplicadas en la sonda {serial}.")
-            print(duplicados_implicitos[["tspan_de_envio","tspan_rounded"]])
-            print("actualmente se deja solo la primera ocurrencia, se eliminan las demás. Se suguiere hacer una funcion que distribuya a la hora anterior y/o siguiente.")
-            df = df.drop_duplicates(subset="tspan_rounded", keep='first')
-            output_dic[serial] = df.reset_index(drop=True)
-        else: 
+        es_duplicado = df["tspan_rounded"].duplicated()
+        if not es_duplicado.any():
             print(f"No se encontraron fechas redondeadas duplicadas en la sonda {serial}.")
             output_dic[serial] = df
+            continue
+
+        print(f"Se encontraron {es_duplicado.sum()} fechas redondeadas duplicadas en la sonda {serial}.")
+        if estrategia == "primero":
+            print(df.loc[es_duplicado, ["tspan_de_envio","tspan_rounded"]])
+            df = df.drop_duplicates(subset="tspan_rounded", keep='first').reset_index(drop=True)
+            print("Se deja solo la primera ocurrencia, se eliminan las demás.")
+        elif estrategia == "reasignar":
+            df, numero_de_reasignadas, numero_de_eliminadas = reasignar_fechas_redondeadas_duplicadas(df, delta_tiempo)
+            print(f"Se reasignaron {numero_de_reasignadas} transmisiones a un intervalo vecino libre y se eliminaron {numero_de_eliminadas} sin intervalo libre.")
+        else:
+            df = promediar_fechas_redondeadas_duplicadas(df)
+            print("Las transmisiones de un mismo intervalo se promediaron.")
+        output_dic[serial] = df
             
     return output_dic
 
@@ -254,77 +597,55 @@ def get_cols_names_sin_tspan(diccionario: dict) -> list:
 
     return columnas
 
-def crear_diccionario_con_dataframes_vacios(diccionario: dict, keys: list) -> dict:
-    """ Crea un diccionario cuyos keys son los seriales de las sondas; y dentro de cada key se encontra un dataframe vacío 
-    con las fechas sintéticas generadas y con las columnas dadas en keys.
-    keys: lista de nombres de columnas que debe tener cada dataframe vacío (excluyendo tspan_de_envio y tspan_rounded)
+@acepta_contexto_de_ejecucion
+def alinear_datos_a_la_malla(diccionario: dict) -> dict:
+    """ Lleva los datos de cada sonda a su malla de fechas sintéticas (cada delta_tiempo, desde el primer hasta el último tspan_rounded).
+    Según 'representacion_de_la_malla':
+        "densa": en un solo paso con reindex (reindexar_a_fechas_de_la_malla), con un valor de relleno según el tipo de dato
+                 en las fechas de la malla sin datos.
+        "dispersa": solo se conservan las filas recibidas, ordenadas por tspan_rounded; las fechas de la malla y los huecos
+                    se calculan cuando se necesitan (calcular_malla_de_la_sonda, marcar_huecos_de_la_malla).
+
+    Retorna:
+        dict {serial: dataframe} con 'tspan_rounded' como primera columna.
     """
-    delta_tiempo = get_delta_tiempo()
     output_dic = {}
     if not diccionario:
         return output_dic  # Retorna el diccionario vacío si no hay datos
     
-    for serial in diccionario.keys():
-        df = diccionario[serial]
-        
+    delta_tiempo = get_delta_tiempo()
+    representacion = get_representacion_de_la_malla()
+    if representacion not in ["densa", "dispersa"]:
+        raise ValueError(f"Representación de la malla no válida: {representacion}. Opciones: 'densa', 'dispersa'.")
+
+    for serial, df in diccionario.items():
         if df.empty:
             print(f"El dataframe de la sonda {serial} está vacío. Avanzando a la siguiente sonda")
             continue
-        
-        fecha_de_inicio = df["tspan_rounded"].min()
-        fecha_de_fin = df["tspan_rounded"].max()
-        tspan_sintetico = crear_rango_de_fechas_sintetico(fecha_de_inicio, fecha_de_fin, delta_tiempo)
-        
-        output_dic[serial] = {}
-        
-        diccionario_de_apoyo = {
-            "tspan":tspan_sintetico
-        }
-
-        data = diccionario[serial] # dataframe de la sonda original
-        # Bucle para crear columnas vacías según el tipo de dato del dataframe original
-        for key in keys:
-            if pd.api.types.is_numeric_dtype(data[key]): # Si es numérico
-                diccionario_de_apoyo[key]= np.full(len(tspan_sintetico), np.nan)
-            elif pd.api.types.is_string_dtype(data[key]): # Si es string
-                diccionario_de_apoyo[key]= np.full(len(tspan_sintetico), "")
-
-        df = pd.DataFrame(diccionario_de_apoyo) # Crear DataFrame vacío con las fechas sintéticas y columnas vacías
-        output_dic[serial] = df # Asignar el DataFrame vacío al diccionario de salida
-        
-    return output_dic
+        if df["tspan_rounded"].duplicated().any():
+            raise ValueError(f"La sonda {serial} tiene fechas redondeadas duplicadas; ejecutar antes existen_fechas_redondeadas_duplicadas.")
+
+        if representacion == "dispersa":
+            # Solo se reordena (y se copia) si hace falta
+            if not df["tspan_rounded"].is_monotonic_increasing:
+                df = df.sort_values("tspan_rounded", kind="mergesort", ignore_index=True)
+            if df.columns[0] != "tspan_rounded":
+                df = df[["tspan_rounded"] + [columna for columna in df.columns if columna != "tspan_rounded"]]
+            output_dic[serial] = df
+            continue
 
-def merge_df_vacio_con_datos(diccionario_con_datos: dict, diccionario_con_dfs_vacios: dict) -> dict:
-    """Para cada sonda se buscan el diccionario de datos y el diccionario de dataframes vacíos, luego se combinan ambos dataframe.
-    El dataframe con datos tiene tspan_de_envio y tspan_rounded, mientras que el dataframe vacío solo tiene tspan; que es una columna de fechas
-    sintéticas redondeadas desde el despliegue de la sonda hasta el fin del periodo de análisis.
-    El resultado es un nuevo diccionario con un dataframe para cada sonda, donde cada dataframe tiene todas las fechas posibles 
-    en donde deben haber datos entre el inicio y fin del análisis. Si en una fecha hay datos, se mantienen esos datos, si no tiene datos,
-    se coloca NaN o "" según el tipo de dato de la columna."""
-
-    output_dic = {}
-    
-    if not diccionario_con_dfs_vacios: 
-        return output_dic  # Retorna el diccionario vacío si no hay datos
-    
-    seriales = list(diccionario_con_datos.keys())
-    for serial in seriales:
-        df_vacio = diccionario_con_dfs_vacios[serial].set_index("tspan") # Buscar el dataframe vacío de la sonda y asignar tspan como índice
-        df_sonda = diccionario_con_datos[serial].set_index("tspan_rounded") # Buscar el dataframe con datos de la sonda y asignar tspan_rounded como índice
-        df_sonda.rename(columns={"tspan":"tspan_de_envio"}, inplace=True)  # Cambiar el nombre de la columna tspan para evitar conflictos
-        # combine_first mantiene todas las fechas de df_vacio y pone NaN donde no hay datos en df_sonda
-        df_merged = df_vacio.combine_first(df_sonda)
-        df_merged.index.name = "tspan_rounded"
-        output_dic[serial] = df_merged.reset_index()
+        tspan_sintetico = crear_rango_de_fechas_sintetico(df["tspan_rounded"].min(), df["tspan_rounded"].max(), delta_tiempo)
+        output_dic[serial] = reindexar_a_fechas_de_la_malla(df, tspan_sintetico)
 
     return output_dic
 
 def eliminar_nans_iniciales(dic_anteriores: dict, dic_estudio: dict) -> tuple:
-    """ Elimina los NaNs iniciales y finales de cada dataframe del diccionario.
+    """ Elimina los NaNs iniciales de cada dataframe del diccionario (filas sin tspan_de_envio o sin latitud).
+    Si la sonda tiene datos anteriores al estudio se recortan esos; si no, se recortan los datos del estudio.
     Los NaNs intermedios se mantienen.
     """
 
-    if not dic_anteriores or not dic_estudio:
+    if not dic_estudio:
         return dic_anteriores, dic_estudio
     
     output_dic_anteriores = dic_anteriores.copy()
@@ -334,28 +655,20 @@ def eliminar_nans_iniciales(dic_anteriores: dict, dic_estudio: dict) -> tuple:
     for serial in seriales:
         # Si la sonda tiene datos anteriores al estudio (se eliminan esos NaNs iniciales)
         if serial in dic_anteriores: 
-            df_anteriores = dic_anteriores[serial]
-            # Eliminar NaNs iniciales hasta la primera fila con datos
-            row = df_anteriores.loc[0,:]
-            while pd.isna(row["tspan_de_envio"]) or pd.isna(row["latitud"]):
-                df_anteriores = df_anteriores.drop(index=df_anteriores.index[0]).reset_index(drop=True)
-                row = df_anteriores.loc[0,:]
-            output_dic_anteriores[serial] = df_anteriores
+            output_dic_anteriores[serial] = recortar_filas_vacias(dic_anteriores[serial], inicio=True, fin=False)
+            if output_dic_anteriores[serial].empty:
+                print(f"La sonda {serial} no tiene filas con datos antes del periodo de estudio.")
         
         # La sonda solo tiene datos dentro del periodo de estudio
         else:
-            df_estudio = dic_estudio[serial]
-            # Eliminar NaNs iniciales hasta la primera fila con datos
-            row = df_estudio.loc[0,:]
-            while pd.isna(row["tspan_de_envio"]) or pd.isna(row["latitud"]):
-                df_estudio = df_estudio.drop(index=df_estudio.index[0]).reset_index(drop=True)
-                row = df_estudio.loc[0,:]
-            output_dic_estudio[serial] = df_estudio
+            output_dic_estudio[serial] = recortar_filas_vacias(dic_estudio[serial], inicio=True, fin=False)
+            if output_dic_estudio[serial].empty:
+                print(f"La sonda {serial} no tiene filas con datos en el periodo de estudio.")
 
     return output_dic_anteriores, output_dic_estudio
 
 def eliminar_nans_finales(dic_estudio: dict) -> dict:
-    """ Elimina los NaNs finales de cada dataframe del diccionario.
+    """ Elimina los NaNs finales de cada dataframe del diccionario (filas sin tspan_de_envio o sin latitud).
     Los NaNs intermedios se mantienen.
     """
     output_dic_estudio = dic_estudio.copy()
@@ -365,17 +678,13 @@ def eliminar_nans_finales(dic_estudio: dict) -> dict:
         
     seriales = list(dic_estudio.keys())
     for serial in seriales:
-        
-        df_estudio = dic_estudio[serial]
-        # Eliminar NaNs finales hasta la última fila con datos
-        row = df_estudio.loc[df_estudio.index[-1],:]
-        while pd.isna(row["tspan_de_envio"]) or pd.isna(row["latitud"]):
-            df_estudio = df_estudio.drop(index=df_estudio.index[-1]).reset_index(drop=True)
-            row = df_estudio.loc[df_estudio.index[-1],:]
-        output_dic_estudio[serial] = df_estudio
+        output_dic_estudio[serial] = recortar_filas_vacias(dic_estudio[serial], inicio=False, fin=True)
+        if output_dic_estudio[serial].empty:
+            print(f"La sonda {serial} no tiene filas con datos en el periodo de estudio.")
 
     return output_dic_estudio
 
+@acepta_contexto_de_ejecucion
 def agregar_coordenadas_de_despliegue_maniobras_al_excel_de_despliegue(diccionario) -> None:
     """ Agrega las columnas de latitud y longitud de despliegue maniobras al dataframe de despliegue de las sondas.
     Las coordenadas maniobras se obtienen del primer valor no NaN de latitud y longitud en el dataframe de cada sonda en el diccionario.
@@ -383,31 +692,29 @@ def agregar_coordenadas_de_despliegue_maniobras_al_excel_de_despliegue(diccionar
     PENDIENTE HACER
     """
     
-    ruta_al_excel_de_despliegue_de_sondas = crear_ruta_a_carpeta(get_ruta_al_excel_de_despliegue_de_sondas())   
-    ruta_al_excel_de_despliegue_de_sondas = ruta_al_excel_de_despliegue_de_sondas + ".xlsx"
-    df_excel = pd.read_excel(ruta_al_excel_de_despliegue_de_sondas)
-    df_excel_filtrado = df_excel.dropna(subset=['serial_de_sonda']).copy() # elimino ausentes o nulos para que la conversion no de error
-    df_excel_filtrado['serial_de_sonda'] = df_excel_filtrado['serial_de_sonda'].astype(float).astype(int).astype(str) 
-    df_excel_filtrado["fecha_y_hora_de_despliegue_maniobra"] = pd.to_datetime(df_excel_filtrado["fecha_y_hora_de_despliegue_maniobra"]) # asegurar que el tipo sea string para evitar errores al asignar las fechas maniobras. Luego se vuelve a convertir a datetime al guardar el excel corregido.
+    df_excel_filtrado = leer_excel_de_despliegue(corregido=False) # Excel original (en caché), seriales como string y fechas como pd.datetime
     
-    seriales = list(diccionario.keys())
-    for serial in seriales:
-        df = diccionario[serial]
-        row = df.loc[0,:]
-        latitud_despliegue_maniobra = row["latitud"]
-        longitud_despliegue_maniobra = row["longitud"]
-        tspan_de_envio = pd.to_datetime(row["tspan_de_envio"],format="%Y-%m-%d %H:%M:%S")
-        # tspan_rounded = tspan_de_envio.replace(minute=0) if tspan_de_envio.minute < 30 else tspan_de_envio.replace(minute=30)
-        
-        idx = None
-        idx = df_excel_filtrado[df_excel_filtrado['serial_de_sonda'] == serial].index[0]
-        if idx is not None: 
-            df_excel_filtrado.loc[idx, "fecha_y_hora_de_despliegue_maniobra"] = tspan_de_envio
-            df_excel_filtrado.loc[idx, "latitud_maniobra"] = latitud_despliegue_maniobra
-            df_excel_filtrado.loc[idx, "longitud_maniobra"] = longitud_despliegue_maniobra
-            print(f"Sonda {serial}: Latitud maniobra: {latitud_despliegue_maniobra}, Longitud maniobra: {longitud_despliegue_maniobra}, Fecha y hora de despliegue maniobra: {tspan_de_envio}")
+    # Primera fila de cada sonda, todas las sondas a la vez
+    primeras_filas = pd.DataFrame.from_dict({serial: df.loc[0, ["latitud", "longitud", "tspan_de_envio"]] for serial, df in diccionario.items()}, orient="index")
+    primeras_filas["tspan_de_envio"] = pd.to_datetime(primeras_filas["tspan_de_envio"])
+    
+    # Fila del Excel de cada serial (la primera si el serial está repetido)
+    fila_por_serial = pd.Series(df_excel_filtrado.index, index=df_excel_filtrado["serial_de_sonda"])
+    fila_por_serial = fila_por_serial[~fila_por_serial.index.duplicated(keep="first")]
+    
+    seriales_sin_despliegue = primeras_filas.index.difference(fila_por_serial.index)
+    if not seriales_sin_despliegue.empty:
+        print(f"Advertencia: Las sondas {list(seriales_sin_despliegue)} no se encuentran en el Excel de despliegue.")
+    primeras_filas = primeras_filas.loc[primeras_filas.index.isin(fila_por_serial.index)]
+    
+    filas = fila_por_serial.loc[primeras_filas.index].to_numpy()
+    df_excel_filtrado.loc[filas, "fecha_y_hora_de_despliegue_maniobra"] = primeras_filas["tspan_de_envio"].to_numpy()
+    df_excel_filtrado.loc[filas, "latitud_maniobra"] = primeras_filas["latitud"].to_numpy()
+    df_excel_filtrado.loc[filas, "longitud_maniobra"] = primeras_filas["longitud"].to_numpy()
+    for serial, row in primeras_filas.iterrows():
+        print(f"Sonda {serial}: Latitud maniobra: {row['latitud']}, Longitud maniobra: {row['longitud']}, Fecha y hora de despliegue maniobra: {row['tspan_de_envio']}")
    
-    # Guardar el DataFrame modificado de nuevo en el archivo Excel
+    # Guardar el DataFrame modificado de nuevo en el archivo Excel (al cambiar su fecha de modificación se invalida la caché)
     ruta_al_excel_de_despliegue_de_sondas = crear_ruta_a_carpeta(get_ruta_al_excel_de_despliegue_de_sondas())   
     ruta_al_excel_de_despliegue_de_sondas = ruta_al_excel_de_despliegue_de_sondas +"_corregido.xlsx"
     df_excel_filtrado.to_excel(ruta_al_excel_de_despliegue_de_sondas, index=False)
@@ -431,4 +738,163 @@ def agregar_componentes_de_la_velocidad(diccionario: dict) -> dict:
         df["v_corriente"] = v
         diccionario[serial] = df    
 
-    return diccionario
\ No newline at end of file
+    return diccionario
+
+def agregar_deriva_por_gps(diccionario: dict) -> dict:
+    """ Agrega a cada dataframe la deriva calculada con la trayectoria GPS (latitud, longitud y tspan_de_envio),
+    para compararla con la rapidez, dirección y distancia que reporta la sonda:
+        desplazamiento_gps (m): distancia (haversine) desde la posición válida anterior de la sonda.
+        rap_deriva_gps (m/s): desplazamiento_gps entre el tiempo transcurrido desde esa posición.
+        dir_deriva_gps (°): rumbo desde la posición anterior (0 = norte, sentido horario, igual que dir_corriente).
+        distancia_acumulada_gps (m): suma de los desplazamientos desde la primera posición de la sonda.
+    En la primera posición de cada sonda no hay tramo anterior: el desplazamiento y la distancia acumulada son 0, y la rapidez
+    y el rumbo quedan con NaN (estas columnas no cuentan para decidir si una fila está completa, ver marcar_filas_completas).
+    Las filas sin posición (o marcadas por el control de calidad) quedan con NaN.
+    La distancia acumulada se guarda en float64 (en float32 se pierden metros después de miles de kilómetros); las demás en float32.
+    Todas las sondas se calculan juntas en una sola pasada de NumPy.
+    """
+    if not diccionario:
+        return diccionario  # Retorna el diccionario vacío si no hay datos
+
+    seriales = list(diccionario.keys())
+    datos_enmascarados = {serial: aplicar_mascara_de_calidad(diccionario[serial], columnas=["latitud", "longitud"]) for serial in seriales}
+    largos = np.array([len(diccionario[serial]) for serial in seriales])
+    latitudes = concatenar_columna_de_la_flota(datos_enmascarados, "latitud")
+    longitudes = concatenar_columna_de_la_flota(datos_enmascarados, "longitud")
+    tiempos = concatenar_tiempos_de_la_flota(datos_enmascarados)
+
+    es_valido = ~np.isnan(latitudes) & ~np.isnan(longitudes) & ~np.isnan(tiempos)
+    posiciones, es_primero = ubicar_datos_validos_de_la_flota(es_valido, marcar_inicio_de_sonda(largos))
+
+    desplazamiento = np.full(len(latitudes), np.nan)
+    rapidez = np.full(len(latitudes), np.nan)
+    rumbo = np.full(len(latitudes), np.nan)
+    distancia_acumulada = np.full(len(latitudes), np.nan)
+    if len(posiciones) > 0:
+        anterior, actual = posiciones[:-1], posiciones[1:]
+        tramo = calcular_distancia_haversine(latitudes[anterior], longitudes[anterior], latitudes[actual], longitudes[actual])
+        segundos = tiempos[actual] - tiempos[anterior]
+        tramo_valido = ~es_primero[1:] # los tramos entre la última posición de una sonda y la primera de la siguiente no cuentan
+        desplazamiento[posiciones[es_primero]] = 0.0 # primera posición de cada sonda (rapidez y rumbo sin tramo: NaN)
+        desplazamiento[actual[tramo_valido]] = tramo[tramo_valido]
+        rapidez[actual[tramo_valido]] = np.divide(tramo, segundos, out=np.full(len(tramo), np.nan), where=segundos > 0)[tramo_valido]
+        rumbo[actual[tramo_valido]] = calcular_rumbo_geodesico(latitudes[anterior], longitudes[anterior], latitudes[actual], longitudes[actual])[tramo_valido]
+
+        # Distancia acumulada por sonda: suma de los tramos, reiniciando en la primera posición de cada sonda
+        tramos_de_la_flota = np.concatenate([[0.0], np.where(tramo_valido, tramo, 0.0)])
+        suma = np.cumsum(tramos_de_la_flota)
+        suma_al_inicio_de_la_sonda = np.maximum.accumulate(np.where(es_primero, suma, 0.0))
+        distancia_acumulada[posiciones] = suma - suma_al_inicio_de_la_sonda
+
+    columnas_de_deriva = {"desplazamiento_gps": desplazamiento.astype(np.float32), "rap_deriva_gps": rapidez.astype(np.float32),
+                          "dir_deriva_gps": rumbo.astype(np.float32), "distancia_acumulada_gps": distancia_acumulada}
+    inicios = np.concatenate([[0], np.cumsum(largos)])
+    for iserial, serial in enumerate(seriales):
+        df = diccionario[serial]
+        for columna, valores in columnas_de_deriva.items():
+            df[columna] = valores[inicios[iserial]:inicios[iserial + 1]]
+        diccionario[serial] = df
+
+    return diccionario
+
+@acepta_contexto_de_ejecucion
+def separar_periodo_previo_y_de_estudio(diccionario: dict) -> tuple:
+    """ Separa los dataframes procesados (desde el despliegue hasta el fin del estudio) en dos diccionarios:
+    los datos previos a la fecha de inicio del análisis y los datos del periodo de estudio.
+    Cada parte se recorta a su primera y última transmisión recibida, igual que si se hubiera procesado por separado.
+    Las sondas sin datos en alguna de las partes no aparecen en el diccionario correspondiente.
+
+    Retorna:
+        (dic_anteriores, dic_estudio) -> tupla de diccionarios
+    """
+    dic_anteriores = {}
+    dic_estudio = {}
+    fecha_de_inicio_del_analisis = get_fecha_de_inicio_del_analisis()
+
+    for serial, df in diccionario.items():
+        es_previo = (df["tspan_rounded"] < fecha_de_inicio_del_analisis).to_numpy()
+        for parte, dic_salida in [(df[es_previo], dic_anteriores), (df[~es_previo], dic_estudio)]:
+            parte = recortar_filas_vacias(parte, columnas=["tspan_de_envio"])
+            if not parte.empty:
+                dic_salida[serial] = parte
+
+    return dic_anteriores, dic_estudio
+
+@acepta_contexto_de_ejecucion
+def procesar_datos_de_sondas(diccionario: dict) -> tuple:
+    """ Procesa una sola vez los datos crudos de cada sonda, desde el despliegue hasta el fin del análisis,
+    y al final los separa en datos previos al estudio y datos del estudio.
+    Reemplaza correr dos veces la cadena (una con buscar_fechas_anteriores_al_estudio=True):
+        limpiar_datos_de_sondas (seleccionar_rango_de_fechas, buscar_y_eliminar_duplicados, ordernar_datos_por_fecha y
+        crear_tspan_redondeado en una sola pasada) -> existen_fechas_redondeadas_duplicadas -> malla de fechas -> eliminar_datos_espurios -> agregar_componentes_de_la_velocidad
+        -> agregar_deriva_por_gps -> aplicar_politica_de_tipos (si 'compactar_tipos_de_datos' es True)
+
+    Con 'modo_sin_copias' la cadena corre con Copy-on-Write (contexto_sin_copias): cada etapa es dueña del diccionario que recibe
+    y el diccionario de entrada no debe volver a usarse. Copy-on-Write es una opción global de pandas, por lo que con
+    'modo_sin_copias' esta función no debe correr al mismo tiempo que otros hilos que usen pandas. Con 'auditar_copias' se imprime cuántos MB copió cada etapa (auditar_copias).
+
+    Retorna:
+        (datos_anteriores, datos_del_estudio) -> tupla de diccionarios {serial: dataframe}
+    """
+    etapas = [
+        ("limpiar_datos_de_sondas", lambda datos: limpiar_datos_de_sondas(datos, incluir_fechas_anteriores_al_estudio=True)),
+        ("existen_fechas_redondeadas_duplicadas", existen_fechas_redondeadas_duplicadas),
+        ("descartar_sondas_vacias", lambda datos: {serial: df for serial, df in datos.items() if not df.empty}),
+        ("alinear_datos_a_la_malla", alinear_datos_a_la_malla),
+        ("eliminar_datos_espurios", eliminar_datos_espurios),
+        ("agregar_componentes_de_la_velocidad", agregar_componentes_de_la_velocidad),
+        ("agregar_deriva_por_gps", agregar_deriva_por_gps),
+    ]
+    if get_compactar_tipos_de_datos():
+        etapas.append(("aplicar_politica_de_tipos", aplicar_politica_de_tipos))
+
+    auditoria = [] if get_auditar_copias() else None
+    datos = diccionario
+    with contexto_sin_copias():
+        for nombre_de_la_etapa, etapa in etapas:
+            # Solo los arreglos de las columnas: una copia superficial de los dataframes haría copiar a la etapa con Copy-on-Write
+            antes = {serial: {columna: df[columna].array for columna in df.columns} for serial, df in datos.items()} if auditoria is not None else None
+            datos = etapa(datos)
+            if auditoria is not None:
+                auditoria.append(auditar_copias(nombre_de_la_etapa, antes, datos))
+
+        antes = {serial: {columna: df[columna].array for columna in df.columns} for serial, df in datos.items()} if auditoria is not None else None
+        datos_anteriores, datos_del_estudio = separar_periodo_previo_y_de_estudio(datos)
+
+    if auditoria is not None:
+        auditoria.append(auditar_copias("separar_periodo_previo_y_de_estudio", antes, datos_anteriores))
+        auditoria.append(auditar_copias("separar_periodo_previo_y_de_estudio", antes, datos_del_estudio))
+        auditoria = pd.concat(auditoria, ignore_index=True)
+        print("Auditoría de copias (MB copiados por etapa):")
+        print(auditoria.groupby("etapa", sort=False)["MB_copiados"].sum().round(3).to_string())
+
+    return datos_anteriores, datos_del_estudio
+
+@acepta_contexto_de_ejecucion
+def procesar_y_guardar_datos_de_sondas() -> dict:
+    """ Corre la cadena completa de main_cargar_datos con la configuración activa (pasos 1 a 4):
+    busca y carga los archivos crudos, procesa los datos, elimina los NaNs iniciales y finales y guarda
+    los datos previos y los del estudio.
+    No modifica el Excel de despliegue (agregar_coordenadas_de_despliegue_maniobras_al_excel_de_despliegue),
+    así puede correrse en paralelo para varios contextos de ejecución sin escribir el mismo archivo.
+
+    Retorna:
+        dict con los seriales procesados en cada parte: {"anteriores": [...], "estudio": [...]}
+    """
+    validar_rutas_de_la_configuracion()
+    rutas_de_sondas, seriales_encontrados = buscar_nombre_de_archivo_de_sonda()
+    diccionario_de_datos_de_sondas = cargar_datos_de_sonda(rutas_de_sondas, seriales_encontrados)
+
+    datos_anteriores, datos_finales = procesar_datos_de_sondas(diccionario_de_datos_de_sondas)
+    datos_antes_del_estudio, datos_del_estudio = eliminar_nans_iniciales(datos_anteriores, datos_finales)
+    datos_del_estudio = eliminar_nans_finales(datos_del_estudio)
+
+    carpeta_de_destino = crear_ruta_a_carpeta(get_carpeta_guardado_datos_procesados())
+    guardar_datos_procesados(diccionario=datos_antes_del_estudio,
+                             ruta=carpeta_de_destino,
+                             nombre_archivo=get_nombre_del_archivo_de_datos_previos_a_la_fecha_de_estudio())
+    guardar_datos_procesados(diccionario=datos_del_estudio,
+                             ruta=carpeta_de_destino,
+                             nombre_archivo=get_nombre_archivo_datos_procesados())
+
+    return {"anteriores": list(datos_antes_del_estudio.keys()), "estudio": list(datos_del_estudio.keys())}
@@ -0,0 +1,186 @@
+import pandas as pd
+import numpy as np
+
+from services.Utils.utilidades import *
+from services.Carga.metadatos_de_despliegue import unir_despliegue_a_sondas
+from services.Correctores.control_de_calidad import evaluar_reglas_sobre_la_flota, validar_bits_de_las_reglas
+from configs.manager_configuracion import *
+
+############### # TABLA LARGA DE LA FLOTA ###############
+# Representación opcional de los datos de todas las sondas en una sola tabla "larga":
+# índice (serial, tiempo) con 'serial' categórico, ordenada por serial y tiempo.
+# Cada etapa se aplica a toda la flota en una sola operación vectorizada o groupby, en lugar de recorrer el diccionario {serial: df}.
+# diccionario_a_flota y flota_a_diccionario convierten entre las dos formas, así los notebooks siguen funcionando con el diccionario.
+
+################# A #################
+def agregar_componentes_de_la_velocidad_a_la_flota(flota: pd.DataFrame) -> pd.DataFrame:
+    """ Agrega las columnas u_corriente y v_corriente (a partir de dir_corriente y rap_corriente) a toda la flota."""
+    u, v = polar2uv(flota["dir_corriente"], flota["rap_corriente"])
+    flota["u_corriente"] = u
+    flota["v_corriente"] = v
+    return flota
+
+@acepta_contexto_de_ejecucion
+def aplicar_control_de_calidad_a_la_flota(flota: pd.DataFrame, reglas: list = None, devolver_reporte: bool = False):
+    """ Igual que aplicar_control_de_calidad, pero sobre la tabla de la flota: cada regla se evalúa una sola vez sobre todas las filas.
+    Según 'modo_de_control_de_calidad' se encienden los bits de 'qc_flags' ("banderas") o se reemplazan los datos con NaN ("nan").
+
+    Retorna:
+        La flota. Si devolver_reporte es True retorna (flota, reporte), con
+        reporte = pd.DataFrame de filas marcadas por regla (filas) y sonda (columnas).
+    """
+    if reglas is None:
+        reglas = [regla for regla in get_reglas_de_control_de_calidad() if regla.get("activa", True)]
+    modo = get_modo_de_control_de_calidad()
+    if modo not in ["banderas", "nan"]:
+        raise ValueError(f"Modo de control de calidad no válido: {modo}. Opciones: 'banderas', 'nan'.")
+    if modo == "banderas":
+        validar_bits_de_las_reglas(get_reglas_de_control_de_calidad())
+
+    seriales_por_fila = flota.index.get_level_values("serial")
+    datos = {"columna": lambda nombre: _obtener_valores(flota, nombre).to_numpy(dtype=float, na_value=np.nan) if _existe(flota, nombre) else np.full(len(flota), np.nan),
+             "tiempos": lambda: _segundos(_obtener_valores(flota, "tspan_de_envio")),
+             "inicio_de_sonda": _marcar_inicio_de_sonda_en_la_flota(flota)}
+    marcas_por_regla = evaluar_reglas_sobre_la_flota(datos, reglas)
+
+    if modo == "banderas":
+        banderas = flota["qc_flags"].to_numpy(dtype=np.int16, copy=True) if "qc_flags" in flota.columns else np.zeros(len(flota), dtype=np.int16)
+        for regla in reglas:
+            banderas[marcas_por_regla[regla["nombre"]]] |= np.int16(1 << regla["bit"])
+        flota["qc_flags"] = banderas
+    else:
+        for regla in reglas:
+            marcas = marcas_por_regla[regla["nombre"]]
+            if marcas.any():
+                flota.loc[marcas, columnas_anuladas_por_regla(regla, flota.columns)] = np.nan
+
+    reporte = pd.DataFrame({nombre: pd.Series(marcas).groupby(np.asarray(seriales_por_fila)).sum()
+                            for nombre, marcas in marcas_por_regla.items()}).T
+    print(f"Control de calidad de la flota: {int(sum(marcas.sum() for marcas in marcas_por_regla.values()))} marcas en total.")
+    if devolver_reporte:
+        return flota, reporte
+    return flota
+
+################# C #################
+@acepta_contexto_de_ejecucion
+def calcular_porcentaje_de_datos_recibidos_de_la_flota(flota: pd.DataFrame) -> pd.DataFrame:
+    """ Igual que calcular_porcentaje_de_datos_recibidos, pero con un solo groupby sobre la flota.
+    Una fila cuenta como recibida si no tiene NaN (después de enmascarar los datos marcados en qc_flags; ver marcar_filas_completas).
+    Los datos esperados son las fechas de la malla de cada sonda (sirve para la representación densa y la dispersa)."""
+    flota_enmascarada = aplicar_mascara_de_calidad(flota)
+    por_sonda = pd.Series(marcar_filas_completas(flota_enmascarada), index=flota.index).groupby(level="serial", observed=True)
+    cantidad_de_datos_recibidos = por_sonda.sum()
+    if _existe(flota, "tspan_rounded"):
+        tiempos = pd.Series(np.asarray(_obtener_valores(flota, "tspan_rounded")), index=flota.index).groupby(level="serial", observed=True)
+        cantidad_de_datos_esperados = ((tiempos.max() - tiempos.min()) // pd.to_timedelta(get_delta_tiempo()) + 1).astype(int)
+    else:
+        cantidad_de_datos_esperados = por_sonda.size()
+    porcentajes = (cantidad_de_datos_recibidos / cantidad_de_datos_esperados * 100).round(2)
+
+    dataout = pd.DataFrame({
+        "serial_de_sonda": cantidad_de_datos_esperados.index.astype(str),
+        "cantidad_de_datos_esperados": cantidad_de_datos_esperados.to_numpy(),
+        "cantidad_de_datos_recibidos": cantidad_de_datos_recibidos.to_numpy(),
+        "porcentaje_de_datos_recibidos": porcentajes.to_numpy()
+    })
+    return dataout
+
+@acepta_contexto_de_ejecucion
+def crear_tspan_redondeado_de_la_flota(flota: pd.DataFrame) -> pd.DataFrame:
+    """ Agrega la columna tspan_rounded (inicio del intervalo de delta_tiempo de cada tspan_de_envio) a toda la flota."""
+    tiempos = pd.Series(np.asarray(_obtener_valores(flota, "tspan_de_envio")), index=flota.index)
+    flota["tspan_rounded"] = asignar_intervalo_de_tiempo(tiempos, get_delta_tiempo())
+    return flota
+
+################# D #################
+def diccionario_a_flota(diccionario: dict, columna_de_tiempo: str = "tspan_rounded") -> pd.DataFrame:
+    """ Convierte el diccionario {serial: dataframe} en la tabla larga de la flota.
+
+    Parámetros:
+        diccionario (dict): Datos de cada sonda.
+        columna_de_tiempo (str): Columna que forma el índice junto con el serial ("tspan_rounded", o "tspan_de_envio" para datos crudos).
+
+    Retorna:
+        pd.DataFrame con índice (serial, columna_de_tiempo), 'serial' categórico, ordenado por serial y tiempo.
+    """
+    if not diccionario:
+        return pd.DataFrame(index=pd.MultiIndex.from_arrays([pd.Categorical([]), pd.DatetimeIndex([])], names=["serial", columna_de_tiempo]))
+
+    seriales = list(diccionario.keys())
+    flota = pd.concat([diccionario[serial] for serial in seriales], ignore_index=True)
+    # concat convierte a object las columnas categóricas con categorías distintas entre sondas
+    for columna in {columna for df in diccionario.values() for columna in df.columns if isinstance(df[columna].dtype, pd.CategoricalDtype)}:
+        flota[columna] = flota[columna].astype("category")
+    largos = [len(diccionario[serial]) for serial in seriales]
+    flota["serial"] = pd.Categorical(np.repeat(seriales, largos), categories=seriales)
+    flota = flota.set_index(["serial", columna_de_tiempo]).sort_index(kind="mergesort")
+    return flota
+
+################# E #################
+def eliminar_duplicados_de_la_flota(flota: pd.DataFrame, columnas_clave: list = None) -> tuple:
+    """ Elimina en una sola pasada las filas duplicadas de toda la flota (hash de cada fila, incluyendo el serial y el tiempo).
+
+    Parámetros:
+        columnas_clave (list): Columnas que definen un duplicado además del serial. None usa todas las columnas.
+
+    Retorna:
+        (flota, reporte) -> reporte = pd.Series con la cantidad de duplicados eliminados por sonda.
+    """
+    tabla = flota.reset_index()
+    columnas = list(tabla.columns) if columnas_clave is None else ["serial"] + [columna for columna in columnas_clave if columna in tabla.columns]
+    es_duplicado = pd.util.hash_pandas_object(tabla[columnas], index=False).duplicated(keep="first").to_numpy()
+    reporte = pd.Series(es_duplicado, index=flota.index.get_level_values("serial")).groupby(level="serial", observed=False).sum()
+    if es_duplicado.any():
+        print(f"Se eliminaron {int(es_duplicado.sum())} datos duplicados en la flota.")
+        flota = flota[~es_duplicado]
+    return flota, reporte
+
+def _existe(flota: pd.DataFrame, nombre: str) -> bool:
+    """ True si 'nombre' es una columna o un nivel del índice de la flota."""
+    return nombre in flota.columns or nombre in flota.index.names
+
+################# F #################
+def flota_a_diccionario(flota: pd.DataFrame) -> dict:
+    """ Convierte la tabla de la flota en el diccionario {serial: dataframe} que usan los notebooks (el tiempo vuelve a ser una columna)."""
+    diccionario = {}
+    for serial, df in flota.groupby(level="serial", observed=True, sort=False):
+        diccionario[str(serial)] = df.reset_index(level="serial", drop=True).reset_index()
+    return diccionario
+
+################# M #################
+def _marcar_inicio_de_sonda_en_la_flota(flota: pd.DataFrame) -> np.ndarray:
+    """ Máscara de la primera fila de cada sonda en la flota (ordenada por serial)."""
+    codigos = flota.index.get_level_values("serial").codes
+    inicio_de_sonda = np.ones(len(codigos), dtype=bool)
+    inicio_de_sonda[1:] = codigos[1:] != codigos[:-1]
+    return inicio_de_sonda
+
+################# O #################
+def _obtener_valores(flota: pd.DataFrame, nombre: str):
+    """ Devuelve la columna 'nombre' de la flota, o el nivel del índice con ese nombre."""
+    if nombre in flota.columns:
+        return flota[nombre]
+    return flota.index.get_level_values(nombre)
+
+################# S #################
+def _segundos(tiempos) -> np.ndarray:
+    """ Convierte fechas a segundos (float, NaN donde no hay fecha)."""
+    tiempos = pd.to_datetime(pd.Series(np.asarray(tiempos)))
+    segundos = tiempos.to_numpy(dtype="datetime64[ns]").astype("int64") / 1e9
+    segundos[tiempos.isna().to_numpy()] = np.nan
+    return segundos
+
+@acepta_contexto_de_ejecucion
+def seleccionar_rango_de_fechas_de_la_flota(flota: pd.DataFrame, incluir_fechas_anteriores_al_estudio: bool = True) -> pd.DataFrame:
+    """ Igual que seleccionar_rango_de_fechas, pero con una sola máscara para toda la flota.
+    Se conservan los datos desde el despliegue de cada sonda (Excel de despliegue) hasta el fin del análisis;
+    si incluir_fechas_anteriores_al_estudio es False, desde la fecha más tardía entre el despliegue y el inicio del análisis."""
+    seriales_por_fila = flota.index.get_level_values("serial")
+    fechas_de_despliegue = unir_despliegue_a_sondas(list(seriales_por_fila.categories), ["fecha_y_hora_de_despliegue_maniobra"])["fecha_y_hora_de_despliegue_maniobra"]
+    fecha_de_inicio_por_fila = pd.to_datetime(fechas_de_despliegue).to_numpy()[seriales_por_fila.codes]
+    if not incluir_fechas_anteriores_al_estudio:
+        fecha_de_inicio_por_fila = np.maximum(fecha_de_inicio_por_fila, np.datetime64(get_fecha_de_inicio_del_analisis()))
+
+    tiempos = pd.to_datetime(pd.Series(np.asarray(_obtener_valores(flota, "tspan_de_envio")))).to_numpy()
+    mask = (tiempos >= fecha_de_inicio_por_fila) & (tiempos <= np.datetime64(get_fecha_de_fin_del_analisis()))
+    return flota[mask]
@@ -0,0 +1,42 @@
+import os
+import re
+
+################### NO TOCAR #########################
+# Secuencias de dígitos completas dentro del nombre del archivo (no forman parte de un número más largo).
+# Así el serial 487819 no coincide dentro de 4878190.
+_patron_de_serial = re.compile(r"(?<!\d)\d+(?!\d)")
+
+# Caché por proceso: {carpeta: (mtime_ns, {serial: [rutas]})}
+# La fecha de modificación de una carpeta cambia al agregar, borrar o renombrar archivos.
+_cache_de_indices = {}
+
+#################### FUNCIONES #########################
+
+def indexar_archivos_crudos(carpeta_de_datos_crudos: str) -> dict:
+    """ Recorre una sola vez la carpeta de datos crudos y construye el índice serial -> archivos CSV.
+    El índice se guarda en caché y solo se reconstruye si cambia la fecha de modificación de la carpeta.
+
+    Parámetros:
+        carpeta_de_datos_crudos (str): Ruta a la carpeta con los CSV crudos.
+
+    Retorna:
+        dict: {serial: lista ordenada de rutas completas a los CSV que contienen ese serial en el nombre}
+    """
+    mtime = os.stat(carpeta_de_datos_crudos).st_mtime_ns
+    en_cache = _cache_de_indices.get(carpeta_de_datos_crudos)
+    if en_cache is not None and en_cache[0] == mtime:
+        return en_cache[1]
+
+    indice = {}
+    with os.scandir(carpeta_de_datos_crudos) as entradas:
+        for entrada in entradas:
+            if not entrada.name.endswith(".csv") or not entrada.is_file():
+                continue
+            for serial in set(_patron_de_serial.findall(entrada.name)):
+                indice.setdefault(serial, []).append(entrada.path)
+
+    for rutas in indice.values():
+        rutas.sort()
+
+    _cache_de_indices[carpeta_de_datos_crudos] = (mtime, indice)
+    return indice
@@ -0,0 +1,80 @@
+import os
+import pandas as pd
+
+from services.Utils.utilidades import crear_ruta_a_carpeta
+from configs.manager_configuracion import *
+
+################### NO TOCAR #########################
+# Caché del Excel de despliegue por proceso: {ruta_al_excel: (mtime_ns, df_excel, df_indexado_por_serial)}
+# El Excel se vuelve a leer solo si cambia su fecha de modificación (p. ej. al guardar el Excel corregido).
+_cache_de_excels_de_despliegue = {}
+
+#################### FUNCIONES #########################
+
+def _cargar_excel_de_despliegue_en_cache(corregido: bool) -> tuple:
+    """ Lee el Excel de despliegue (o lo toma de la caché) y devuelve (df_excel, df_indexado_por_serial)."""
+    ruta_al_excel_de_despliegue_de_sondas = crear_ruta_a_carpeta(get_ruta_al_excel_de_despliegue_de_sondas())
+    ruta_al_excel_de_despliegue_de_sondas += "_corregido.xlsx" if corregido else ".xlsx"
+
+    try:
+        mtime = os.stat(ruta_al_excel_de_despliegue_de_sondas).st_mtime_ns
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No se encontró el archivo Excel en la ruta: {ruta_al_excel_de_despliegue_de_sondas}")
+
+    en_cache = _cache_de_excels_de_despliegue.get(ruta_al_excel_de_despliegue_de_sondas)
+    if en_cache is not None and en_cache[0] == mtime:
+        return en_cache[1], en_cache[2]
+
+    df_excel = pd.read_excel(ruta_al_excel_de_despliegue_de_sondas)
+    df_excel = df_excel.dropna(subset=['serial_de_sonda']).copy() # elimino ausentes o nulos para que la conversion no de error
+    df_excel['serial_de_sonda'] = df_excel['serial_de_sonda'].astype(float).astype(int).astype(str)
+    if "fecha_y_hora_de_despliegue_maniobra" in df_excel.columns:
+        df_excel["fecha_y_hora_de_despliegue_maniobra"] = pd.to_datetime(df_excel["fecha_y_hora_de_despliegue_maniobra"])
+
+    # Si un serial aparece más de una vez se usa la primera fila, igual que la búsqueda con .index[0]
+    df_indexado = df_excel.drop_duplicates(subset="serial_de_sonda", keep="first").set_index("serial_de_sonda")
+
+    _cache_de_excels_de_despliegue[ruta_al_excel_de_despliegue_de_sondas] = (mtime, df_excel, df_indexado)
+    return df_excel, df_indexado
+
+def leer_excel_de_despliegue(corregido: bool = True) -> pd.DataFrame:
+    """ Devuelve una copia del Excel de despliegue de las sondas (leído una sola vez por proceso).
+
+    Parámetros:
+        corregido (bool): Si es True se lee el Excel "_corregido.xlsx"; si es False el Excel original ".xlsx".
+
+    Retorna:
+        pd.DataFrame con 'serial_de_sonda' como string y 'fecha_y_hora_de_despliegue_maniobra' como pd.datetime.
+    """
+    df_excel, _ = _cargar_excel_de_despliegue_en_cache(corregido)
+    return df_excel.copy()
+
+def obtener_despliegue_de_sonda(serial: str, corregido: bool = True) -> pd.Series:
+    """ Devuelve una copia de la fila del Excel de despliegue de una sonda (búsqueda directa por serial).
+    Lanza KeyError si la sonda no está en el Excel.
+    """
+    _, df_indexado = _cargar_excel_de_despliegue_en_cache(corregido)
+    if serial not in df_indexado.index:
+        raise KeyError(f"La sonda {serial} no se encuentra en el Excel de despliegue.")
+    return df_indexado.loc[serial].copy()
+
+def unir_despliegue_a_sondas(seriales: list, columnas: list = None, corregido: bool = True) -> pd.DataFrame:
+    """ Devuelve en una sola operación los datos de despliegue de todas las sondas dadas.
+
+    Parámetros:
+        seriales (list): Seriales de las sondas.
+        columnas (list): Columnas del Excel a devolver (p. ej. fecha de despliegue y coordenadas). None devuelve todas.
+        corregido (bool): Si es True se usa el Excel "_corregido.xlsx".
+
+    Retorna:
+        pd.DataFrame indexado por serial, en el orden de 'seriales'. Las sondas que no están en el Excel quedan con NaN.
+    """
+    _, df_indexado = _cargar_excel_de_despliegue_en_cache(corregido)
+    if columnas is not None:
+        df_indexado = df_indexado[columnas]
+
+    seriales_faltantes = [serial for serial in seriales if serial not in df_indexado.index]
+    if seriales_faltantes:
+        print(f"Advertencia: Las sondas {seriales_faltantes} no se encuentran en el Excel de despliegue.")
+
+    return df_indexado.reindex(list(seriales))
@@ -0,0 +1,195 @@
+import pandas as pd
+import numpy as np
+
+from services.Utils.utilidades import (calcular_distancia_haversine, columnas_anuladas_por_regla, bit_de_dato_interpolado,
+                                      concatenar_columna_de_la_flota, concatenar_tiempos_de_la_flota,
+                                      marcar_inicio_de_sonda, ubicar_datos_validos_de_la_flota)
+from configs.manager_configuracion import *
+
+############### # CONTROL DE CALIDAD POR REGLAS ###############
+# Las reglas se declaran en 'reglas_de_control_de_calidad' de la configuración general.
+# Cada regla se evalúa una sola vez sobre los datos de todas las sondas concatenados (la flota);
+# 'inicio_de_sonda' marca la primera fila de cada sonda para que las diferencias no crucen de una sonda a otra.
+
+################# A #################
+def aplicar_control_de_calidad(diccionario: dict, reglas: list = None, devolver_reporte: bool = False):
+    """ Evalúa las reglas de control de calidad y guarda el resultado en los mismos dataframes según 'modo_de_control_de_calidad':
+        "banderas": se enciende el 'bit' de la regla en la columna int16 'qc_flags' y los valores originales se conservan
+                    (se enmascaran al leerlos con aplicar_mascara_de_calidad, p. ej. al graficar o interpolar).
+        "nan": los datos marcados se reemplazan con NaN. Según 'anular' de cada regla se reemplaza la fila completa
+               ("fila", excepto tspan_rounded y tspan_de_envio) o solo la variable revisada ("variable").
+
+    Retorna:
+        El diccionario. Si devolver_reporte es True retorna (diccionario, reporte), con
+        reporte = pd.DataFrame de filas marcadas por regla (filas) y sonda (columnas).
+    """
+    if reglas is None:
+        reglas = [regla for regla in get_reglas_de_control_de_calidad() if regla.get("activa", True)]
+    modo = get_modo_de_control_de_calidad()
+    if modo not in ["banderas", "nan"]:
+        raise ValueError(f"Modo de control de calidad no válido: {modo}. Opciones: 'banderas', 'nan'.")
+    if modo == "banderas":
+        validar_bits_de_las_reglas(get_reglas_de_control_de_calidad())
+        for df in diccionario.values():
+            if "qc_flags" not in df.columns:
+                df["qc_flags"] = np.zeros(len(df), dtype=np.int16)
+
+    marcas_por_regla = evaluar_reglas_de_control_de_calidad(diccionario, reglas)
+
+    for regla in reglas:
+        for serial, marcas in marcas_por_regla.get(regla["nombre"], {}).items():
+            if not marcas.any():
+                continue
+            df = diccionario[serial]
+            if modo == "banderas":
+                banderas = df["qc_flags"].to_numpy(dtype=np.int16, copy=True)
+                banderas[marcas] |= np.int16(1 << regla["bit"])
+                df["qc_flags"] = banderas
+                print(f"Sonda {serial}: la regla '{regla['nombre']}' marcó {marcas.sum()} filas (bit {regla['bit']} de qc_flags).")
+            else:
+                df.loc[marcas, columnas_anuladas_por_regla(regla, df.columns)] = np.nan
+                print(f"Sonda {serial}: la regla '{regla['nombre']}' marcó {marcas.sum()} filas. Valores reemplazados con NaN.")
+
+    reporte = pd.DataFrame({nombre: {serial: int(marcas.sum()) for serial, marcas in por_sonda.items()}
+                            for nombre, por_sonda in marcas_por_regla.items()}).T
+    if devolver_reporte:
+        return diccionario, reporte
+    return diccionario
+
+################# E #################
+def evaluar_reglas_de_control_de_calidad(diccionario: dict, reglas: list = None) -> dict:
+    """ Evalúa las reglas de control de calidad sobre todas las sondas a la vez.
+
+    Parámetros:
+        diccionario (dict): {serial: dataframe} alineado a la malla.
+        reglas (list): Reglas a evaluar. Si es None se usan las reglas activas de la configuración general.
+
+    Retorna:
+        dict {nombre_de_la_regla: {serial: máscara booleana (np.ndarray) de las filas marcadas}}
+    """
+    if reglas is None:
+        reglas = [regla for regla in get_reglas_de_control_de_calidad() if regla.get("activa", True)]
+    if not diccionario or not reglas:
+        return {}
+
+    seriales = list(diccionario.keys())
+    largos = np.array([len(diccionario[serial]) for serial in seriales])
+    inicio_de_sonda = marcar_inicio_de_sonda(largos)
+
+    # Las columnas de la flota se concatenan una sola vez aunque varias reglas las usen
+    columnas_de_la_flota = {}
+    def columna(nombre):
+        if nombre not in columnas_de_la_flota:
+            columnas_de_la_flota[nombre] = concatenar_columna_de_la_flota(diccionario, nombre)
+        return columnas_de_la_flota[nombre]
+    def tiempos():
+        if "_tiempos" not in columnas_de_la_flota:
+            columnas_de_la_flota["_tiempos"] = concatenar_tiempos_de_la_flota(diccionario)
+        return columnas_de_la_flota["_tiempos"]
+    datos = {"columna": columna, "tiempos": tiempos, "inicio_de_sonda": inicio_de_sonda}
+
+    marcas_por_regla = evaluar_reglas_sobre_la_flota(datos, reglas)
+    return {nombre: dict(zip(seriales, np.split(marcas, np.cumsum(largos)[:-1]))) for nombre, marcas in marcas_por_regla.items()}
+
+def evaluar_reglas_sobre_la_flota(datos: dict, reglas: list) -> dict:
+    """ Evalúa las reglas sobre los datos ya concatenados de la flota.
+
+    Parámetros:
+        datos (dict): {"columna": función(nombre) -> np.ndarray float, "tiempos": función() -> segundos (np.ndarray),
+                       "inicio_de_sonda": máscara de la primera fila de cada sonda}.
+        reglas (list): Reglas a evaluar.
+
+    Retorna:
+        dict {nombre_de_la_regla: máscara booleana (np.ndarray) sobre toda la flota}
+    """
+    resultado = {}
+    for regla in reglas:
+        if regla["tipo"] not in _reglas_por_tipo:
+            raise ValueError(f"Tipo de regla de control de calidad no válido: {regla['tipo']}. Opciones: {list(_reglas_por_tipo)}.")
+        resultado[regla["nombre"]] = _reglas_por_tipo[regla["tipo"]](datos, regla)
+    return resultado
+
+################# M #################
+def _marcar_rango(datos: dict, regla: dict) -> np.ndarray:
+    """ Valores fuera de [minimo, maximo]. Cualquiera de los dos límites puede omitirse."""
+    valores = datos["columna"](regla["variable"])
+    marcas = np.zeros(len(valores), dtype=bool)
+    if regla.get("minimo") is not None:
+        marcas |= valores < regla["minimo"]
+    if regla.get("maximo") is not None:
+        marcas |= valores > regla["maximo"]
+    return marcas
+
+def _marcar_voltaje_minimo(datos: dict, regla: dict) -> np.ndarray:
+    """ Voltaje por debajo del mínimo (batería baja): los datos de la sonda dejan de ser confiables."""
+    valores = datos["columna"](regla.get("variable", "voltaje"))
+    return valores < regla["minimo"]
+
+def _marcar_pico(datos: dict, regla: dict) -> np.ndarray:
+    """ Picos: dato válido cuyo cambio con el dato válido anterior y con el siguiente (de la misma sonda) es mayor a
+    'maximo_cambio_por_hora'. Solo se marca el dato del pico; el primero y el último de cada sonda no tienen dos vecinos y no se marcan."""
+    valores = datos["columna"](regla["variable"])
+    tiempos = datos["tiempos"]()
+    marcas = np.zeros(len(valores), dtype=bool)
+    posiciones, es_primero = ubicar_datos_validos_de_la_flota(~np.isnan(valores) & ~np.isnan(tiempos), datos["inicio_de_sonda"])
+    if len(posiciones) < 3:
+        return marcas
+    horas = np.diff(tiempos[posiciones]) / 3600
+    cambio = np.abs(np.diff(valores[posiciones]))
+    tasa = np.divide(cambio, horas, out=np.zeros(len(horas)), where=horas > 0)
+    supera = (tasa > regla["maximo_cambio_por_hora"]) & ~es_primero[1:] # cambio entre cada dato y el siguiente de la misma sonda
+    es_pico = supera[:-1] & supera[1:]
+    marcas[posiciones[1:-1][es_pico]] = True
+    return marcas
+
+def _marcar_sensor_atascado(datos: dict, regla: dict) -> np.ndarray:
+    """ Sensor atascado: el mismo valor repetido en 'repeticiones' o más datos válidos consecutivos de la misma sonda."""
+    valores = datos["columna"](regla["variable"])
+    marcas = np.zeros(len(valores), dtype=bool)
+    posiciones, es_primero = ubicar_datos_validos_de_la_flota(~np.isnan(valores), datos["inicio_de_sonda"])
+    if len(posiciones) == 0:
+        return marcas
+    valores_validos = valores[posiciones]
+    cambia = es_primero.copy()
+    cambia[1:] |= valores_validos[1:] != valores_validos[:-1]
+    racha = np.cumsum(cambia) - 1
+    largo_de_racha = np.bincount(racha)
+    marcas[posiciones[largo_de_racha[racha] >= regla["repeticiones"]]] = True
+    return marcas
+
+def _marcar_salto_de_posicion(datos: dict, regla: dict) -> np.ndarray:
+    """ Saltos de posición: velocidad entre dos posiciones válidas consecutivas mayor a 'velocidad_maxima' en m/s (se marca la segunda)."""
+    latitudes = datos["columna"]("latitud")
+    longitudes = datos["columna"]("longitud")
+    tiempos = datos["tiempos"]()
+    marcas = np.zeros(len(latitudes), dtype=bool)
+    es_valido = ~np.isnan(latitudes) & ~np.isnan(longitudes) & ~np.isnan(tiempos)
+    posiciones, es_primero = ubicar_datos_validos_de_la_flota(es_valido, datos["inicio_de_sonda"])
+    if len(posiciones) < 2:
+        return marcas
+    distancias = calcular_distancia_haversine(latitudes[posiciones[:-1]], longitudes[posiciones[:-1]],
+                                              latitudes[posiciones[1:]], longitudes[posiciones[1:]])
+    segundos = np.diff(tiempos[posiciones])
+    velocidad = np.divide(distancias, segundos, out=np.zeros(len(segundos)), where=segundos > 0)
+    es_salto = (velocidad > regla["velocidad_maxima"]) & ~es_primero[1:]
+    marcas[posiciones[1:][es_salto]] = True
+    return marcas
+
+_reglas_por_tipo = {
+    "rango": _marcar_rango,
+    "voltaje_minimo": _marcar_voltaje_minimo,
+    "pico": _marcar_pico,
+    "sensor_atascado": _marcar_sensor_atascado,
+    "salto_de_posicion": _marcar_salto_de_posicion,
+}
+
+################# V #################
+def validar_bits_de_las_reglas(reglas: list) -> None:
+    """ Cada regla debe tener un 'bit' propio entre 0 y 13 (el bit 14 indica dato interpolado y el 15 es el signo del int16).
+    Se llama antes de evaluar las reglas en modo "banderas" (aplicar_control_de_calidad y aplicar_control_de_calidad_a_la_flota)."""
+    bits = [regla.get("bit") for regla in reglas]
+    for regla, bit in zip(reglas, bits):
+        if not isinstance(bit, int) or not 0 <= bit < bit_de_dato_interpolado:
+            raise ValueError(f"La regla '{regla['nombre']}' debe tener un 'bit' entre 0 y {bit_de_dato_interpolado - 1}.")
+    if len(set(bits)) != len(bits):
+        raise ValueError(f"Las reglas de control de calidad tienen bits repetidos: {bits}.")
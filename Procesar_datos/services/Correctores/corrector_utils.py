@@ -1,100 +1,162 @@
 import pandas as pd
 import numpy as np
-from scipy.interpolate import interp1d
-import matplotlib.dates as mdates  
 
-from services.Utils.utilidades import uv2polar
+from services.Utils.utilidades import (uv2polar, polar2uv, aplicar_mascara_de_calidad, bit_de_dato_interpolado,
+                                      calcular_malla_de_la_sonda, reindexar_a_fechas_de_la_malla, asignar_intervalo_de_tiempo,
+                                      calcular_rumbo_geodesico, marcar_filas_completas)
+from services.Correctores.control_de_calidad import aplicar_control_de_calidad
 from configs.manager_configuracion import *
 from configs.manager_diccionario_variables import *
 ############### # FUNCIONES DE CORRECCIÓN DE DATOS ###############
 
-################# B #################
-def buscar_duplicados_explicitos(data: pd.DataFrame) -> pd.DataFrame:
-    """ Crea un dataframe que tiene filas únicas y cuantas veces se repite cada fila.
-    Retorna el dataframe con los datos duplicados
-    """
-    duplicados = data.value_counts()
-    duplicados_explicitos = duplicados[duplicados > 1]
-    return duplicados_explicitos
-
 ################# E #################
-def eliminar_datos_duplicados(data: pd.DataFrame, duplicados_explicitos, serial_de_sonda) -> pd.DataFrame:
-    """ Elimina los datos duplicados en los dataframes del diccionario dado."""
-    if duplicados_explicitos.sum() > 0: # Si hay duplicados
-        print(f"Se encontraron {duplicados_explicitos.sum()} datos duplicados en la sonda {serial_de_sonda}. Eliminándolos...")  
-        data.drop_duplicates(inplace=True)
+def eliminar_duplicados_por_hash(data: pd.DataFrame, columnas_clave: list = None) -> int:
+    """ Elimina en una sola pasada las filas duplicadas del dataframe (en el mismo dataframe, inplace) y devuelve cuántas se eliminaron.
+    Cada fila se reduce a un hash de 64 bits con pd.util.hash_pandas_object y se marcan como duplicadas
+    las filas cuyo hash ya apareció antes (se conserva la primera ocurrencia).
 
-    return data.reset_index(drop=True)
+    Parámetros:
+        data (pd.DataFrame): Datos de una sonda. Se modifica en el mismo objeto.
+        columnas_clave (list): Columnas que definen un duplicado (p. ej. ["tspan_de_envio"]). None usa todas las columnas.
+    """
+    if data.empty:
+        return 0
+    columnas = data.columns if columnas_clave is None else [columna for columna in columnas_clave if columna in data.columns]
+    hashes = pd.util.hash_pandas_object(data[columnas], index=False)
+    es_duplicado = hashes.duplicated(keep="first").to_numpy()
+    numero_de_duplicados = int(es_duplicado.sum())
+    if numero_de_duplicados > 0:
+        data.drop(index=data.index[es_duplicado], inplace=True)
+        data.reset_index(drop=True, inplace=True)
+    return numero_de_duplicados
 
 
 ################################
 
-def eliminar_datos_espurios(diccionario: dict) -> dict:
-    """ Busca filas donde la rapidez sea mayor a 2 m/s y reemplaza todos los valores 
-    de esa fila con NaN, excepto las columnas tspan_rounded y tspan_de_envio."""
+@acepta_contexto_de_ejecucion
+def eliminar_datos_espurios(diccionario: dict, devolver_reporte: bool = False):
+    """ Aplica las reglas de control de calidad de la configuración general ('reglas_de_control_de_calidad'):
+    rangos por variable, picos, sensor atascado, voltaje mínimo y saltos de posición.
+    Según 'modo_de_control_de_calidad' los datos marcados se registran en la columna qc_flags ("banderas")
+    o se reemplazan con NaN ("nan"; la fila completa, excepto tspan_rounded y tspan_de_envio, o solo la variable revisada).
+    La regla original (rapidez > 2 m/s -> fila con NaN) es la regla 'rapidez_maxima'.
+    Si devolver_reporte es True retorna (diccionario, reporte) con las filas marcadas por regla y sonda."""
     
     if not diccionario:
-        return diccionario  # Retorna el diccionario vacío si no hay datos
+        return (diccionario, pd.DataFrame()) if devolver_reporte else diccionario  # Retorna el diccionario vacío si no hay datos
     
-    seriales_de_sondas = list(diccionario.keys())
-    for serial in seriales_de_sondas:
-        df = diccionario[serial].copy()
-        # Crear máscara para identificar filas con rapidez > 2
-        mask = df["rap_corriente"] > 2
-        
-        # Obtener todas las columnas excepto tspan_rounded y tspan_de_envio
-        columnas_a_reemplazar = [col for col in df.columns if col not in ["tspan_rounded", "tspan_de_envio"]]
-        
-        # Reemplazar valores con NaN en las filas que cumplen la condición
-        df.loc[mask, columnas_a_reemplazar] = np.nan
-        
-        diccionario[serial] = df
-        
-        # Imprimir información sobre los datos espurios encontrados
-        if mask.sum() > 0:
-            print(f"Sonda {serial}: Se encontraron {mask.sum()} filas con rapidez > 2 m/s. Valores reemplazados con NaN.")
-    
-    return diccionario
+    return aplicar_control_de_calidad(diccionario, devolver_reporte=devolver_reporte)
 ################################
 
 
 ################# I #################
+def interpolar_linealmente(x, x_conocidos, y_conocidos) -> tuple:
+    """ Interpola linealmente todas las columnas de y_conocidos (matriz n_conocidos x n_columnas) en los puntos x, en una sola operación.
+    x y x_conocidos deben ser crecientes. Fuera del rango de x_conocidos el resultado es NaN.
+
+    Retorna:
+        (y, izquierda, derecha) -> matriz interpolada y, para cada x, las posiciones del punto conocido anterior y siguiente.
+    """
+    derecha = np.searchsorted(x_conocidos, x, side="right")
+    izquierda = derecha - 1
+    derecha = np.minimum(derecha, len(x_conocidos) - 1)
+    fuera_de_rango = (izquierda < 0) | (x > x_conocidos[-1])
+    izquierda = np.maximum(izquierda, 0)
+
+    x_izquierda = x_conocidos[izquierda]
+    ancho = x_conocidos[derecha] - x_izquierda
+    peso = np.divide(x - x_izquierda, ancho, out=np.zeros(len(x), dtype=float), where=ancho > 0)
+
+    y = y_conocidos[izquierda] * (1 - peso)[:, None] + y_conocidos[derecha] * peso[:, None]
+    y[fuera_de_rango] = np.nan
+    return y, izquierda, derecha
+
+def _incluir_fechas_de_huecos_cortos(data: pd.DataFrame, malla: dict, maximo_hueco: np.timedelta64) -> pd.DataFrame:
+    """ Representación dispersa: agrega filas vacías solo en las fechas de la malla que están en un hueco interpolable
+    (entre dos filas completas separadas como máximo maximo_hueco). Las fechas de los huecos largos no se agregan."""
+    tspan_completas = data.loc[marcar_filas_completas(data), "tspan_rounded"].to_numpy()
+    if len(tspan_completas) < 2:
+        return data
+    fechas_de_la_malla = pd.date_range(start=malla["inicio"], periods=malla["longitud"], freq=malla["delta"])
+    derecha = np.searchsorted(tspan_completas, fechas_de_la_malla.to_numpy(), side="left")
+    entre_completas = (derecha > 0) & (derecha < len(tspan_completas))
+    izquierda = np.maximum(derecha - 1, 0)
+    derecha = np.minimum(derecha, len(tspan_completas) - 1)
+    en_hueco_corto = entre_completas & (tspan_completas[derecha] - tspan_completas[izquierda] <= maximo_hueco)
+    fechas = fechas_de_la_malla[en_hueco_corto].union(pd.DatetimeIndex(data["tspan_rounded"]))
+    if len(fechas) == len(data):
+        return data
+    return reindexar_a_fechas_de_la_malla(data, fechas)
+
+@acepta_contexto_de_ejecucion
 def interpolar_datos_faltantes(diccionario: dict) -> dict:
-    """ Interpola los datos faltantes en los dataframes del diccionario dado."""
+    """ Interpola los datos faltantes en los dataframes del diccionario dado.
+    Todas las columnas numéricas (excepto tspan, rap_corriente, dir_corriente y dir_deriva_gps) se interpolan linealmente en una
+    sola operación a partir de las filas completas (sin NaNs; ver marcar_filas_completas). Los huecos entre dos filas completas
+    más largos que 'maximo_hueco_de_interpolacion' (configuración general) no se interpolan y quedan con NaN.
+    La rapidez y la dirección se vuelven a calcular a partir de las componentes u y v interpoladas. Las posiciones interpoladas
+    están sobre el tramo entre las dos filas completas, por lo que su dir_deriva_gps es el rumbo de ese tramo.
+    Con la representación dispersa solo se agregan las fechas de la malla de los huecos que se interpolan.
+
+    En un hueco largo solo se dejan con NaN las columnas interpoladas de las filas incompletas: las filas completas de los
+    extremos del hueco y las columnas que no se interpolan (fechas, texto, categorías, qc_flags) se conservan.
+    Antes se anulaban todas las columnas (excepto las fechas) desde la fila completa anterior hasta la siguiente, incluidos
+    los extremos, y el primer hueco de la sonda no se revisaba."""
     seriales_de_sondas = list(diccionario.keys())
     output_dic = {}
+    maximo_hueco = np.timedelta64(pd.to_timedelta(get_maximo_hueco_de_interpolacion()))
 
     try:
         for serial_de_sonda in seriales_de_sondas:
-            
-            tspan_completo = diccionario[serial_de_sonda]["tspan_rounded"] # prueba para evitar error de variable no usada
-            tspan_numeric_completo = mdates.date2num(tspan_completo)
-
-            data = diccionario[serial_de_sonda] # datos de la sonda
-            data_wo_nans = data.dropna().reset_index(drop=True) # datos sin nans
-            tspan_numeric_real = mdates.date2num(data_wo_nans["tspan_rounded"])
-
-            for column in data.columns:
-                if pd.api.types.is_numeric_dtype(data[column]) and "tspan" not in column and column != "rap_corriente" and column != "dir_corriente":
-                    # obtener función de interpolación
-                    f = interp1d(tspan_numeric_real, data_wo_nans[column], kind='linear', fill_value=np.nan, bounds_error=False)
-                    # interpolar en las fechas completas
-                    data[column] = f(tspan_numeric_completo)
-            
-            
-            # Si los la diferencia entre horas consecutivas es mayor a 4 horas; se eliminan las interpolaciones de esas horas.
-            columnas_de_reemplazo = [col for col in data.columns if col not in ["tspan_rounded", "tspan_de_envio"]]
-            for irow in range(1,len(data_wo_nans)-1):
-                next_date = data_wo_nans["tspan_rounded"].iloc[irow+1]
-                current_date = data_wo_nans["tspan_rounded"].iloc[irow]
-                deltaT = next_date - current_date
-                if deltaT > pd.Timedelta(hours=4):
-                    mask = data[(data["tspan_rounded"] >= current_date) & (data["tspan_rounded"] <= next_date)].index
-                    data.loc[mask, columnas_de_reemplazo] = np.nan
+            # datos de la sonda (copia superficial: el diccionario de entrada no se modifica); los marcados por el control de calidad se interpolan
+            data = aplicar_mascara_de_calidad(diccionario[serial_de_sonda]).copy(deep=False)
+            malla = calcular_malla_de_la_sonda(data, get_delta_tiempo())
+            if len(data) < malla["longitud"]:
+                data = _incluir_fechas_de_huecos_cortos(data, malla, maximo_hueco)
+            columnas_a_interpolar = [column for column in data.columns
+                                     if pd.api.types.is_numeric_dtype(data[column]) and not pd.api.types.is_bool_dtype(data[column])
+                                     and "tspan" not in column and column not in ["rap_corriente", "dir_corriente", "dir_deriva_gps", "qc_flags"]]
+
+            tspan = data["tspan_rounded"].to_numpy()
+            es_completa = marcar_filas_completas(data) # filas sin nans
+            if not es_completa.any():
+                print(f"La sonda {serial_de_sonda} no tiene filas completas. No se puede interpolar.")
+                output_dic[serial_de_sonda] = data
+                continue
+
+            tspan_completas = tspan[es_completa]
+            valores_completos = data.loc[es_completa, columnas_a_interpolar].to_numpy(dtype=float)
+            valores, izquierda, derecha = interpolar_linealmente(tspan.astype("int64").astype(float), tspan_completas.astype("int64").astype(float), valores_completos)
+
+            # Huecos largos: filas faltantes entre dos filas completas separadas más de maximo_hueco
+            en_hueco_largo = ~es_completa & (tspan_completas[derecha] - tspan_completas[izquierda] > maximo_hueco)
+            valores[en_hueco_largo] = np.nan
+
+            for icolumna, column in enumerate(columnas_a_interpolar):
+                tipo = data[column].dtype if pd.api.types.is_float_dtype(data[column]) else np.float64
+                data[column] = valores[:, icolumna].astype(tipo)
+
+            # Los datos marcados que recibieron un valor interpolado ya no se enmascaran al leerlos
+            if "qc_flags" in data.columns:
+                banderas = data["qc_flags"].to_numpy(dtype=np.int16, na_value=0, copy=True)
+                fue_interpolado = (banderas != 0) & ~es_completa & ~np.isnan(valores).all(axis=1)
+                banderas[fue_interpolado] |= np.int16(1 << bit_de_dato_interpolado)
+                data["qc_flags"] = banderas
 
             # Ahora se corrige rap_corriente y dir_corriente por separado (La rap y dir se deben calcular apartir de las componentes u y v)
             data["dir_corriente"], data["rap_corriente"] = uv2polar(data["u_corriente"], data["v_corriente"])
 
+            # Un ángulo no se interpola linealmente (359° y 1° darían 180°): rumbo del tramo entre las dos posiciones completas
+            if "dir_deriva_gps" in data.columns:
+                latitudes = data.loc[es_completa, "latitud"].to_numpy(dtype=float)
+                longitudes = data.loc[es_completa, "longitud"].to_numpy(dtype=float)
+                rumbo = calcular_rumbo_geodesico(latitudes[izquierda], longitudes[izquierda], latitudes[derecha], longitudes[derecha])
+                dir_deriva_gps = data["dir_deriva_gps"].to_numpy(dtype=float, copy=True)
+                es_interpolada = ~es_completa & ~np.isnan(valores).all(axis=1)
+                dir_deriva_gps[~es_completa] = np.nan
+                dir_deriva_gps[es_interpolada] = rumbo[es_interpolada]
+                data["dir_deriva_gps"] = dir_deriva_gps.astype(data["dir_deriva_gps"].dtype)
+
             # guardo el dataframe con los datos interpolados
             output_dic[serial_de_sonda] = data
             
@@ -103,6 +165,56 @@ def interpolar_datos_faltantes(diccionario: dict) -> dict:
 
     return output_dic
 
+################# L #################
+def limpiar_datos_de_sonda(data: pd.DataFrame,
+                           fecha_de_inicio: pd.Timestamp,
+                           fecha_de_fin: pd.Timestamp,
+                           delta_tiempo: str,
+                           columnas_clave: list = None) -> tuple:
+    """ Selecciona el rango de fechas, ordena, elimina duplicados y crea tspan_rounded en una sola pasada por la sonda
+    (reemplaza seleccionar_rango_de_fechas -> buscar_y_eliminar_duplicados -> ordernar_datos_por_fecha -> crear_tspan_redondeado).
+        1. Se revisa si tspan_de_envio ya está ordenado; solo si no lo está se calcula el orden (estable, los NaT al final).
+        2. Los límites del rango se buscan con búsqueda binaria (np.searchsorted) sobre las fechas ordenadas.
+        3. Se toman una sola vez las filas del rango, ya ordenadas (take); los duplicados (hash de cada fila) se eliminan de esas filas.
+        4. tspan_rounded se calcula sobre las fechas ya ordenadas.
+
+    Parámetros:
+        data (pd.DataFrame): Datos crudos de una sonda. No se modifica.
+        fecha_de_inicio, fecha_de_fin (pd.Timestamp): Rango de fechas a conservar (inclusivo). Si fecha_de_inicio es NaT no se conserva nada.
+        delta_tiempo (str): Intervalo de la malla, como en la configuración general.
+        columnas_clave (list): Columnas que definen un duplicado. None usa todas las columnas.
+
+    Retorna:
+        (data, numero_de_duplicados) -> dataframe limpio con índice desde 0 y cantidad de duplicados eliminados.
+    """
+    if data.empty or pd.isna(fecha_de_inicio) or pd.isna(fecha_de_fin):
+        data = data.iloc[0:0].reset_index(drop=True)
+        data["tspan_rounded"] = pd.Series(dtype="datetime64[ns]")
+        return data, 0
+
+    tiempos = data["tspan_de_envio"].to_numpy()
+    orden = None
+    if not (tiempos[1:] >= tiempos[:-1]).all(): # los NaT hacen fallar la comparación, así que también se ordenan
+        orden = np.argsort(tiempos, kind="stable")
+        tiempos = tiempos[orden]
+
+    inicio = np.searchsorted(tiempos, np.datetime64(pd.Timestamp(fecha_de_inicio)), side="left")
+    fin = np.searchsorted(tiempos, np.datetime64(pd.Timestamp(fecha_de_fin)), side="right")
+    posiciones = orden[inicio:fin] if orden is not None else np.arange(inicio, fin)
+    data = data.take(posiciones)
+
+    numero_de_duplicados = 0
+    if len(data):
+        columnas = data.columns if columnas_clave is None else [columna for columna in columnas_clave if columna in data.columns]
+        es_duplicado = pd.util.hash_pandas_object(data[columnas], index=False).duplicated(keep="first").to_numpy()
+        numero_de_duplicados = int(es_duplicado.sum())
+        if numero_de_duplicados > 0:
+            data = data[~es_duplicado]
+
+    data = data.reset_index(drop=True)
+    data["tspan_rounded"] = asignar_intervalo_de_tiempo(data["tspan_de_envio"], delta_tiempo)
+    return data, numero_de_duplicados
+
 ################# O #################
 def ordenar_df_por_fecha(data: pd.DataFrame, serial_de_sonda: str) -> pd.DataFrame:
     """ Ordena los datos de cada dataframe del diccionario por la columna de fechas 'tspan'."""
@@ -111,4 +223,132 @@ def ordenar_df_por_fecha(data: pd.DataFrame, serial_de_sonda: str) -> pd.DataFra
         print(f"Datos ordenados por fecha para la sonda {serial_de_sonda}.")
         return data
     except Exception as e:
-         raise ValueError(f"Ocurrió un error al ordenar los datos por fecha: {e}")
\ No newline at end of file
+         raise ValueError(f"Ocurrió un error al ordenar los datos por fecha: {e}")
+
+################# P #################
+def promediar_fechas_redondeadas_duplicadas(data: pd.DataFrame) -> pd.DataFrame:
+    """ Une en una sola fila las transmisiones que caen en el mismo intervalo (tspan_rounded).
+    Las variables numéricas se promedian; la dirección de la corriente se promedia como vector
+    (a partir de las componentes u y v de cada transmisión) y el resto de las columnas (tspan_de_envio, textos)
+    conserva el primer valor no nulo del intervalo. Las filas sin duplicados no se modifican.
+    Requiere los datos ordenados por tspan_de_envio."""
+    es_duplicado = data["tspan_rounded"].duplicated(keep=False).to_numpy()
+    if not es_duplicado.any():
+        return data
+
+    duplicados = data.loc[es_duplicado]
+    agregaciones = {}
+    for columna in duplicados.columns:
+        if columna == "tspan_rounded":
+            continue
+        es_numerica = pd.api.types.is_numeric_dtype(duplicados[columna]) and not isinstance(duplicados[columna].dtype, pd.CategoricalDtype)
+        agregaciones[columna] = "mean" if es_numerica and "tspan" not in columna else "first"
+
+    if "dir_corriente" in duplicados.columns:
+        # Promedio vectorial: se promedian las componentes y se vuelve a calcular la dirección
+        rapidez = duplicados["rap_corriente"] if "rap_corriente" in duplicados.columns else 1.0
+        u, v = polar2uv(duplicados["dir_corriente"], rapidez)
+        duplicados = duplicados.assign(_u_dir=np.asarray(u), _v_dir=np.asarray(v))
+        agregaciones["_u_dir"] = "mean"
+        agregaciones["_v_dir"] = "mean"
+
+    promediados = duplicados.groupby("tspan_rounded", sort=True).agg(agregaciones).reset_index()
+    if "dir_corriente" in duplicados.columns:
+        direccion, _ = uv2polar(promediados["_u_dir"], promediados["_v_dir"])
+        promediados["dir_corriente"] = np.asarray(direccion, dtype=data["dir_corriente"].dtype)
+        promediados = promediados.drop(columns=["_u_dir", "_v_dir"])
+
+    data = pd.concat([data.loc[~es_duplicado], promediados[data.columns]], ignore_index=True)
+    return data.sort_values("tspan_rounded", kind="mergesort").reset_index(drop=True)
+
+################# R #################
+def reasignar_fechas_redondeadas_duplicadas(data: pd.DataFrame, delta_tiempo: str) -> tuple:
+    """ Mueve las transmisiones que caen en un intervalo ya ocupado a un intervalo vecino libre (anterior o siguiente).
+    Las fechas asignadas respetan el orden de envío (son estrictamente crecientes según tspan_de_envio) y no salen de la
+    ventana de la sonda (del primer al último tspan_rounded). Con un solo ordenamiento, solo se recorren los intervalos
+    con varias transmisiones, en O(k) cada uno (k = transmisiones del intervalo):
+        - el intervalo anterior libre recibe la primera transmisión (la más cercana a su centro),
+        - el intervalo siguiente libre recibe la última,
+        - el intervalo propio recibe, entre las demás, la más cercana a su centro (searchsorted sobre los envíos ordenados).
+    Las transmisiones que no caben se eliminan.
+
+    Retorna:
+        (data, numero_de_reasignadas, numero_de_eliminadas)
+    """
+    if not data["tspan_rounded"].duplicated().any():
+        return data, 0, 0
+
+    delta = pd.to_timedelta(delta_tiempo)
+    data = data.sort_values("tspan_de_envio", kind="mergesort").reset_index(drop=True)
+    primer_intervalo = data["tspan_rounded"].iloc[0]
+    # Posición de cada transmisión en la malla de la sonda y su envío (en intervalos, desde el primero)
+    posiciones = ((data["tspan_rounded"] - primer_intervalo) // delta).to_numpy(dtype=np.int64)
+    envios = ((data["tspan_de_envio"] - primer_intervalo) / delta).to_numpy(dtype=float)
+    ultima_posicion = posiciones[-1]
+
+    nuevas_posiciones = posiciones.copy()
+    conservar = np.ones(len(posiciones), dtype=bool)
+    inicios = np.flatnonzero(np.r_[True, posiciones[1:] != posiciones[:-1]])
+    fines = np.r_[inicios[1:], len(posiciones)]
+    es_repetido = (fines - inicios) > 1
+
+    def mas_cercana_al_centro(desde: int, hasta: int, centro: float) -> int:
+        # Fila de envios[desde:hasta] (ordenados) más cercana a 'centro'
+        derecha = desde + int(np.searchsorted(envios[desde:hasta], centro))
+        candidatas = [fila for fila in (derecha - 1, derecha) if desde <= fila < hasta]
+        return min(candidatas, key=lambda fila: abs(envios[fila] - centro))
+
+    fin_del_repetido_anterior, ultima_asignada = -1, -1
+    for inicio, fin in zip(inicios[es_repetido], fines[es_repetido]):
+        posicion = posiciones[inicio]
+        # Último intervalo asignado antes de este grupo (las transmisiones sin repetir conservan su intervalo)
+        if inicio == 0:
+            anterior = -1
+        elif inicio == fin_del_repetido_anterior:
+            anterior = ultima_asignada
+        else:
+            anterior = posiciones[inicio - 1]
+        usa_anterior = posicion - 1 > anterior and (inicio == 0 or posiciones[inicio - 1] != posicion - 1)
+        usa_siguiente = posicion + 1 <= ultima_posicion and (fin == len(posiciones) or posiciones[fin] != posicion + 1)
+
+        if fin - inicio == 2 and usa_anterior and usa_siguiente:
+            # Dos transmisiones y tres intervalos: se elige el par de intervalos (en orden) más cercano a los envíos
+            costos = {(posicion - 1, posicion): abs(envios[inicio] - (posicion - 0.5)) + abs(envios[inicio + 1] - (posicion + 0.5)),
+                      (posicion, posicion + 1): abs(envios[inicio] - (posicion + 0.5)) + abs(envios[inicio + 1] - (posicion + 1.5)),
+                      (posicion - 1, posicion + 1): abs(envios[inicio] - (posicion - 0.5)) + abs(envios[inicio + 1] - (posicion + 1.5))}
+            filas, intervalos = [inicio, inicio + 1], list(min(costos, key=costos.get))
+        else:
+            desde, hasta = inicio + usa_anterior, fin - usa_siguiente
+            filas = [mas_cercana_al_centro(desde, hasta, posicion + 0.5)]
+            intervalos = [posicion]
+            if usa_anterior:
+                filas.insert(0, inicio)
+                intervalos.insert(0, posicion - 1)
+            if usa_siguiente:
+                filas.append(fin - 1)
+                intervalos.append(posicion + 1)
+
+        conservar[inicio:fin] = False
+        conservar[filas] = True
+        nuevas_posiciones[filas] = intervalos
+        fin_del_repetido_anterior, ultima_asignada = fin, intervalos[-1]
+
+    numero_de_reasignadas = int(((nuevas_posiciones != posiciones) & conservar).sum())
+    numero_de_eliminadas = int((~conservar).sum())
+
+    data = data.loc[conservar].reset_index(drop=True)
+    data["tspan_rounded"] = primer_intervalo + nuevas_posiciones[conservar] * delta
+    return data, numero_de_reasignadas, numero_de_eliminadas
+
+def recortar_filas_vacias(data: pd.DataFrame, columnas: tuple = ("tspan_de_envio", "latitud"), inicio: bool = True, fin: bool = True) -> pd.DataFrame:
+    """ Elimina de una vez las filas vacías del inicio y/o del final del dataframe (los vacíos intermedios se mantienen).
+    Una fila está vacía si alguna de las columnas dadas es NaN/NaT. La primera y la última fila con datos se buscan
+    con argmax sobre la máscara booleana, sin recorrer el dataframe fila por fila.
+    Si ninguna fila tiene datos se devuelve un dataframe vacío con las mismas columnas.
+    """
+    tiene_datos = data[list(columnas)].notna().all(axis=1).to_numpy()
+    if not tiene_datos.any():
+        return data.iloc[0:0].reset_index(drop=True)
+    primera = tiene_datos.argmax() if inicio else 0
+    ultima = len(tiene_datos) - tiene_datos[::-1].argmax() if fin else len(tiene_datos)
+    return data.iloc[primera:ultima].reset_index(drop=True)
@@ -3,7 +3,7 @@ import cartopy.crs as ccrs
 import matplotlib.pyplot as plt
 from configs.manager_configuracion import *
 from services.Utils.utilidades import *
-from services.Carga.cargar_datos_csv import leer_excel_de_despliegue_de_sondas_corregido 
+from services.Carga.metadatos_de_despliegue import unir_despliegue_a_sondas
 from .base.Gra_mapa_cartopy import graficar_mapa_cartopy
 from .base.Gra_mapa_topografia import graficar_mapa_topografico
 from .base.Gra_batimetria_en_mapa import graficar_batimetria_en_mapa        
@@ -11,6 +11,7 @@ from .base.Gra_trayectorias_de_sonda import graficar_trayectorias_de_sonda
 from services.Graficado.base.Gra_dar_formato_a_figuras import *
 ################################################################################
 
+@acepta_contexto_de_ejecucion
 def graficar_mapa_de_despliegue(mostrar_figura: bool = False) -> None:
     """
     Grafica un mapa de posiciones geográficas dentro de los límites dados.
@@ -23,9 +24,6 @@ def graficar_mapa_de_despliegue(mostrar_figura: bool = False) -> None:
     lat_min = coords_mapa["lat_min"]
     lat_max = coords_mapa["lat_max"]
     
-    # Cargar datos de despliegue desde Excel
-    df_excel_de_despliegue = leer_excel_de_despliegue_de_sondas_corregido()
-    
     # Cargar datos de batimetría desde el archivo NetCDF
     datos_de_batimetria = cargar_datos_de_batimetria()
     datos_de_topografia = cargar_datos_de_topografia()
@@ -34,9 +32,8 @@ def graficar_mapa_de_despliegue(mostrar_figura: bool = False) -> None:
     
     seriales_a_analizar = get_seriales_sondas()
     
-    seriales_del_excel = df_excel_de_despliegue["serial_de_sonda"]
-    lon = df_excel_de_despliegue["longitud_maniobra"].dropna()
-    lat = df_excel_de_despliegue["latitud_maniobra"].dropna()
+    # Coordenadas de despliegue de todas las sondas en una sola consulta al Excel de despliegue (en caché)
+    coordenadas_de_despliegue = unir_despliegue_a_sondas(seriales_a_analizar, ["longitud_maniobra", "latitud_maniobra"]).dropna()
     
     # Obtener lat lon del puerto de salida
     puertos = get_puertos() # todos los puertos de la base de datos
@@ -66,12 +63,10 @@ def graficar_mapa_de_despliegue(mostrar_figura: bool = False) -> None:
     lon_despliegues = []
     lat_despliegues = []
     
-    for serial in seriales_a_analizar:
-        idx = seriales_del_excel[seriales_del_excel == serial].index[0]
-        if idx is not None:
-            lon_despliegues.append(lon[idx])
-            lat_despliegues.append(lat[idx])
-            etiquetas.append(f"{serial}")
+    for serial, coordenadas in coordenadas_de_despliegue.iterrows():
+        lon_despliegues.append(coordenadas["longitud_maniobra"])
+        lat_despliegues.append(coordenadas["latitud_maniobra"])
+        etiquetas.append(f"{serial}")
     
     ruta_lon.extend(lon_despliegues)
     ruta_lat.extend(lat_despliegues)
@@ -11,6 +11,7 @@ from .base.Gra_trayectorias_de_sonda import graficar_trayectorias_de_sonda
 from services.Graficado.base.Gra_dar_formato_a_figuras import *
 ################################################################################
 
+@acepta_contexto_de_ejecucion
 def graficar_mapa_con_posiciones(mostrar_figura: bool = False) -> None:
     """
     Grafica un mapa de posiciones geográficas dentro de los límites dados.
@@ -30,12 +31,22 @@ def graficar_mapa_con_posiciones(mostrar_figura: bool = False) -> None:
     ruta_de_archivo = os.path.join(ruta_a_la_carpeta_de_datos_procesados, nombre_del_archivo_de_datos_procesados)
     ruta_al_archivo_de_datos_previos_a_la_fecha_de_estudio = os.path.join(ruta_a_la_carpeta_de_datos_procesados, get_nombre_del_archivo_de_datos_previos_a_la_fecha_de_estudio())
 
-    datos = cargar_diccionario_pickle(ruta_de_archivo) # Son los datos del periodo de vigencia
+    seriales_de_sondas = get_seriales_sondas()
+    columnas_del_mapa = ["tspan_rounded", "tspan_de_envio", "latitud", "longitud", "rap_corriente", "qc_flags"]
+
+    # Solo se cargan las sondas, meses y columnas necesarias para el mapa
+    datos = cargar_datos_procesados(ruta_de_archivo,
+                                    seriales=seriales_de_sondas,
+                                    fecha_de_inicio=get_fecha_de_inicio_del_analisis(),
+                                    fecha_de_fin=get_fecha_de_fin_del_analisis(),
+                                    columnas=columnas_del_mapa) # Son los datos del periodo de vigencia
     
     if get_graficar_trayectorias_pasadas(): # Si se solicita cargar las trayectorias pasadas
-        datos_previos_a_la_fecha_de_estudio = cargar_diccionario_pickle(ruta_al_archivo_de_datos_previos_a_la_fecha_de_estudio) # Son los datos previos a la fecha de estudio
-    
-    seriales_de_sondas = get_seriales_sondas()
+        datos_previos_a_la_fecha_de_estudio = cargar_datos_procesados(ruta_al_archivo_de_datos_previos_a_la_fecha_de_estudio,
+                                                                      seriales=seriales_de_sondas,
+                                                                      fecha_de_fin=get_fecha_de_inicio_del_analisis(),
+                                                                      columnas=columnas_del_mapa) # Son los datos previos a la fecha de estudio
+
     
     # Cargar datos de despliegue desde Excel
     df_excel_de_despliegue = leer_excel_de_despliegue_de_sondas_corregido()
@@ -55,10 +66,12 @@ def graficar_mapa_con_posiciones(mostrar_figura: bool = False) -> None:
             continue
         
         # Datos de la sonda
-        df_datos_de_la_sonda = datos[serial]
+        df_datos_de_la_sonda = aplicar_mascara_de_calidad(datos[serial]) # Los datos marcados por el control de calidad no se grafican
         
         if get_graficar_trayectorias_pasadas(): # Si se solicita graficar las trayectorias pasadas
             df_datos_previos_de_la_sonda = datos_previos_a_la_fecha_de_estudio.get(serial,None)
+            if df_datos_previos_de_la_sonda is not None:
+                df_datos_previos_de_la_sonda = aplicar_mascara_de_calidad(df_datos_previos_de_la_sonda)
         else:
             df_datos_previos_de_la_sonda = None
         
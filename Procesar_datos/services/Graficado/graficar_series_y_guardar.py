@@ -1,7 +1,6 @@
 import os
 import pandas as pd
 import numpy as np
-from dotenv import load_dotenv
 
 
 from services.Graficado.base.Gra_series_de_tiempo_telemetria import Gra_series_de_tiempo_telemetria
@@ -10,6 +9,7 @@ from services.Utils.utilidades import *
 ################################################################################
 
 
+@acepta_contexto_de_ejecucion
 def graficar_series_y_guardar(mostrar_figura:bool=False) -> None:
     """
     Descripción:
@@ -29,7 +29,7 @@ def graficar_series_y_guardar(mostrar_figura:bool=False) -> None:
         graficar_series_y_guardar()
 
     Funciones auxiliares:
-        - cargar_diccionario_pickle
+        - cargar_datos_procesados
         - Gra_series_de_tiempo_telemetria
     """
     # Cargar datos procesados
@@ -37,9 +37,14 @@ def graficar_series_y_guardar(mostrar_figura:bool=False) -> None:
     nombre_del_archivo_de_datos_procesados = "datos_interpolados"#get_nombre_archivo_datos_procesados()
     ruta_de_archivo = os.path.join(ruta_a_la_carpeta_de_datos_procesados, nombre_del_archivo_de_datos_procesados)
 
-    datos = cargar_diccionario_pickle(ruta_de_archivo)
-
     seriales_de_sondas = get_seriales_sondas()
+    # Solo se cargan las sondas, meses y columnas que se van a graficar
+    datos = cargar_datos_procesados(ruta_de_archivo,
+                                    seriales=seriales_de_sondas,
+                                    fecha_de_inicio=get_fecha_de_inicio_del_analisis(),
+                                    fecha_de_fin=get_fecha_de_fin_del_analisis(),
+                                    columnas=["tspan_rounded", "tspan_de_envio", "qc_flags"] + list(get_variables_graficar()))
+
     # Recorrer cada sonda en el diccionario
     for serial in seriales_de_sondas:
 
@@ -47,7 +52,8 @@ def graficar_series_y_guardar(mostrar_figura:bool=False) -> None:
             print(f"Advertencia: Serial {serial} no encontrado en los datos")
             continue
 
-        df = datos[serial]
+        df = aplicar_mascara_de_calidad(datos[serial]) # Los datos marcados por el control de calidad no se grafican
+        df = insertar_cortes_en_huecos(df, get_delta_tiempo()) # Con la representación dispersa, las líneas se cortan en los huecos
         # Generar figura para los datos a graficar seleccionados en configuración
         fig, tituloFigura = Gra_series_de_tiempo_telemetria(dataFrame=df, 
                                                             NS_sonda=serial, 
@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from configs.manager_configuracion import *
+
+#################### FUNCIONES #########################
+
+def _ejecutar_tarea_con_cambios(tarea, cambios: dict):
+    """ Crea el contexto de ejecución dentro del proceso trabajador y corre la tarea con él.
+    El contexto se arma aquí porque un MappingProxyType no se puede enviar a otro proceso.
+    """
+    contexto = crear_contexto_de_ejecucion(**cambios)
+    return tarea(contexto=contexto)
+
+def ejecutar_en_lote(tarea, lista_de_cambios: list, numero_de_procesos: int = None) -> list:
+    """ Corre la misma tarea para varias configuraciones (meses, campañas, grupos de sondas) en paralelo.
+
+    Parámetros:
+        tarea: Función a nivel de módulo decorada con @acepta_contexto_de_ejecucion,
+               p. ej. services.Carga.cargar_datos_csv.procesar_y_guardar_datos_de_sondas.
+        lista_de_cambios (list): Lista de diccionarios con las claves de la configuración general a cambiar en cada corrida.
+               Cada corrida debe usar sus propios nombres de archivo de salida para no sobrescribir a las demás.
+        numero_de_procesos (int): Cantidad de procesos. Si es None se usan todos los núcleos (1 = secuencial).
+
+    Retorna:
+        Lista de tuplas (cambios, resultado, error) en el mismo orden de 'lista_de_cambios'.
+
+    Ejemplo:
+        lista_de_cambios = [
+            {"fecha_de_inicio_del_analisis": "2026-01-01 00:00:00", "fecha_de_fin_del_analisis": "2026-01-31 23:59:59",
+             "nombre_del_archivo_de_datos_procesados": "datos_procesados_2026_01",
+             "nombre_del_archivo_de_datos_previos_a_la_fecha_de_estudio": "datos_previos_2026_01"},
+            {"fecha_de_inicio_del_analisis": "2026-02-01 00:00:00", "fecha_de_fin_del_analisis": "2026-02-28 23:59:59",
+             "nombre_del_archivo_de_datos_procesados": "datos_procesados_2026_02",
+             "nombre_del_archivo_de_datos_previos_a_la_fecha_de_estudio": "datos_previos_2026_02"},
+        ]
+        resultados = ejecutar_en_lote(carga.procesar_y_guardar_datos_de_sondas, lista_de_cambios)
+    """
+    # Se validan todas las claves antes de lanzar los procesos
+    for cambios in lista_de_cambios:
+        crear_contexto_de_ejecucion(**cambios)
+
+    if numero_de_procesos is None:
+        numero_de_procesos = os.cpu_count() or 1
+
+    resultados = [None] * len(lista_de_cambios)
+
+    if numero_de_procesos <= 1 or len(lista_de_cambios) <= 1:
+        for icorrida, cambios in enumerate(lista_de_cambios):
+            try:
+                resultados[icorrida] = (cambios, _ejecutar_tarea_con_cambios(tarea, cambios), None)
+            except Exception as e:
+                resultados[icorrida] = (cambios, None, f"Ocurrió un error en la corrida {cambios}: {e}")
+    else:
+        with ProcessPoolExecutor(max_workers=min(numero_de_procesos, len(lista_de_cambios))) as pool:
+            futuros = {pool.submit(_ejecutar_tarea_con_cambios, tarea, cambios): icorrida for icorrida, cambios in enumerate(lista_de_cambios)}
+            for futuro in as_completed(futuros):
+                icorrida = futuros[futuro]
+                cambios = lista_de_cambios[icorrida]
+                try:
+                    resultados[icorrida] = (cambios, futuro.result(), None)
+                except Exception as e:
+                    resultados[icorrida] = (cambios, None, f"Ocurrió un error en la corrida {cambios}: {e}")
+
+    for cambios, _, error in resultados:
+        if error:
+            print(error)
+
+    return resultados
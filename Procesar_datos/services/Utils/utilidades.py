@@ -1,26 +1,230 @@
 import os
+import shutil
+import importlib.util
+import json
 import numpy as np
 import pandas as pd
 import pickle
-from dotenv import load_dotenv
+import contextlib
 import netCDF4 as nc
 
 from matplotlib.figure import Figure
 
 from configs.manager_configuracion import *
+from configs.manager_rutas import *
 from configs.manager_diccionario_variables import *
 ################### NO TOCAR #########################
+# Bit de qc_flags que indica que el valor marcado por el control de calidad ya se reemplazó por una interpolación
+bit_de_dato_interpolado = 14
+# Columnas calculadas con la trayectoria GPS (agregar_deriva_por_gps); no cuentan para decidir si una fila está completa
+columnas_derivadas_de_gps = ["desplazamiento_gps", "rap_deriva_gps", "dir_deriva_gps", "distancia_acumulada_gps"]
 
 ###################### FUNCIONES ######################
 
 ##################### A #########################
+def aplicar_mascara_de_calidad(df: pd.DataFrame, columnas: list = None) -> pd.DataFrame:
+    """ Devuelve el dataframe con NaN en los valores marcados por el control de calidad en la columna 'qc_flags'.
+    Los valores originales no se modifican: se devuelve una copia superficial en la que solo se reemplazan las columnas enmascaradas.
+    Cada bit de qc_flags corresponde al 'bit' de una regla de 'reglas_de_control_de_calidad'; los valores que ya se
+    reemplazaron por una interpolación (bit_de_dato_interpolado) no se enmascaran.
+    Si el dataframe no tiene 'qc_flags' (p. ej. modo_de_control_de_calidad = "nan") se devuelve sin cambios.
+
+    Parámetros:
+        df (pd.DataFrame): Datos de una sonda.
+        columnas (list): Columnas a enmascarar. None enmascara todas las que afecta cada regla.
+    """
+    if "qc_flags" not in df.columns:
+        return df
+    banderas = df["qc_flags"].to_numpy()
+    if not banderas.any():
+        return df
+
+    interpolado = (banderas & (1 << bit_de_dato_interpolado)) != 0
+    df = df.copy(deep=False)
+    for regla in get_reglas_de_control_de_calidad():
+        marcadas = ((banderas & (1 << regla["bit"])) != 0) & ~interpolado
+        if not marcadas.any():
+            continue
+        for columna in columnas_anuladas_por_regla(regla, df.columns):
+            if columnas is None or columna in columnas:
+                df[columna] = df[columna].mask(marcadas)
+    return df
+
+#####################
+def aplicar_politica_de_tipos(diccionario: dict, devolver_reporte: bool = False):
+    """ Reduce la memoria de los datos de cada sonda cambiando el tipo de sus columnas:
+        variables de var_dtypes -> su tipo (float32 para los sensores, float64 para latitud y longitud, category para dir_corriente_texto);
+        otras columnas float64 -> float32; texto -> category (los "" pasan a NaN);
+        enteros -> el entero con nulos más pequeño en el que caben sus valores (Int8, Int16, Int32 o Int64); booleanos -> boolean.
+    Las fechas y qc_flags (int16) no cambian. Los dataframes se reemplazan en el mismo diccionario.
+
+    Retorna:
+        El diccionario. Si devolver_reporte es True retorna (diccionario, reporte), con
+        reporte = pd.DataFrame con la memoria de cada sonda antes y después (MB) y el porcentaje ahorrado.
+    """
+    var_dtypes = get_var_dtypes()
+    filas_del_reporte = []
+    for serial, df in diccionario.items():
+        memoria_antes = df.memory_usage(deep=True).sum()
+        tipos = {}
+        for columna in df.columns:
+            serie = df[columna]
+            if columna == "qc_flags" or pd.api.types.is_datetime64_any_dtype(serie) or isinstance(serie.dtype, pd.CategoricalDtype):
+                continue
+            if columna in var_dtypes:
+                tipo = var_dtypes[columna]
+            elif pd.api.types.is_bool_dtype(serie):
+                tipo = "boolean"
+            elif pd.api.types.is_integer_dtype(serie):
+                valores = serie.dropna()
+                minimo, maximo = (int(valores.min()), int(valores.max())) if len(valores) else (0, 0)
+                tipo = next(candidato for candidato in ["Int8", "Int16", "Int32", "Int64"]
+                            if np.iinfo(candidato.lower()).min <= minimo and maximo <= np.iinfo(candidato.lower()).max)
+            elif pd.api.types.is_float_dtype(serie):
+                tipo = "float32"
+            elif pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie):
+                tipo = "category"
+            else:
+                continue
+            if serie.dtype != tipo:
+                tipos[columna] = tipo
+
+        if tipos:
+            columnas_de_texto = [columna for columna, tipo in tipos.items() if tipo == "category" and not pd.api.types.is_numeric_dtype(df[columna])]
+            if columnas_de_texto:
+                df = df.copy(deep=False)
+                df[columnas_de_texto] = df[columnas_de_texto].replace("", np.nan)
+            df = df.astype(tipos)
+            diccionario[serial] = df
+        memoria_despues = df.memory_usage(deep=True).sum()
+        filas_del_reporte.append({"serial_de_sonda": serial,
+                                  "memoria_antes_MB": round(memoria_antes / 1024**2, 3),
+                                  "memoria_despues_MB": round(memoria_despues / 1024**2, 3),
+                                  "ahorro_porcentaje": round((1 - memoria_despues / memoria_antes) * 100, 2) if memoria_antes else 0.0})
+
+    reporte = pd.DataFrame(filas_del_reporte, columns=["serial_de_sonda", "memoria_antes_MB", "memoria_despues_MB", "ahorro_porcentaje"])
+    if len(reporte):
+        total_antes, total_despues = reporte["memoria_antes_MB"].sum(), reporte["memoria_despues_MB"].sum()
+        print(f"Política de tipos: {total_antes:.2f} MB -> {total_despues:.2f} MB en {len(reporte)} sondas.")
+    if devolver_reporte:
+        return diccionario, reporte
+    return diccionario
+
+#####################
+def asignar_intervalo_de_tiempo(tiempos: pd.Series, delta_tiempo: str) -> pd.Series:
+    """ Asigna cada fecha al inicio del intervalo de la malla de tiempo que le corresponde (p. ej. 10:47 -> 10:30 con "0.5h").
+    Usa dt.floor, vectorizado sobre toda la serie, y sirve para cualquier delta_tiempo ("0.5h", "1h", "10min", ...).
+    Los intervalos se cuentan desde 1970-01-01 00:00, por lo que coinciden con la malla creada con crear_rango_de_fechas_sintetico.
+    Los NaT se conservan.
+
+    Parámetros:
+        tiempos (pd.Series): Serie de fechas (datetime64).
+        delta_tiempo (str): Duración del intervalo, como en la configuración general.
+
+    Retorna:
+        pd.Series con las fechas asignadas (mismos índices que 'tiempos').
+    """
+    delta = pd.to_timedelta(delta_tiempo)
+    if delta <= pd.Timedelta(0):
+        raise ValueError(f"delta_tiempo debe ser positivo: {delta_tiempo}")
+    return pd.to_datetime(tiempos).dt.floor(delta)
+
+#####################
+def auditar_copias(etapa: str, antes: dict, despues: dict) -> pd.DataFrame:
+    """ Compara los datos de cada sonda antes y después de una etapa y reporta las columnas que se copiaron
+    (las que existían antes y después ya no comparten memoria con np.shares_memory). Las columnas nuevas no cuentan como copias.
+    Se usa con 'auditar_copias' = True en procesar_datos_de_sondas.
+
+    Parámetros:
+        etapa (str): Nombre de la etapa, para el reporte.
+        antes (dict): {serial: {columna: df[columna].array}} tomado antes de correr la etapa. Se guardan los arreglos de las
+                      columnas y no copias superficiales de los dataframes: con Copy-on-Write una copia superficial viva
+                      obliga a la etapa a copiar las columnas que modifica, y la auditoría reportaría copias que ella misma causó.
+        despues (dict): {serial: dataframe} que devolvió la etapa.
+
+    Solo se auditan las columnas guardadas en un arreglo de NumPy (números, fechas sin zona horaria) y las categóricas (sus códigos).
+    Las de tipos con nulos (Int8, boolean, ...) o de pyarrow no tienen una forma pública de ver su arreglo sin convertirlo y se omiten.
+
+    Retorna:
+        pd.DataFrame con una fila por columna copiada: etapa, serial_de_sonda, columna, MB_copiados.
+    """
+    # PandasArray se llama NumpyExtensionArray desde pandas 2.1
+    arreglos_de_numpy = (getattr(pd.arrays, "NumpyExtensionArray", None) or pd.arrays.PandasArray, pd.arrays.DatetimeArray, pd.arrays.TimedeltaArray)
+    def buffer_de_la_columna(arreglo):
+        # Arreglo que guarda los datos de la columna, sin convertirlo (np.asarray copiaría las columnas categóricas y con nulos)
+        if isinstance(arreglo, pd.Categorical):
+            return arreglo.codes
+        if isinstance(arreglo, arreglos_de_numpy) and not isinstance(arreglo.dtype, pd.DatetimeTZDtype):
+            return np.asarray(arreglo)
+        return None
+
+    filas = []
+    for serial, df_despues in despues.items():
+        arreglos_antes = antes.get(serial)
+        if arreglos_antes is None:
+            continue
+        for columna in df_despues.columns:
+            if columna not in arreglos_antes:
+                continue
+            buffer_antes = buffer_de_la_columna(arreglos_antes[columna])
+            buffer_despues = buffer_de_la_columna(df_despues[columna].array)
+            if buffer_antes is None or buffer_despues is None or np.shares_memory(buffer_antes, buffer_despues):
+                continue
+            filas.append({"etapa": etapa, "serial_de_sonda": serial, "columna": columna,
+                          "MB_copiados": buffer_despues.nbytes / 1024**2})
+    return pd.DataFrame(filas, columns=["etapa", "serial_de_sonda", "columna", "MB_copiados"])
+
+#####################
 
 ##################### B #########################
 
 ##################### C #########################
 
+def calcular_distancia_haversine(lat1, lon1, lat2, lon2):
+    """ Distancia en metros sobre la esfera terrestre (fórmula de haversine) entre (lat1, lon1) y (lat2, lon2).
+    Acepta escalares o arreglos de NumPy/pandas (en grados decimales); los NaN dan NaN."""
+    radio_de_la_tierra = 6371000.0 # en metros
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(valor, dtype=float)) for valor in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * radio_de_la_tierra * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+#######################
+def calcular_rumbo_geodesico(lat1, lon1, lat2, lon2):
+    """ Rumbo inicial en grados (0 = norte, 90 = este, sentido horario, 0 a 360) para ir de (lat1, lon1) a (lat2, lon2).
+    Acepta escalares o arreglos (en grados decimales); los NaN dan NaN."""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(valor, dtype=float)) for valor in (lat1, lon1, lat2, lon2))
+    delta_lon = lon2 - lon1
+    x = np.sin(delta_lon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(delta_lon)
+    return np.degrees(np.arctan2(x, y)) % 360
+
+#######################
+def calcular_malla_de_la_sonda(df: pd.DataFrame, delta_tiempo: str, columna_de_tiempo: str = "tspan_rounded") -> dict:
+    """ Especificación de la malla de fechas de una sonda, del primer al último dato, cada delta_tiempo.
+    Sirve igual para la representación densa (una fila por fecha de la malla) y la dispersa (solo las filas recibidas):
+    la malla no se guarda con los datos, se calcula cuando se necesita, así no queda desactualizada al recortar o separar los datos.
+
+    Retorna:
+        dict {"inicio": pd.Timestamp, "delta": pd.Timedelta, "longitud": cantidad de fechas de la malla (0 si no hay datos)}
+    """
+    delta = pd.to_timedelta(delta_tiempo)
+    tiempos = df[columna_de_tiempo].dropna() if columna_de_tiempo in df.columns else pd.Series([], dtype="datetime64[ns]")
+    if tiempos.empty:
+        return {"inicio": pd.NaT, "delta": delta, "longitud": 0}
+    inicio = tiempos.min()
+    return {"inicio": inicio, "delta": delta, "longitud": int((tiempos.max() - inicio) // delta) + 1}
+
+#######################
+def calcular_posiciones_en_la_malla(tiempos, malla: dict) -> np.ndarray:
+    """ Posición (0 a longitud - 1) de cada fecha dentro de la malla (ver calcular_malla_de_la_sonda)."""
+    tiempos = pd.to_datetime(pd.Series(np.asarray(tiempos)))
+    return ((tiempos - malla["inicio"]) // malla["delta"]).to_numpy(dtype=np.int64)
+
+#######################
+@acepta_contexto_de_ejecucion
 def calcular_porcentaje_de_datos_recibidos(diccionario: dict) -> dict:
-    """ Calcula el porcentaje de datos recibidos en un DataFrame."""
+    """ Calcula el porcentaje de datos recibidos en un DataFrame.
+    Los datos esperados son las fechas de la malla de la sonda, por lo que sirve para la representación densa y la dispersa."""
     cantidad_de_datos_esperados = []
     cantidad_de_datos_recibidos = []
     porcentajes = []
@@ -28,9 +232,9 @@ def calcular_porcentaje_de_datos_recibidos(diccionario: dict) -> dict:
     seriales_de_sondas = list(diccionario.keys()) 
 
     for iserial, serial in enumerate(seriales_de_sondas):
-        data = diccionario[serial]
-        cantidad_de_datos_esperados.append(len(data))
-        cantidad_de_datos_recibidos.append(data.dropna().shape[0])
+        data = aplicar_mascara_de_calidad(diccionario[serial]) # Los datos marcados por el control de calidad no cuentan como recibidos
+        cantidad_de_datos_esperados.append(calcular_malla_de_la_sonda(data, get_delta_tiempo())["longitud"] if "tspan_rounded" in data.columns else len(data))
+        cantidad_de_datos_recibidos.append(int(marcar_filas_completas(data).sum()))
         porcentaje = 0
 
         if cantidad_de_datos_esperados != 0:
@@ -50,6 +254,7 @@ def calcular_porcentaje_de_datos_recibidos(diccionario: dict) -> dict:
     return dataout
 
 #######################
+@acepta_contexto_de_ejecucion
 def calcular_porcentaje_de_datos_interpolados(diccionario: dict, tabla_de_porcentajes) -> dict:
     
     seriales_de_sondas = list(diccionario.keys())
@@ -85,6 +290,7 @@ def cambiar_fechas_a_pd_datetime(df: pd.DataFrame, serial:str) -> pd.DataFrame:
     return df
 #######################
 
+@acepta_contexto_de_ejecucion
 def cargar_datos_de_batimetria() -> dict:
     """ Carga datos de batimetría desde un archivo NetCDF. Especificada en el archivo de configuración general.
     Salida
@@ -120,6 +326,7 @@ def cargar_datos_de_batimetria() -> dict:
     return datos_batimetria
 #######################
 
+@acepta_contexto_de_ejecucion
 def cargar_datos_de_topografia() -> dict:
     """ Carga datos de topografía desde un archivo NetCDF. Especificada en el archivo de configuración general.
     Salida
@@ -238,6 +445,173 @@ def cargar_diccionario_pickle(ruta_archivo):
     return diccionario
 #####################
 
+def cargar_diccionario_parquet_particionado(ruta_archivo: str,
+                                            seriales: list = None,
+                                            fecha_de_inicio: pd.Timestamp = None,
+                                            fecha_de_fin: pd.Timestamp = None,
+                                            columnas: list = None) -> dict:
+    """
+    Carga un diccionario {serial: DataFrame} desde un dataset Parquet particionado por sonda y año-mes
+    (ver 'guardar_diccionario_como_parquet_particionado'). Solo se leen las particiones y columnas necesarias.
+
+    Parámetros:
+    ruta_archivo (str): Ruta del dataset sin extensión (se agrega ".parquet").
+    seriales (list): Seriales a cargar. None carga todas las sondas del dataset.
+    fecha_de_inicio, fecha_de_fin (pd.Timestamp): Rango de fechas a cargar (inclusivo). None no limita.
+    columnas (list): Columnas a cargar. None carga todas.
+
+    Retorna:
+    dict: Diccionario {serial: DataFrame} con los datos filtrados.
+    """
+    import pyarrow.parquet as pq # Dependencia opcional: solo se necesita para el formato parquet
+
+    ruta_del_dataset = ruta_archivo + ".parquet"
+    if not os.path.isdir(ruta_del_dataset):
+        raise FileNotFoundError(f"No se encontró el dataset: {ruta_del_dataset}")
+
+    mes_de_inicio = fecha_de_inicio.strftime("%Y-%m") if fecha_de_inicio is not None else None
+    mes_de_fin = fecha_de_fin.strftime("%Y-%m") if fecha_de_fin is not None else None
+
+    diccionario = {}
+    for carpeta_de_sonda in sorted(os.listdir(ruta_del_dataset)):
+        if not carpeta_de_sonda.startswith("serial="):
+            continue
+        serial = carpeta_de_sonda.split("=", 1)[1]
+        if seriales is not None and serial not in seriales:
+            continue
+
+        ruta_de_sonda = os.path.join(ruta_del_dataset, carpeta_de_sonda)
+        with open(os.path.join(ruta_de_sonda, "columna_de_tiempo.txt"), "r", encoding="utf-8") as archivo:
+            columna_de_tiempo = archivo.read().strip()
+        columnas_a_leer = None
+        if columnas is not None:
+            columnas_a_leer = list(columnas) if columna_de_tiempo in columnas else [columna_de_tiempo] + list(columnas)
+
+        particiones = []
+        for carpeta_de_mes in sorted(os.listdir(ruta_de_sonda)):
+            if not carpeta_de_mes.startswith("anio_mes="):
+                continue
+            anio_mes = carpeta_de_mes.split("=", 1)[1]
+            if anio_mes == "sin_fecha": # Filas sin fecha: solo se cargan si no se pidió un rango de fechas
+                if mes_de_inicio or mes_de_fin:
+                    continue
+            elif (mes_de_inicio and anio_mes < mes_de_inicio) or (mes_de_fin and anio_mes > mes_de_fin):
+                continue
+            ruta_de_particion = os.path.join(ruta_de_sonda, carpeta_de_mes, "datos.parquet")
+            columnas_de_particion = columnas_a_leer
+            if columnas_a_leer is not None: # Datasets guardados antes de agregar una columna (p. ej. qc_flags) no la tienen
+                columnas_guardadas = pq.read_schema(ruta_de_particion).names
+                columnas_de_particion = [columna for columna in columnas_a_leer if columna in columnas_guardadas]
+            particiones.append(pd.read_parquet(ruta_de_particion, columns=columnas_de_particion))
+
+        if not particiones:
+            continue
+
+        df = pd.concat(particiones, ignore_index=True) if len(particiones) > 1 else particiones[0]
+        # Solo las particiones de los meses de los extremos tienen filas fuera del rango
+        if fecha_de_inicio is not None:
+            df = df[df[columna_de_tiempo] >= fecha_de_inicio]
+        if fecha_de_fin is not None:
+            df = df[df[columna_de_tiempo] <= fecha_de_fin]
+        if columnas is not None and columna_de_tiempo not in columnas:
+            df = df.drop(columns=columna_de_tiempo)
+        diccionario[serial] = df.reset_index(drop=True)
+
+    return diccionario
+#####################
+
+@acepta_contexto_de_ejecucion
+def cargar_datos_procesados(ruta_archivo: str,
+                            seriales: list = None,
+                            fecha_de_inicio: pd.Timestamp = None,
+                            fecha_de_fin: pd.Timestamp = None,
+                            columnas: list = None) -> dict:
+    """
+    Carga datos procesados guardados con 'guardar_datos_procesados'. Si existe el dataset Parquet particionado
+    (y el formato configurado es "parquet" o no hay pickle) se leen solo las particiones y columnas necesarias;
+    si no, se carga el pickle y se filtra en memoria. Con 'compactar_tipos_de_datos' se aplica aplicar_politica_de_tipos.
+    Si los datos tienen qc_flags se valida que sus bits correspondan a las reglas de la configuración actual
+    (ver 'validar_bits_de_qc_flags_guardados').
+
+    Parámetros:
+    ruta_archivo (str): Ruta del archivo sin extensión.
+    seriales, fecha_de_inicio, fecha_de_fin, columnas: Ver 'cargar_diccionario_parquet_particionado'.
+
+    Retorna:
+    dict: Diccionario {serial: DataFrame}.
+    """
+    existe_parquet = os.path.isdir(ruta_archivo + ".parquet")
+    if existe_parquet and (get_formato_de_datos_procesados() == "parquet" or not os.path.isfile(ruta_archivo + ".pkl")):
+        output_dic = cargar_diccionario_parquet_particionado(ruta_archivo, seriales, fecha_de_inicio, fecha_de_fin, columnas)
+    else:
+        diccionario = cargar_diccionario_pickle(ruta_archivo)
+        output_dic = {}
+        for serial, df in diccionario.items():
+            if seriales is not None and serial not in seriales:
+                continue
+            columna_de_tiempo = "tspan_rounded" if "tspan_rounded" in df.columns else "tspan_de_envio"
+            if fecha_de_inicio is not None:
+                df = df[df[columna_de_tiempo] >= fecha_de_inicio]
+            if fecha_de_fin is not None:
+                df = df[df[columna_de_tiempo] <= fecha_de_fin]
+            if columnas is not None:
+                df = df[[columna for columna in columnas if columna in df.columns]]
+            output_dic[serial] = df.reset_index(drop=True)
+
+    if any("qc_flags" in df.columns for df in output_dic.values()):
+        validar_bits_de_qc_flags_guardados(ruta_archivo)
+    # Los datos guardados antes de la política de tipos (float64, texto) se compactan al cargarlos
+    return aplicar_politica_de_tipos(output_dic) if get_compactar_tipos_de_datos() else output_dic
+#####################
+
+def columnas_anuladas_por_regla(regla: dict, columnas: list) -> list:
+    """ Columnas que anula una regla de control de calidad: todas menos las de fechas y qc_flags si 'anular' es "fila",
+    o solo la variable revisada si es "variable" (latitud y longitud para los saltos de posición)."""
+    if regla.get("anular", "fila") == "fila":
+        return [columna for columna in columnas if columna not in ["tspan_rounded", "tspan_de_envio", "qc_flags"]]
+    if regla.get("variable") in columnas:
+        return [regla["variable"]]
+    return [columna for columna in ["latitud", "longitud"] if columna in columnas]
+
+#####################
+def concatenar_columna_de_la_flota(diccionario: dict, columna: str) -> np.ndarray:
+    """ Concatena la columna de todas las sondas del diccionario en un solo arreglo float (NaN si la sonda no tiene la columna).
+    Permite procesar los datos de toda la flota en una sola pasada de NumPy; ver marcar_inicio_de_sonda."""
+    return np.concatenate([df[columna].to_numpy(dtype=float, na_value=np.nan) if columna in df.columns else np.full(len(df), np.nan)
+                           for df in diccionario.values()])
+
+#####################
+def concatenar_tiempos_de_la_flota(diccionario: dict) -> np.ndarray:
+    """ Concatena tspan_de_envio de todas las sondas en segundos (float, NaN donde no hay fecha)."""
+    tiempos = []
+    for df in diccionario.values():
+        tspan = pd.to_datetime(df["tspan_de_envio"])
+        segundos = tspan.to_numpy(dtype="datetime64[ns]").astype("int64") / 1e9
+        segundos[tspan.isna().to_numpy()] = np.nan
+        tiempos.append(segundos)
+    return np.concatenate(tiempos)
+
+#####################
+@acepta_contexto_de_ejecucion
+def contexto_sin_copias():
+    """ Con 'modo_sin_copias' = True devuelve un contexto (with) que activa el Copy-on-Write de pandas (disponible desde pandas 1.5):
+    los recortes por rango (iloc con un inicio y un fin), reset_index y las copias superficiales son vistas de los mismos datos y
+    solo se copian al modificarlos. Las etapas que seleccionan filas sueltas siguen copiando los datos: take (limpiar_datos_de_sonda),
+    reindex (alinear_datos_a_la_malla) y las máscaras booleanas crean arreglos nuevos con o sin Copy-on-Write.
+    Con 'modo_sin_copias' = False, en pandas anterior a 1.5 o en pandas 3 (donde Copy-on-Write ya es el comportamiento por defecto),
+    no cambia nada.
+
+    Cuidado: pd.option_context cambia una opción global del proceso, no solo la del hilo que abre el contexto. Mientras el
+    contexto está abierto, cualquier otro hilo que use pandas (p. ej. la carga en paralelo de cargar_datos_de_sonda con
+    tipo_de_paralelismo_de_carga = "hilos", u otra configuración procesada en otro hilo) también corre con Copy-on-Write.
+    Solo debe abrirse en una parte de un solo hilo, como la cadena de procesar_datos_de_sondas, que corre después de la carga."""
+    version_de_pandas = tuple(int(parte) for parte in pd.__version__.split(".")[:2])
+    if get_modo_sin_copias() and (1, 5) <= version_de_pandas < (3, 0):
+        return pd.option_context("mode.copy_on_write", True)
+    return contextlib.nullcontext()
+
+#####################
+
 def crear_rango_de_fechas_sintetico(fecha_de_inicio: pd.Timestamp, fecha_de_fin: pd.Timestamp, delta_tiempo: str) -> pd.DatetimeIndex:
     tspan_sintetico = pd.date_range(start=fecha_de_inicio, end=fecha_de_fin, freq=delta_tiempo)
     return tspan_sintetico
@@ -247,13 +621,27 @@ def crear_rango_de_fechas_sintetico(fecha_de_inicio: pd.Timestamp, fecha_de_fin:
 def crear_ruta_a_carpeta(carpeta: str) -> str:
     """ Crea la ruta completa a una carpeta utilizando la variable de entorno 'ruta_al_NAS' si está disponible.
     carpeta: Ruta relativa a la carpeta deseada."""
-    load_dotenv() # Cargar variables de entorno desde el archivo .env
-    ruta_al_NAS = os.getenv("ruta_al_NAS")    
-    ruta_completa = carpeta
-    if ruta_al_NAS:
-        ruta_completa = os.path.join(ruta_al_NAS, carpeta)        
-    
-    return ruta_completa
+    return resolver_ruta(carpeta) # El .env se lee una sola vez y la ruta resuelta queda en caché
+
+#####################
+
+##################### D #########################
+def describir_bits_de_qc_flags(reglas: list = None) -> dict:
+    """ Qué regla de control de calidad corresponde a cada bit de qc_flags: {bit (str): {"nombre", "variable", "anular"}}.
+    Si reglas es None se usan todas las reglas de la configuración general (activas o no), como en aplicar_mascara_de_calidad."""
+    if reglas is None:
+        reglas = get_reglas_de_control_de_calidad()
+    return {str(regla["bit"]): {"nombre": regla["nombre"], "variable": regla.get("variable"), "anular": regla.get("anular", "fila")}
+            for regla in reglas}
+
+#####################
+def densificar_malla(df: pd.DataFrame, delta_tiempo: str) -> pd.DataFrame:
+    """ Pasa los datos de una sonda en representación dispersa a la densa (una fila por cada fecha de la malla).
+    Solo para los casos que necesitan todas las fechas; los porcentajes, la interpolación y las gráficas usan la dispersa directamente."""
+    malla = calcular_malla_de_la_sonda(df, delta_tiempo)
+    if malla["longitud"] == len(df):
+        return df
+    return reindexar_a_fechas_de_la_malla(df, crear_rango_de_fechas_sintetico(malla["inicio"], malla["inicio"] + (malla["longitud"] - 1) * malla["delta"], delta_tiempo))
 
 #####################
 
@@ -278,6 +666,91 @@ def guardar_diccionario_como_pickle(diccionario: dict, ruta: str,nombre_archivo:
         pickle.dump(diccionario, handle, protocol=pickle.HIGHEST_PROTOCOL)
         print(f"Diccionario guardado correctamente en {os.path.join(ruta,nombre_archivo+'.pkl')}")
 
+#####################
+def guardar_diccionario_como_parquet_particionado(diccionario: dict, ruta: str, nombre_archivo: str) -> None:
+    """
+    Guarda un diccionario {serial: DataFrame} como un dataset Parquet particionado por sonda y año-mes:
+        ruta/nombre_archivo.parquet/serial=<serial>/anio_mes=<AAAA-MM>/datos.parquet
+    La partición mensual se hace con 'tspan_rounded' (o 'tspan_de_envio' si no existe); las filas sin fecha se guardan en
+    la partición anio_mes=sin_fecha. Las sondas del diccionario se reescriben completas (primero en una carpeta temporal,
+    que reemplaza a la anterior solo si se escribió completa); las demás sondas del dataset no se modifican.
+
+    Entrada:
+    diccionario (dict): Diccionario con los datos a guardar.
+    ruta (str): Carpeta donde se guardará el dataset.
+    nombre_archivo (str): Nombre del dataset sin extensión.
+    Salida:
+    None
+    """
+    if not diccionario:
+        print(f"El diccionario está vacío. No se guardará el archivo {nombre_archivo}.")
+        return
+
+    ruta_del_dataset = os.path.join(ruta, nombre_archivo + ".parquet")
+    os.makedirs(ruta_del_dataset, exist_ok=True)
+
+    for serial, df in diccionario.items():
+        ruta_de_sonda = os.path.join(ruta_del_dataset, f"serial={serial}")
+        # Las carpetas temporales no empiezan con "serial=" para que cargar_diccionario_parquet_particionado no las lea
+        ruta_temporal = os.path.join(ruta_del_dataset, f".nuevo_serial={serial}")
+        ruta_anterior = os.path.join(ruta_del_dataset, f".anterior_serial={serial}")
+        for ruta_vieja in [ruta_temporal, ruta_anterior]:
+            if os.path.isdir(ruta_vieja):
+                shutil.rmtree(ruta_vieja) # restos de un guardado interrumpido
+        os.makedirs(ruta_temporal)
+
+        try:
+            columna_de_tiempo = "tspan_rounded" if "tspan_rounded" in df.columns else "tspan_de_envio"
+            with open(os.path.join(ruta_temporal, "columna_de_tiempo.txt"), "w", encoding="utf-8") as archivo:
+                archivo.write(columna_de_tiempo)
+
+            anio_mes = df[columna_de_tiempo].dt.strftime("%Y-%m").fillna("sin_fecha")
+            filas_sin_fecha = int(df[columna_de_tiempo].isna().sum())
+            if filas_sin_fecha > 0:
+                print(f"Advertencia: La sonda {serial} tiene {filas_sin_fecha} filas sin {columna_de_tiempo}. Se guardan en la partición anio_mes=sin_fecha.")
+            for mes, particion in df.groupby(anio_mes, sort=True):
+                ruta_de_particion = os.path.join(ruta_temporal, f"anio_mes={mes}")
+                os.makedirs(ruta_de_particion)
+                particion.to_parquet(os.path.join(ruta_de_particion, "datos.parquet"), index=False)
+        except Exception:
+            shutil.rmtree(ruta_temporal, ignore_errors=True) # los datos anteriores de la sonda se conservan
+            raise
+
+        # Se reemplaza la carpeta de la sonda por la nueva
+        if os.path.isdir(ruta_de_sonda):
+            os.rename(ruta_de_sonda, ruta_anterior)
+        os.rename(ruta_temporal, ruta_de_sonda)
+        if os.path.isdir(ruta_anterior):
+            shutil.rmtree(ruta_anterior)
+
+    print(f"Diccionario guardado correctamente en {ruta_del_dataset}")
+
+#####################
+@acepta_contexto_de_ejecucion
+def guardar_datos_procesados(diccionario: dict, ruta: str, nombre_archivo: str) -> None:
+    """
+    Guarda los datos procesados en el formato indicado en la configuración general ("pickle" o "parquet").
+    Si se pide "parquet" y pyarrow no está instalado, se guarda como pickle.
+    Si los datos tienen qc_flags, se guarda además 'nombre_archivo_bits_de_qc_flags.json' con la regla de cada bit
+    (ver 'describir_bits_de_qc_flags'), que cargar_datos_procesados compara con la configuración actual.
+    """
+    formato = get_formato_de_datos_procesados()
+    if formato == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        print("Advertencia: pyarrow no está instalado. Los datos se guardarán como pickle.")
+        formato = "pickle"
+
+    if formato == "parquet":
+        guardar_diccionario_como_parquet_particionado(diccionario, ruta, nombre_archivo)
+    elif formato == "pickle":
+        guardar_diccionario_como_pickle(diccionario, ruta, nombre_archivo)
+    else:
+        raise ValueError(f"Formato de datos procesados no válido: {formato}. Opciones: 'pickle', 'parquet'.")
+
+    # qc_flags solo se puede leer con la misma asignación de bits con la que se escribió
+    if any("qc_flags" in df.columns for df in diccionario.values()):
+        with open(os.path.join(ruta, nombre_archivo + "_bits_de_qc_flags.json"), "w", encoding="utf-8") as archivo:
+            json.dump(describir_bits_de_qc_flags(), archivo, indent=4, ensure_ascii=False)
+
 #####################
 def guardar_figura(figura: Figure, ruta_a_carpeta: str, nombre_archivo: str, formato: str = "png", resolucion: int = 300) -> None:
     """
@@ -320,6 +793,53 @@ def guardar_porcentajes_en_excel(data: pd.DataFrame, ruta: str, nombre_de_archiv
 
 #####################
 
+##################### I #########################
+def insertar_cortes_en_huecos(df: pd.DataFrame, delta_tiempo: str, columna_de_tiempo: str = "tspan_rounded") -> pd.DataFrame:
+    """ Para graficar series de la representación dispersa: agrega una fila vacía después de cada hueco de la malla,
+    así la línea se corta en el hueco como con la representación densa, sin crear una fila por cada fecha faltante.
+    Si no hay huecos (p. ej. representación densa) se devuelve el mismo dataframe."""
+    if len(df) < 2:
+        return df
+    malla = calcular_malla_de_la_sonda(df, delta_tiempo, columna_de_tiempo)
+    posiciones = calcular_posiciones_en_la_malla(df[columna_de_tiempo], malla)
+    antes_de_un_hueco = np.flatnonzero(np.diff(posiciones) > 1)
+    if len(antes_de_un_hueco) == 0:
+        return df
+    cortes = pd.DataFrame({columna_de_tiempo: df[columna_de_tiempo].to_numpy()[antes_de_un_hueco] + malla["delta"]})
+    return pd.concat([df, cortes], ignore_index=True).sort_values(columna_de_tiempo, kind="mergesort", ignore_index=True)
+
+#####################
+
+##################### M #########################
+def marcar_huecos_de_la_malla(df: pd.DataFrame, delta_tiempo: str) -> np.ndarray:
+    """ Máscara booleana de largo igual a la malla de la sonda: True en las fechas de la malla sin fila (huecos de la representación dispersa)."""
+    malla = calcular_malla_de_la_sonda(df, delta_tiempo)
+    es_hueco = np.ones(malla["longitud"], dtype=bool)
+    if malla["longitud"]:
+        es_hueco[calcular_posiciones_en_la_malla(df["tspan_rounded"].dropna(), malla)] = False
+    return es_hueco
+
+#####################
+def marcar_filas_completas(df: pd.DataFrame) -> np.ndarray:
+    """ Marca las filas sin NaN. No se revisan las columnas de columnas_derivadas_de_gps: en la primera posición de cada sonda
+    la rapidez y el rumbo de la deriva quedan con NaN (no hay tramo anterior) y la fila se sigue considerando completa."""
+    es_completa = np.ones(len(df), dtype=bool)
+    for columna in df.columns:
+        if columna not in columnas_derivadas_de_gps:
+            es_completa &= df[columna].notna().to_numpy()
+    return es_completa
+
+#####################
+def marcar_inicio_de_sonda(largos) -> np.ndarray:
+    """ Máscara booleana sobre los datos concatenados de la flota que marca la primera fila de cada sonda.
+    largos: cantidad de filas de cada sonda, en el orden en que se concatenaron."""
+    largos = np.asarray(largos, dtype=int)
+    inicio_de_sonda = np.zeros(largos.sum(), dtype=bool)
+    inicio_de_sonda[np.concatenate([[0], np.cumsum(largos)[:-1]])[largos > 0]] = True
+    return inicio_de_sonda
+
+#####################
+
 ##################### O #########################
 
 ##################### P #########################
@@ -335,7 +855,66 @@ def polar2uv(dir_deg, spd):
 
 #####################
 
+##################### R #########################
+def reindexar_a_fechas_de_la_malla(df: pd.DataFrame, fechas: pd.DatetimeIndex) -> pd.DataFrame:
+    """ Lleva los datos de una sonda a las fechas dadas de la malla (columna 'tspan_rounded') con reindex.
+    En las fechas sin datos se coloca un valor de relleno según el tipo de dato de la columna:
+        numéricas -> NaN; enteras y booleanas -> NA (se pasan a los tipos de pandas que admiten nulos para no convertirlas a float);
+        qc_flags -> 0 (sigue siendo int16, para combinar sus bits con | );
+        fechas -> NaT; categóricas -> NaN; texto -> "" (con 'compactar_tipos_de_datos' el texto se pasa a category y queda NaN).
+
+    Retorna:
+        pd.DataFrame con 'tspan_rounded' como primera columna y una fila por cada fecha dada.
+    """
+    # Enteros y booleanos a tipos con nulos, para que el reindex no los convierta a float/object
+    tipos_con_nulos = {}
+    for columna in df.columns:
+        if pd.api.types.is_bool_dtype(df[columna]):
+            tipos_con_nulos[columna] = "boolean"
+        elif columna == "qc_flags":
+            continue
+        elif pd.api.types.is_integer_dtype(df[columna]) and not pd.api.types.is_extension_array_dtype(df[columna]):
+            tipos_con_nulos[columna] = df[columna].dtype.name.capitalize() # int32 -> Int32
+    # Texto a category antes del reindex, así las fechas sin datos no guardan un "" cada una
+    if get_compactar_tipos_de_datos():
+        for columna in df.columns:
+            if pd.api.types.is_string_dtype(df[columna]) and not isinstance(df[columna].dtype, pd.CategoricalDtype) and columna != "tspan_rounded":
+                tipos_con_nulos[columna] = "category"
+    if tipos_con_nulos:
+        df = df.astype(tipos_con_nulos)
+
+    # Las columnas de texto se buscan antes del reindex: después, una columna object con NaN ya no se reconoce como texto
+    columnas_de_texto = [columna for columna in df.columns
+                         if columna != "tspan_rounded" and not isinstance(df[columna].dtype, pd.CategoricalDtype)
+                         and (pd.api.types.is_object_dtype(df[columna]) or pd.api.types.is_string_dtype(df[columna]))]
+    df_alineado = df.set_index("tspan_rounded").reindex(fechas)
+
+    if columnas_de_texto:
+        df_alineado[columnas_de_texto] = df_alineado[columnas_de_texto].fillna("")
+    if "qc_flags" in df_alineado.columns:
+        df_alineado["qc_flags"] = df_alineado["qc_flags"].fillna(0).astype(np.int16)
+
+    df_alineado.index.name = "tspan_rounded"
+    return df_alineado.reset_index()
+
+#####################
+
 ##################### U #########################
+def ubicar_datos_validos_de_la_flota(es_valido: np.ndarray, inicio_de_sonda: np.ndarray) -> tuple:
+    """ Ubica los datos válidos de la flota, para comparar cada uno con el dato válido anterior de la misma sonda.
+
+    Retorna:
+        (posiciones, es_primero) -> posiciones de los datos válidos en la flota y máscara de los que son el primero de su sonda
+        (su diferencia con el anterior no tiene sentido).
+    """
+    posiciones = np.flatnonzero(es_valido)
+    sonda = np.cumsum(inicio_de_sonda) - 1
+    sonda_de_los_validos = sonda[posiciones]
+    es_primero = np.ones(len(posiciones), dtype=bool)
+    es_primero[1:] = sonda_de_los_validos[1:] != sonda_de_los_validos[:-1]
+    return posiciones, es_primero
+
+#####################
 def uv2polar(u, v):
     # Magnitud
     spd = np.hypot(u, v)
@@ -347,4 +926,42 @@ def uv2polar(u, v):
     dir_deg = np.degrees(dir_rad)
     return dir_deg, spd
 
-#####################
\ No newline at end of file
+#####################
+
+##################### V #########################
+def validar_bits_de_qc_flags_guardados(ruta_archivo: str) -> None:
+    """ Compara la regla de cada bit de qc_flags guardada con los datos ('ruta_archivo_bits_de_qc_flags.json', ver
+    'guardar_datos_procesados') con la de las reglas de la configuración actual. Si algún bit cambió de regla, de variable
+    o de 'anular', aplicar_mascara_de_calidad enmascararía otros datos: se lanza ValueError.
+    Los datos guardados sin ese archivo (antes de guardarlo) solo generan una advertencia."""
+    ruta_de_los_bits = ruta_archivo + "_bits_de_qc_flags.json"
+    if not os.path.isfile(ruta_de_los_bits):
+        print(f"Advertencia: no se encontró {ruta_de_los_bits}. Los bits de qc_flags se leerán con las reglas de la configuración actual.")
+        return
+    with open(ruta_de_los_bits, "r", encoding="utf-8") as archivo:
+        bits_guardados = json.load(archivo)
+
+    bits_actuales = describir_bits_de_qc_flags()
+    distintos = sorted((bit for bit in bits_guardados.keys() | bits_actuales.keys()
+                        if bits_guardados.get(bit) != bits_actuales.get(bit)), key=int)
+    if distintos:
+        detalle = "; ".join(f"bit {bit}: guardado {bits_guardados.get(bit)}, configurado {bits_actuales.get(bit)}" for bit in distintos)
+        raise ValueError(f"Las reglas de control de calidad de {ruta_archivo} no coinciden con la configuración actual ({detalle}). "
+                         "Restaure las reglas con las que se procesaron los datos o vuelva a procesarlos.")
+
+#####################
+@acepta_contexto_de_ejecucion
+def validar_rutas_de_la_configuracion() -> list:
+    """ Verifica al inicio de una corrida que existan las rutas de la configuración activa
+    (datos crudos, Excel de despliegue, datos procesados y figuras).
+    Retorna la lista con los nombres de las rutas que no existen."""
+    ruta_al_excel_de_despliegue_de_sondas = crear_ruta_a_carpeta(get_ruta_al_excel_de_despliegue_de_sondas())
+    rutas = {
+        "carpeta_de_datos_crudos": crear_ruta_a_carpeta(get_carpeta_datos_crudos()),
+        "ruta_al_excel_de_despliegue_de_sondas": ruta_al_excel_de_despliegue_de_sondas + ".xlsx",
+        "carpeta_de_guardado_de_datos_procesados": crear_ruta_a_carpeta(get_carpeta_guardado_datos_procesados()),
+        "carpeta_de_guardado_de_figuras": crear_ruta_a_carpeta(get_carpeta_guardado_figuras()),
+    }
+    return validar_rutas(rutas)
+
+#####################
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# Las pruebas importan los módulos igual que los notebooks: desde la carpeta Procesar_datos
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+@pytest.fixture
+def excel_de_despliegue(tmp_path):
+    """ Crea el Excel de despliegue corregido con las fechas dadas y devuelve la ruta sin extensión
+    (el valor de 'ruta_al_excel_de_despliegue_de_sondas')."""
+    def crear(fechas_de_despliegue: dict) -> str:
+        ruta = str(tmp_path / "despliegue")
+        pd.DataFrame({"serial_de_sonda": [int(serial) for serial in fechas_de_despliegue],
+                      "fecha_y_hora_de_despliegue_maniobra": pd.to_datetime(list(fechas_de_despliegue.values()))}
+                     ).to_excel(ruta + "_corregido.xlsx", index=False)
+        return ruta
+    return crear
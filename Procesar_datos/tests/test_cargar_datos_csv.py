@@ -0,0 +1,290 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from services.Carga.cargar_datos_csv import leer_csv_tipado
+
+
+def test_leer_csv_tipado_convierte_celdas_no_numericas_a_nan():
+    contenido = ("Time_send,lat,lon,Temp\n"
+                 "2026-03-01T00:10:00.000Z,18.5,-93.1,25.1\n"
+                 "2026-03-01T00:40:00.000Z,18.6,-93.2,ERROR\n")
+    df = leer_csv_tipado(io.StringIO(contenido), serial="1")
+
+    assert len(df) == 2
+    assert df["temperatura_mar"].dtype == np.float32
+    assert df["temperatura_mar"].iloc[0] == np.float32(25.1)
+    assert np.isnan(df["temperatura_mar"].iloc[1])
+    assert pd.api.types.is_datetime64_any_dtype(df["tspan_de_envio"])
+
+
+def _escribir_csv(ruta, filas):
+    with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+        archivo.write("Time_send,lat,lon,Temp\n")
+        for fila in filas:
+            archivo.write(",".join(fila) + "\n")
+
+
+def test_cargar_datos_de_sonda_incremental_lee_la_cola_y_detecta_archivos_reescritos(tmp_path):
+    from configs.manager_configuracion import crear_contexto_de_ejecucion
+    from services.Carga.cargar_datos_csv import cargar_datos_de_sonda_incremental
+
+    contexto = crear_contexto_de_ejecucion(carpeta_del_almacen_incremental=str(tmp_path / "almacen"))
+    ruta = str(tmp_path / "1.csv")
+    filas = [["2026-03-01T00:10:00.000Z", "18.5", "-93.1", "25.1"],
+             ["2026-03-01T00:40:00.000Z", "18.6", "-93.2", "25.2"]]
+
+    _escribir_csv(ruta, filas)
+    datos = cargar_datos_de_sonda_incremental([ruta], ["1"], contexto=contexto)
+    assert len(datos["1"]) == 2
+
+    # Se agrega una fila: solo se lee la cola
+    filas.append(["2026-03-01T01:10:00.000Z", "18.7", "-93.3", "25.3"])
+    _escribir_csv(ruta, filas)
+    datos = cargar_datos_de_sonda_incremental([ruta], ["1"], contexto=contexto)
+    assert len(datos["1"]) == 3
+
+    # El archivo se reescribe con otro contenido y queda más grande: la posición guardada ya no es válida
+    filas_reescritas = [["2026-03-01T01:40:00.000Z", "18.71234", "-93.31234", "25.4"],
+                        ["2026-03-01T02:10:00.000Z", "18.72345", "-93.32345", "25.5"],
+                        ["2026-03-01T02:40:00.000Z", "18.73456", "-93.33456", "25.6"]]
+    _escribir_csv(ruta, filas_reescritas)
+    datos = cargar_datos_de_sonda_incremental([ruta], ["1"], contexto=contexto)
+    assert len(datos["1"]) == 6
+    assert datos["1"]["tspan_de_envio"].is_monotonic_increasing
+
+
+def test_existen_fechas_redondeadas_duplicadas_segun_la_estrategia():
+    from configs.manager_configuracion import crear_contexto_de_ejecucion
+    from services.Carga.cargar_datos_csv import existen_fechas_redondeadas_duplicadas
+
+    tiempos = pd.to_datetime(["2026-03-01 00:10", "2026-03-01 00:20", "2026-03-01 01:10"])
+    df = pd.DataFrame({"tspan_de_envio": tiempos, "tspan_rounded": tiempos.floor("0.5h"),
+                       "temperatura_mar": [20.0, 22.0, 24.0]})
+
+    contexto = crear_contexto_de_ejecucion(estrategia_de_fechas_redondeadas_duplicadas="primero", delta_tiempo="0.5h")
+    primero = existen_fechas_redondeadas_duplicadas({"1": df.copy()}, contexto=contexto)["1"]
+    assert primero["temperatura_mar"].tolist() == [20.0, 24.0]
+
+    contexto = crear_contexto_de_ejecucion(estrategia_de_fechas_redondeadas_duplicadas="reasignar", delta_tiempo="0.5h")
+    reasignado = existen_fechas_redondeadas_duplicadas({"1": df.copy()}, contexto=contexto)["1"]
+    assert reasignado["tspan_rounded"].tolist() == pd.to_datetime(["2026-03-01 00:00", "2026-03-01 00:30", "2026-03-01 01:00"]).tolist()
+
+    contexto = crear_contexto_de_ejecucion(estrategia_de_fechas_redondeadas_duplicadas="promediar", delta_tiempo="0.5h")
+    promediado = existen_fechas_redondeadas_duplicadas({"1": df.copy()}, contexto=contexto)["1"]
+    assert len(promediado) == 2
+    assert promediado["temperatura_mar"].tolist() == [21.0, 24.0]
+
+
+def test_alinear_datos_a_la_malla_densa_rellena_segun_el_tipo():
+    from configs.manager_configuracion import crear_contexto_de_ejecucion
+    from services.Carga.cargar_datos_csv import alinear_datos_a_la_malla
+
+    tiempos = pd.to_datetime(["2026-03-01 00:10", "2026-03-01 01:40"])
+    df = pd.DataFrame({"tspan_de_envio": tiempos, "tspan_rounded": tiempos.floor("0.5h"),
+                       "temperatura_mar": np.array([20.0, 21.0], dtype=np.float32),
+                       "contador": np.array([1, 2], dtype=np.int32),
+                       "dir_corriente_texto": ["N", "S"]})
+    contexto = crear_contexto_de_ejecucion(representacion_de_la_malla="densa", delta_tiempo="0.5h", compactar_tipos_de_datos=False)
+    alineado = alinear_datos_a_la_malla({"1": df}, contexto=contexto)["1"]
+
+    assert alineado.columns[0] == "tspan_rounded"
+    assert alineado["tspan_rounded"].tolist() == pd.date_range("2026-03-01 00:00", "2026-03-01 01:30", freq="30min").tolist()
+    assert alineado["temperatura_mar"].dtype == np.float32
+    assert alineado["temperatura_mar"].isna().tolist() == [False, True, True, False]
+    assert str(alineado["contador"].dtype) == "Int32"
+    assert alineado["contador"].isna().sum() == 2
+    assert alineado["dir_corriente_texto"].tolist() == ["N", "", "", "S"]
+    assert alineado["tspan_de_envio"].isna().sum() == 2
+
+
+def _sonda_con_trayectoria(envios, delta_tiempo="0.5h"):
+    tiempos = pd.to_datetime(envios)
+    n = len(envios)
+    return pd.DataFrame({"tspan_de_envio": tiempos, "tspan_rounded": tiempos.floor(delta_tiempo),
+                         "latitud": np.linspace(18.50, 18.50 + 0.01 * (n - 1), n), "longitud": np.full(n, -93.1),
+                         "u_corriente": np.full(n, 0.1), "v_corriente": np.full(n, 0.2),
+                         "rap_corriente": np.full(n, 0.2236), "dir_corriente": np.full(n, 26.6)})
+
+
+def test_agregar_deriva_por_gps_sin_tramo_anterior_deja_completa_la_primera_posicion():
+    from configs.manager_configuracion import crear_contexto_de_ejecucion
+    from services.Carga.cargar_datos_csv import agregar_deriva_por_gps, alinear_datos_a_la_malla
+    from services.Carga.flota import calcular_porcentaje_de_datos_recibidos_de_la_flota, diccionario_a_flota
+    from services.Correctores.corrector_utils import interpolar_datos_faltantes
+    from services.Utils.utilidades import calcular_porcentaje_de_datos_recibidos
+
+    contexto = crear_contexto_de_ejecucion(delta_tiempo="0.5h", representacion_de_la_malla="densa")
+    diccionario = agregar_deriva_por_gps({"1": _sonda_con_trayectoria(["2026-03-01 00:10", "2026-03-01 00:40", "2026-03-01 01:10"])})
+    df = diccionario["1"]
+    assert df[["desplazamiento_gps", "distancia_acumulada_gps"]].iloc[0].tolist() == [0.0, 0.0]
+    assert df[["rap_deriva_gps", "dir_deriva_gps"]].iloc[0].isna().all() # sin tramo anterior
+    assert df["distancia_acumulada_gps"].dtype == np.float64
+    assert df["desplazamiento_gps"].iloc[1] > 1000
+    assert abs(df["dir_deriva_gps"].iloc[1]) < 1 or abs(df["dir_deriva_gps"].iloc[1] - 360) < 1 # hacia el norte
+
+    assert calcular_porcentaje_de_datos_recibidos(diccionario, contexto=contexto)["porcentaje_de_datos_recibidos"].tolist() == [100.0]
+    flota = diccionario_a_flota(diccionario)
+    assert calcular_porcentaje_de_datos_recibidos_de_la_flota(flota, contexto=contexto)["porcentaje_de_datos_recibidos"].tolist() == [100.0]
+
+    # Con un hueco corto, la primera fila sigue siendo completa y se conserva al interpolar
+    diccionario = agregar_deriva_por_gps({"1": _sonda_con_trayectoria(["2026-03-01 00:10", "2026-03-01 01:10"])})
+    alineado = alinear_datos_a_la_malla(diccionario, contexto=contexto)
+    interpolado = interpolar_datos_faltantes(alineado, contexto=contexto)["1"]
+    assert interpolado["latitud"].notna().all()
+    assert interpolado["latitud"].iloc[0] == 18.50
+    assert interpolado["distancia_acumulada_gps"].dtype == np.float64
+
+
+def test_interpolar_calcula_el_rumbo_de_la_deriva_con_las_posiciones():
+    from configs.manager_configuracion import crear_contexto_de_ejecucion
+    from services.Carga.cargar_datos_csv import agregar_deriva_por_gps, alinear_datos_a_la_malla
+    from services.Correctores.corrector_utils import interpolar_datos_faltantes
+
+    # La sonda va hacia el noroeste y después hacia el noreste: interpolar 315° y 45° daría 180° (hacia el sur)
+    data = _sonda_con_trayectoria(["2026-03-01 00:10", "2026-03-01 00:40", "2026-03-01 01:40"])
+    data["latitud"] = [18.50, 18.51, 18.53]
+    data["longitud"] = [-93.10, -93.11, -93.09]
+    contexto = crear_contexto_de_ejecucion(delta_tiempo="0.5h", representacion_de_la_malla="densa")
+    alineado = alinear_datos_a_la_malla(agregar_deriva_por_gps({"1": data}), contexto=contexto)
+    interpolado = interpolar_datos_faltantes(alineado, contexto=contexto)["1"]
+
+    rumbos = interpolado["dir_deriva_gps"].tolist()
+    assert np.isnan(rumbos[0])
+    assert 300 < rumbos[1] < 330 and 20 < rumbos[2] < 70 # noroeste y noreste
+    assert abs(rumbos[2] - rumbos[3]) < 1e-3 # la posición interpolada está sobre el tramo de 00:30 a 01:30
+
+
+def _escribir_sondas(tmp_path, cantidad=4):
+    rutas, seriales = [], []
+    for isonda in range(cantidad):
+        ruta = str(tmp_path / f"{isonda}.csv")
+        _escribir_csv(ruta, [[f"2026-03-01T{hora:02d}:10:00.000Z", f"{18 + isonda + hora / 100:.2f}", "-93.1", f"{25 + hora / 10:.1f}"]
+                             for hora in range(10)])
+        rutas.append(ruta)
+        seriales.append(str(isonda))
+    return rutas, seriales
+
+
+def test_cargar_datos_de_sonda_en_paralelo_da_lo_mismo_que_en_serie(tmp_path):
+    from configs.manager_configuracion import crear_contexto_de_ejecucion
+    from services.Carga.cargar_datos_csv import cargar_datos_de_sonda
+
+    rutas, seriales = _escribir_sondas(tmp_path)
+    contexto = crear_contexto_de_ejecucion(carga_incremental=False, motor_de_lectura_csv="c")
+    en_serie = cargar_datos_de_sonda(rutas, seriales, numero_de_trabajadores=1, contexto=contexto)
+    en_paralelo = cargar_datos_de_sonda(rutas, seriales, numero_de_trabajadores=4, tipo_de_paralelismo="hilos", contexto=contexto)
+
+    assert list(en_paralelo) == list(en_serie) == seriales
+    for serial in seriales:
+        pd.testing.assert_frame_equal(en_paralelo[serial], en_serie[serial])
+
+
+def test_cargar_datos_de_sonda_reporta_el_archivo_danado_y_carga_los_demas(tmp_path):
+    from configs.manager_configuracion import crear_contexto_de_ejecucion
+    from services.Carga.cargar_datos_csv import cargar_datos_de_sonda
+
+    rutas, seriales = _escribir_sondas(tmp_path, cantidad=2)
+    rutas.append(str(tmp_path / "no_existe.csv"))
+    seriales.append("9")
+    contexto = crear_contexto_de_ejecucion(carga_incremental=False, motor_de_lectura_csv="c")
+    datos = cargar_datos_de_sonda(rutas, seriales, numero_de_trabajadores=3, tipo_de_paralelismo="hilos", contexto=contexto)
+    assert list(datos) == ["0", "1"]
+
+
+def test_combinar_archivos_de_una_sonda_elimina_el_traslape_y_ordena(tmp_path):
+    from configs.manager_configuracion import crear_contexto_de_ejecucion
+    from services.Carga.cargar_datos_csv import cargar_datos_de_sonda
+
+    ruta_total = str(tmp_path / "1_TOTAL.csv")
+    ruta_marzo = str(tmp_path / "1_202603.csv")
+    _escribir_csv(ruta_total, [["2026-03-01T01:10:00.000Z", "18.6", "-93.1", "25.2"],
+                               ["2026-03-01T00:10:00.000Z", "18.5", "-93.1", "25.1"]])
+    _escribir_csv(ruta_marzo, [["2026-03-01T01:10:00.000Z", "18.6", "-93.1", "25.2"],
+                               ["2026-03-01T02:10:00.000Z", "18.7", "-93.1", "25.3"]])
+    contexto = crear_contexto_de_ejecucion(carga_incremental=False, motor_de_lectura_csv="c")
+    datos = cargar_datos_de_sonda([ruta_total, ruta_marzo], ["1", "1"], numero_de_trabajadores=2, contexto=contexto)
+
+    assert list(datos) == ["1"]
+    df = datos["1"]
+    assert df["tspan_de_envio"].tolist() == pd.to_datetime(["2026-03-01 00:10", "2026-03-01 01:10", "2026-03-01 02:10"]).tolist()
+    assert df["temperatura_mar"].tolist() == [np.float32(25.1), np.float32(25.2), np.float32(25.3)]
+    assert df.index.tolist() == [0, 1, 2]
+
+
+def _sonda_cruda(envios):
+    tiempos = pd.to_datetime(envios)
+    n = len(envios)
+    return pd.DataFrame({"tspan_de_envio": tiempos,
+                         "latitud": np.linspace(18.5, 18.6, n), "longitud": np.linspace(-93.1, -93.0, n),
+                         "temperatura_mar": np.linspace(25.0, 26.0, n).astype(np.float32),
+                         "rap_corriente": np.full(n, 0.3), "dir_corriente": np.linspace(10.0, 80.0, n)})
+
+
+def test_procesar_una_sola_vez_da_lo_mismo_que_procesar_cada_periodo(excel_de_despliegue):
+    from configs.manager_configuracion import crear_contexto_de_ejecucion, usar_contexto_de_ejecucion
+    from services.Carga import cargar_datos_csv as carga
+
+    envios = ["2026-02-27 22:10", "2026-02-28 01:40", "2026-02-28 23:50", "2026-03-01 00:05", "2026-03-01 00:20",
+              "2026-03-01 02:10", "2026-03-01 02:10", "2026-03-02 04:35"]
+    crudos = {"1": _sonda_cruda(envios), "2": _sonda_cruda(["2026-03-01 06:10", "2026-03-01 08:40"])}
+    contexto = crear_contexto_de_ejecucion(ruta_al_excel_de_despliegue_de_sondas=excel_de_despliegue({"1": "2026-02-27 22:00", "2": "2026-03-01 06:00"}),
+                                           fecha_de_inicio_del_analisis="2026-03-01 00:00:00", fecha_de_fin_del_analisis="2026-03-31 23:59:59",
+                                           delta_tiempo="0.5h", estrategia_de_fechas_redondeadas_duplicadas="primero",
+                                           representacion_de_la_malla="densa", compactar_tipos_de_datos=False,
+                                           modo_sin_copias=False, auditar_copias=False)
+    datos_anteriores, datos_del_estudio = carga.procesar_datos_de_sondas({serial: df.copy() for serial, df in crudos.items()}, contexto=contexto)
+
+    def procesar_un_periodo(diccionario):
+        # Cadena que antes se corría una vez por periodo
+        datos = carga.buscar_y_eliminar_duplicados(diccionario)
+        datos = carga.ordernar_datos_por_fecha(datos)
+        datos = carga.crear_tspan_redondeado(datos)
+        datos = carga.existen_fechas_redondeadas_duplicadas(datos)
+        datos = carga.alinear_datos_a_la_malla(datos)
+        datos = carga.eliminar_datos_espurios(datos)
+        return carga.agregar_componentes_de_la_velocidad(datos)
+
+    with usar_contexto_de_ejecucion(contexto):
+        estudio_esperado = procesar_un_periodo(carga.seleccionar_rango_de_fechas({serial: df.copy() for serial, df in crudos.items()}))
+        inicio = pd.Timestamp("2026-03-01 00:00")
+        previos = {"1": crudos["1"][crudos["1"]["tspan_de_envio"] < inicio].reset_index(drop=True)}
+        anteriores_esperados = procesar_un_periodo(previos)
+
+    columnas_de_deriva = ["desplazamiento_gps", "rap_deriva_gps", "dir_deriva_gps", "distancia_acumulada_gps"]
+    assert list(datos_anteriores) == ["1"]
+    assert list(datos_del_estudio) == ["1", "2"]
+    for obtenido, esperado in [(datos_anteriores, anteriores_esperados), (datos_del_estudio, estudio_esperado)]:
+        for serial in esperado:
+            pd.testing.assert_frame_equal(obtenido[serial].drop(columns=columnas_de_deriva).reset_index(drop=True),
+                                          esperado[serial].reset_index(drop=True), check_like=True)
+
+
+def test_limpiar_datos_de_sondas_da_lo_mismo_que_la_cadena_de_cuatro_etapas(excel_de_despliegue):
+    from configs.manager_configuracion import crear_contexto_de_ejecucion, usar_contexto_de_ejecucion
+    from services.Carga import cargar_datos_csv as carga
+
+    # Desordenados, con NaT, filas repetidas y datos antes del despliegue y después del fin del análisis
+    envios = ["2026-03-01 02:10", "2026-02-27 21:40", "2026-03-01 00:20", None, "2026-03-01 02:10", "2026-02-28 23:50",
+              "2026-04-01 00:10", "2026-03-01 00:05", None, "2026-03-01 00:20", "2026-03-02 04:35", "2026-02-27 22:10"]
+    crudos = {"1": _sonda_cruda(envios), "2": _sonda_cruda(["2026-03-01 08:40", "2026-03-01 06:10", "2026-03-01 08:40"])}
+    for df in crudos.values():
+        df.loc[df.duplicated(subset="tspan_de_envio", keep=False), ["latitud", "longitud", "temperatura_mar", "dir_corriente"]] = [18.5, -93.1, np.float32(25.0), 10.0]
+    contexto = crear_contexto_de_ejecucion(ruta_al_excel_de_despliegue_de_sondas=excel_de_despliegue({"1": "2026-02-27 22:00", "2": "2026-03-01 06:00"}),
+                                           fecha_de_inicio_del_analisis="2026-03-01 00:00:00", fecha_de_fin_del_analisis="2026-03-31 23:59:59",
+                                           delta_tiempo="0.5h", columnas_clave_de_duplicados=None)
+
+    with usar_contexto_de_ejecucion(contexto):
+        limpios, duplicados = carga.limpiar_datos_de_sondas({serial: df.copy() for serial, df in crudos.items()}, devolver_reporte=True)
+        en_rango = carga.seleccionar_rango_de_fechas({serial: df.copy() for serial, df in crudos.items()}, incluir_fechas_anteriores_al_estudio=True)
+        sin_duplicados, duplicados_de_la_cadena = carga.buscar_y_eliminar_duplicados(en_rango, devolver_reporte=True)
+        esperados = carga.crear_tspan_redondeado(carga.ordernar_datos_por_fecha(sin_duplicados))
+
+    assert duplicados == duplicados_de_la_cadena == {"1": 2, "2": 1}
+    for serial in crudos:
+        pd.testing.assert_frame_equal(limpios[serial], esperados[serial])
+    assert limpios["1"]["tspan_de_envio"].tolist() == pd.to_datetime(["2026-02-27 22:10", "2026-02-28 23:50", "2026-03-01 00:05",
+                                                                       "2026-03-01 00:20", "2026-03-01 02:10", "2026-03-02 04:35"]).tolist()
+    assert limpios["1"]["tspan_rounded"].tolist() == pd.to_datetime(["2026-02-27 22:00", "2026-02-28 23:30", "2026-03-01 00:00",
+                                                                      "2026-03-01 00:00", "2026-03-01 02:00", "2026-03-02 04:30"]).tolist()
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from configs.manager_configuracion import crear_contexto_de_ejecucion, get_reglas_de_control_de_calidad, usar_contexto_de_ejecucion
+from services.Correctores.control_de_calidad import aplicar_control_de_calidad, evaluar_reglas_de_control_de_calidad
+from services.Utils.utilidades import aplicar_mascara_de_calidad, bit_de_dato_interpolado
+
+regla_de_pico = {"bit": 2, "nombre": "pico_de_temperatura", "tipo": "pico", "variable": "temperatura_mar",
+                 "maximo_cambio_por_hora": 5.0, "anular": "variable"}
+
+
+def _sonda(temperaturas):
+    return pd.DataFrame({"tspan_de_envio": pd.date_range("2026-03-01 00:00", periods=len(temperaturas), freq="30min"),
+                         "temperatura_mar": np.asarray(temperaturas, dtype=np.float32)})
+
+
+def test_las_reglas_inactivas_del_contexto_no_se_aplican():
+    reglas = [dict(regla_de_pico, activa=False),
+              {"bit": 3, "nombre": "temperatura_alta", "tipo": "rango", "variable": "temperatura_mar",
+               "minimo": -2.0, "maximo": 25.0, "anular": "variable"}]
+    contexto = crear_contexto_de_ejecucion(reglas_de_control_de_calidad=reglas, modo_de_control_de_calidad="banderas")
+    with usar_contexto_de_ejecucion(contexto):
+        diccionario, reporte = aplicar_control_de_calidad({"1": _sonda([20.0, 20.1, 30.0, 20.2, 20.3])}, devolver_reporte=True)
+
+    assert reporte.index.tolist() == ["temperatura_alta"]
+    assert diccionario["1"]["qc_flags"].tolist() == [0, 0, 1 << 3, 0, 0] # el pico no enciende el bit 2
+
+
+def test_pico_marca_solo_el_dato_que_se_aleja_de_sus_dos_vecinos():
+    marcas = evaluar_reglas_de_control_de_calidad({"1": _sonda([20.0, 20.1, 30.0, 20.2, 20.3])}, [regla_de_pico])
+    assert marcas["pico_de_temperatura"]["1"].tolist() == [False, False, True, False, False]
+
+
+def test_pico_no_marca_escalones_ni_los_extremos_de_cada_sonda():
+    diccionario = {"1": _sonda([30.0, 20.0, 20.1, 20.2, 30.0]), # extremos: solo tienen un vecino
+                   "2": _sonda([20.0, 20.1, 30.0, 30.1, 30.2]), # escalón: el dato 30.0 se parece al siguiente
+                   "3": _sonda([20.0, np.nan, 30.0, np.nan, 20.0])} # los vecinos son los datos válidos
+    marcas = evaluar_reglas_de_control_de_calidad(diccionario, [regla_de_pico])["pico_de_temperatura"]
+
+    assert not marcas["1"].any()
+    assert not marcas["2"].any()
+    assert marcas["3"].tolist() == [False, False, True, False, False]
+
+
+def test_qc_flags_guarda_un_bit_por_regla_y_la_mascara_respeta_anular():
+    reglas = [regla for regla in get_reglas_de_control_de_calidad() if regla["nombre"] in ["rapidez_maxima", "temperatura_fuera_de_rango"]]
+    df = _sonda([20.0, 21.0, 50.0, 22.0]).assign(rap_corriente=[1.0, 3.0, 1.0, 3.0])
+    df.loc[3, "temperatura_mar"] = 45.0
+    with usar_contexto_de_ejecucion(crear_contexto_de_ejecucion(modo_de_control_de_calidad="banderas")):
+        diccionario = aplicar_control_de_calidad({"1": df}, reglas=reglas)
+
+    banderas = diccionario["1"]["qc_flags"]
+    assert banderas.dtype == np.int16
+    assert banderas.tolist() == [0, 1, 2, 3]
+    assert diccionario["1"]["temperatura_mar"].tolist()[2] == 50.0 # modo "banderas": se conservan los valores originales
+
+    enmascarado = aplicar_mascara_de_calidad(diccionario["1"])
+    assert enmascarado["rap_corriente"].isna().tolist() == [False, True, False, True] # rapidez_maxima anula la fila
+    assert enmascarado["temperatura_mar"].isna().tolist() == [False, True, True, True]
+    assert enmascarado["tspan_de_envio"].notna().all()
+    assert diccionario["1"]["temperatura_mar"].notna().all() # la máscara no modifica los datos
+
+
+def test_la_mascara_no_anula_los_datos_ya_interpolados():
+    df = _sonda([20.0, 50.0]).assign(qc_flags=np.array([0, (1 << 1) | (1 << bit_de_dato_interpolado)], dtype=np.int16))
+    assert aplicar_mascara_de_calidad(df)["temperatura_mar"].tolist() == [20.0, 50.0]
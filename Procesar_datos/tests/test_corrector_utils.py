@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+from configs.manager_configuracion import crear_contexto_de_ejecucion, get_reglas_de_control_de_calidad, usar_contexto_de_ejecucion
+from services.Correctores.corrector_utils import (eliminar_duplicados_por_hash, interpolar_datos_faltantes,
+                                                 reasignar_fechas_redondeadas_duplicadas, recortar_filas_vacias)
+
+
+def _datos_con_envios(envios, delta_tiempo="0.5h"):
+    tiempos = pd.to_datetime(envios)
+    return pd.DataFrame({"tspan_de_envio": tiempos,
+                         "tspan_rounded": tiempos.floor(delta_tiempo),
+                         "temperatura_mar": range(len(envios))})
+
+
+def test_reasignar_no_cambia_el_orden_de_envio():
+    # 01:55 no puede moverse a 01:00 (ocupado) ni quedar antes de 01:40: se elimina
+    data = _datos_con_envios(["2026-03-01 01:05", "2026-03-01 01:40", "2026-03-01 01:55", "2026-03-01 02:10"])
+    data, reasignadas, eliminadas = reasignar_fechas_redondeadas_duplicadas(data, "0.5h")
+
+    assert (reasignadas, eliminadas) == (0, 1)
+    assert data["temperatura_mar"].tolist() == [0, 1, 3]
+    assert data["tspan_rounded"].is_monotonic_increasing and data["tspan_rounded"].is_unique
+
+
+def test_reasignar_usa_los_vecinos_libres_en_orden():
+    data = _datos_con_envios(["2026-03-01 00:10", "2026-03-01 01:31", "2026-03-01 01:58", "2026-03-01 03:10"])
+    data, reasignadas, eliminadas = reasignar_fechas_redondeadas_duplicadas(data, "0.5h")
+
+    assert (reasignadas, eliminadas) == (1, 0)
+    assert data["tspan_rounded"].tolist() == pd.to_datetime(["2026-03-01 00:00", "2026-03-01 01:00", "2026-03-01 01:30", "2026-03-01 03:00"]).tolist()
+    assert data["temperatura_mar"].tolist() == [0, 1, 2, 3]
+
+
+def test_reasignar_no_sale_de_la_ventana_de_la_sonda():
+    # Las dos primeras transmisiones caen en el primer intervalo: la segunda va al siguiente, nunca antes del inicio
+    data = _datos_con_envios(["2026-03-01 00:05", "2026-03-01 00:20", "2026-03-01 02:00"])
+    data, reasignadas, eliminadas = reasignar_fechas_redondeadas_duplicadas(data, "0.5h")
+
+    assert (reasignadas, eliminadas) == (1, 0)
+    assert data["tspan_rounded"].tolist() == pd.to_datetime(["2026-03-01 00:00", "2026-03-01 00:30", "2026-03-01 02:00"]).tolist()
+    assert data["tspan_rounded"].min() >= pd.Timestamp("2026-03-01 00:00")
+
+
+def test_reasignar_una_rafaga_grande_en_una_sola_pasada():
+    # Una sonda que descarga su respaldo: 5000 transmisiones en el mismo intervalo, con vecinos libres
+    envios = pd.date_range("2026-03-01 01:30", "2026-03-01 01:59:59", periods=5000)
+    data = _datos_con_envios(["2026-03-01 00:10"] + list(envios) + ["2026-03-01 03:10"])
+    data, reasignadas, eliminadas = reasignar_fechas_redondeadas_duplicadas(data, "0.5h")
+
+    assert (reasignadas, eliminadas) == (2, 4997)
+    assert data["tspan_rounded"].tolist() == pd.to_datetime(["2026-03-01 00:00", "2026-03-01 01:00", "2026-03-01 01:30",
+                                                              "2026-03-01 02:00", "2026-03-01 03:00"]).tolist()
+    # La primera transmisión va al intervalo anterior, la última al siguiente y la del centro se queda
+    assert data["temperatura_mar"].tolist()[:2] == [0, 1] and data["temperatura_mar"].tolist()[3:] == [5000, 5001]
+    assert abs(data["tspan_de_envio"].iloc[2] - pd.Timestamp("2026-03-01 01:45")) <= (envios[1] - envios[0]) / 2
+
+
+def test_reasignar_mantiene_el_orden_en_rafagas_seguidas():
+    rng = np.random.default_rng(0)
+    minutos = np.sort(rng.integers(0, 24 * 60, 600))
+    data = _datos_con_envios(pd.Timestamp("2026-03-01") + pd.to_timedelta(minutos, unit="min"))
+    data, reasignadas, eliminadas = reasignar_fechas_redondeadas_duplicadas(data, "0.5h")
+
+    assert data["tspan_rounded"].is_monotonic_increasing and data["tspan_rounded"].is_unique
+    assert data["temperatura_mar"].is_monotonic_increasing # orden de envío
+    assert data["tspan_rounded"].min() >= pd.Timestamp("2026-03-01") and data["tspan_rounded"].max() <= pd.Timestamp("2026-03-01 23:30")
+    assert len(data) == 48 == 600 - eliminadas # todos los intervalos del día quedan ocupados
+
+
+def test_eliminar_duplicados_por_hash_conserva_la_primera_ocurrencia():
+    data = pd.DataFrame({"tspan_de_envio": pd.to_datetime(["2026-03-01 00:10", "2026-03-01 00:40", "2026-03-01 00:10", "2026-03-01 00:10"]),
+                         "temperatura_mar": [20.0, 21.0, 20.0, 25.0]})
+    eliminados = eliminar_duplicados_por_hash(data)
+
+    assert eliminados == 1
+    assert data["temperatura_mar"].tolist() == [20.0, 21.0, 25.0]
+    assert data.index.tolist() == [0, 1, 2]
+
+
+def test_eliminar_duplicados_por_hash_con_columnas_clave():
+    data = pd.DataFrame({"tspan_de_envio": pd.to_datetime(["2026-03-01 00:10", "2026-03-01 00:10", "2026-03-01 00:40"]),
+                         "temperatura_mar": [20.0, 25.0, 21.0]})
+    eliminados = eliminar_duplicados_por_hash(data, columnas_clave=["tspan_de_envio", "columna_inexistente"])
+
+    assert eliminados == 1
+    assert data["temperatura_mar"].tolist() == [20.0, 21.0]
+    assert eliminar_duplicados_por_hash(data.iloc[0:0].copy()) == 0
+
+
+def test_recortar_filas_vacias_del_inicio_y_del_final():
+    data = pd.DataFrame({"tspan_de_envio": pd.to_datetime([None, "2026-03-01 00:30", None, "2026-03-01 01:30", None]),
+                         "latitud": [np.nan, 18.5, np.nan, 18.6, 18.7]})
+
+    recortado = recortar_filas_vacias(data)
+    assert recortado["latitud"].tolist()[0] == 18.5
+    assert len(recortado) == 3 # el vacío intermedio se mantiene
+    assert recortado.index.tolist() == [0, 1, 2]
+
+    assert len(recortar_filas_vacias(data, fin=False)) == 4
+    assert len(recortar_filas_vacias(data, inicio=False)) == 4
+
+
+def test_recortar_filas_vacias_sin_datos_devuelve_un_dataframe_vacio():
+    data = pd.DataFrame({"tspan_de_envio": pd.to_datetime([None, None]), "latitud": [np.nan, np.nan]})
+    recortado = recortar_filas_vacias(data)
+    assert recortado.empty
+    assert list(recortado.columns) == ["tspan_de_envio", "latitud"]
+
+
+def _datos_en_la_malla(fechas_recibidas, inicio="2026-03-01 00:00", fin="2026-03-01 06:00"):
+    """ Datos densos cada media hora, con valores solo en las fechas recibidas (temperatura = horas desde el inicio)."""
+    malla = pd.date_range(inicio, fin, freq="30min")
+    recibida = malla.isin(pd.to_datetime(fechas_recibidas))
+    horas = (malla - malla[0]) / pd.Timedelta("1h")
+    valores = np.where(recibida, horas, np.nan)
+    return pd.DataFrame({"tspan_rounded": malla,
+                         "tspan_de_envio": pd.Series(malla).where(recibida),
+                         "temperatura_mar": valores.astype(np.float32),
+                         "u_corriente": valores, "v_corriente": np.where(recibida, 0.0, np.nan),
+                         "rap_corriente": valores, "dir_corriente": np.where(recibida, 90.0, np.nan)})
+
+
+def test_interpolar_no_rellena_los_huecos_largos():
+    data = _datos_en_la_malla(["2026-03-01 00:00", "2026-03-01 01:00", "2026-03-01 06:00"])
+    contexto = crear_contexto_de_ejecucion(maximo_hueco_de_interpolacion="4h", delta_tiempo="0.5h")
+    interpolado = interpolar_datos_faltantes({"1": data}, contexto=contexto)["1"]
+
+    temperatura = interpolado["temperatura_mar"]
+    assert temperatura.dtype == np.float32
+    assert temperatura.iloc[1] == np.float32(0.5) # hueco de 1 h: se interpola
+    assert temperatura.iloc[3:12].isna().all() # hueco de 5 h: se deja con NaN
+    assert temperatura.iloc[[0, 2, 12]].tolist() == [0.0, 1.0, 6.0]
+    assert interpolado["rap_corriente"].iloc[1] == 0.5
+
+
+def test_malla_dispersa_con_banderas_se_interpola():
+    from services.Carga.cargar_datos_csv import alinear_datos_a_la_malla
+    from services.Correctores.control_de_calidad import aplicar_control_de_calidad
+    from services.Utils.utilidades import bit_de_dato_interpolado
+
+    contexto = crear_contexto_de_ejecucion(representacion_de_la_malla="dispersa", modo_de_control_de_calidad="banderas",
+                                           maximo_hueco_de_interpolacion="4h", delta_tiempo="0.5h")
+    recibidas = ["2026-03-01 00:00", "2026-03-01 01:00", "2026-03-01 01:30", "2026-03-01 03:00", "2026-03-01 08:00"]
+    data = _datos_en_la_malla(recibidas, fin="2026-03-01 08:00").dropna(subset=["tspan_de_envio"]).reset_index(drop=True)
+    data.loc[2, "temperatura_mar"] = np.float32(80.0) # fuera de rango: se marca en qc_flags
+
+    alineado = alinear_datos_a_la_malla({"1": data}, contexto=contexto)
+    assert len(alineado["1"]) == 5 # la representación dispersa no agrega las fechas vacías
+    assert alineado["1"].columns[0] == "tspan_rounded"
+    reglas = [regla for regla in get_reglas_de_control_de_calidad() if regla["nombre"] == "temperatura_fuera_de_rango"]
+    with usar_contexto_de_ejecucion(contexto):
+        marcado = aplicar_control_de_calidad(alineado, reglas=reglas)
+    interpolado = interpolar_datos_faltantes(marcado, contexto=contexto)["1"]
+
+    # Solo se agregan las fechas de los huecos cortos; las del hueco de 5 h (03:00 a 08:00) no
+    fechas_esperadas = pd.to_datetime(["2026-03-01 00:00", "2026-03-01 00:30", "2026-03-01 01:00", "2026-03-01 01:30",
+                                       "2026-03-01 02:00", "2026-03-01 02:30", "2026-03-01 03:00", "2026-03-01 08:00"])
+    assert interpolado["tspan_rounded"].tolist() == fechas_esperadas.tolist()
+    assert interpolado["qc_flags"].dtype == np.int16
+    assert interpolado["qc_flags"].tolist() == [0, 0, 0, (1 << 1) | (1 << bit_de_dato_interpolado), 0, 0, 0, 0]
+    assert interpolado["temperatura_mar"].tolist() == [0.0, 0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 8.0]
+
+
+def test_reindexar_a_fechas_de_la_malla_rellena_qc_flags_con_cero():
+    from services.Utils.utilidades import reindexar_a_fechas_de_la_malla
+    data = _datos_en_la_malla(["2026-03-01 00:00", "2026-03-01 01:00"]).dropna(subset=["tspan_de_envio"]).reset_index(drop=True)
+    data["qc_flags"] = np.array([0, 2], dtype=np.int16)
+    fechas = pd.date_range("2026-03-01 00:00", "2026-03-01 01:00", freq="30min")
+
+    alineado = reindexar_a_fechas_de_la_malla(data, fechas)
+    assert alineado["qc_flags"].dtype == np.int16
+    assert alineado["qc_flags"].tolist() == [0, 0, 2]
+    assert alineado["temperatura_mar"].isna().tolist() == [False, True, False]
+
+
+def test_interpolar_hueco_largo_junto_a_uno_corto_con_columnas_no_numericas():
+    data = _datos_en_la_malla(["2026-03-01 00:00", "2026-03-01 01:00", "2026-03-01 06:00"])
+    data["dir_corriente_texto"] = np.where(data["tspan_de_envio"].notna(), "N", "")
+    data["campania"] = pd.Categorical(np.where(data["tspan_de_envio"].notna(), "DORIS", None))
+    # Fila incompleta dentro del hueco largo: tiene texto y temperatura, pero no corriente
+    data.loc[6, ["tspan_de_envio", "temperatura_mar", "dir_corriente_texto"]] = [pd.Timestamp("2026-03-01 03:05"), 3.0, "S"]
+    contexto = crear_contexto_de_ejecucion(maximo_hueco_de_interpolacion="4h", delta_tiempo="0.5h")
+    interpolado = interpolar_datos_faltantes({"1": data}, contexto=contexto)["1"]
+
+    # Hueco corto (00:00 a 01:00): se interpola
+    assert interpolado["u_corriente"].iloc[1] == 0.5
+    # Hueco largo (01:00 a 06:00): las columnas interpoladas de las filas incompletas quedan con NaN ...
+    assert interpolado[["temperatura_mar", "u_corriente", "rap_corriente", "dir_corriente"]].iloc[3:12].isna().all().all()
+    # ... los extremos completos se conservan ...
+    assert interpolado["u_corriente"].iloc[[2, 12]].tolist() == [1.0, 6.0]
+    assert interpolado["campania"].iloc[[2, 12]].tolist() == ["DORIS", "DORIS"]
+    # ... y las columnas que no se interpolan no cambian
+    assert interpolado["dir_corriente_texto"].tolist() == data["dir_corriente_texto"].tolist()
+    assert interpolado["tspan_de_envio"].iloc[6] == pd.Timestamp("2026-03-01 03:05")
+    assert interpolado["campania"].iloc[6:8].isna().all()
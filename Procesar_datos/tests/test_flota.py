@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from configs.manager_configuracion import crear_contexto_de_ejecucion, get_reglas_de_control_de_calidad, usar_contexto_de_ejecucion
+from services.Carga.flota import aplicar_control_de_calidad_a_la_flota, diccionario_a_flota, flota_a_diccionario
+from services.Correctores.control_de_calidad import aplicar_control_de_calidad
+
+
+def _sonda(inicio, temperaturas, latitudes):
+    tiempos = pd.date_range(inicio, periods=len(temperaturas), freq="30min")
+    return pd.DataFrame({"tspan_rounded": tiempos, "tspan_de_envio": tiempos + pd.Timedelta("5min"),
+                         "latitud": np.asarray(latitudes, dtype=float), "longitud": np.full(len(temperaturas), -93.1),
+                         "temperatura_mar": np.asarray(temperaturas, dtype=np.float32),
+                         "rap_corriente": np.full(len(temperaturas), 0.5)})
+
+
+def _diccionario():
+    return {"487819": _sonda("2026-03-01 00:00", [20.0, 20.1, 30.0, 20.2, 45.0], [18.50, 18.51, 18.52, 19.50, 18.53]),
+            "48781": _sonda("2026-02-28 22:00", [21.0, 30.0, 21.2, 45.0], [18.60, 18.61, 18.62, 18.63])}
+
+
+def test_diccionario_a_flota_ordena_por_serial_y_tiempo():
+    diccionario = _diccionario()
+    diccionario["487819"] = diccionario["487819"].iloc[::-1].reset_index(drop=True) # llegadas desordenadas
+    flota = diccionario_a_flota(diccionario)
+
+    assert flota.index.names == ["serial", "tspan_rounded"]
+    assert isinstance(flota.index.get_level_values("serial").dtype, pd.CategoricalDtype)
+    assert flota.index.get_level_values("serial").categories.tolist() == ["487819", "48781"] # orden del diccionario
+    assert flota.index.is_monotonic_increasing
+    assert flota.loc["487819", "temperatura_mar"].tolist() == _diccionario()["487819"]["temperatura_mar"].tolist()
+
+    de_vuelta = flota_a_diccionario(flota)
+    assert list(de_vuelta) == ["487819", "48781"]
+    pd.testing.assert_frame_equal(de_vuelta["48781"][diccionario["48781"].columns], diccionario["48781"])
+
+
+def test_control_de_calidad_de_la_flota_da_las_mismas_banderas_que_por_sonda():
+    nombres = ["rapidez_maxima", "temperatura_fuera_de_rango", "pico_de_temperatura", "salto_de_posicion"]
+    reglas = [regla for regla in get_reglas_de_control_de_calidad() if regla["nombre"] in nombres]
+    contexto = crear_contexto_de_ejecucion(modo_de_control_de_calidad="banderas")
+
+    with usar_contexto_de_ejecucion(contexto):
+        por_sonda, reporte_por_sonda = aplicar_control_de_calidad(_diccionario(), reglas=reglas, devolver_reporte=True)
+    flota, reporte_de_la_flota = aplicar_control_de_calidad_a_la_flota(diccionario_a_flota(_diccionario()), reglas=reglas,
+                                                                        devolver_reporte=True, contexto=contexto)
+
+    for serial, df in por_sonda.items():
+        assert flota.loc[serial, "qc_flags"].tolist() == df["qc_flags"].tolist()
+    assert por_sonda["487819"]["qc_flags"].any() and por_sonda["48781"]["qc_flags"].any()
+    pd.testing.assert_frame_equal(reporte_de_la_flota.loc[reporte_por_sonda.index, reporte_por_sonda.columns].astype(int),
+                                  reporte_por_sonda.astype(int), check_names=False)
+
+
+def test_control_de_calidad_de_la_flota_valida_los_bits_antes_de_evaluar():
+    reglas = [dict(regla, bit=14) if regla["nombre"] == "rapidez_maxima" else regla for regla in get_reglas_de_control_de_calidad()]
+    contexto = crear_contexto_de_ejecucion(modo_de_control_de_calidad="banderas", reglas_de_control_de_calidad=reglas)
+    flota = diccionario_a_flota(_diccionario())
+
+    with pytest.raises(ValueError, match="rapidez_maxima"):
+        aplicar_control_de_calidad_a_la_flota(flota, contexto=contexto)
+    assert "qc_flags" not in flota.columns
@@ -0,0 +1,28 @@
+import os
+
+from configs.manager_configuracion import crear_contexto_de_ejecucion
+from services.Carga.cargar_datos_csv import buscar_nombre_de_archivo_de_sonda
+from services.Carga.indice_de_archivos_crudos import indexar_archivos_crudos
+
+
+def _crear_archivos(carpeta, nombres):
+    for nombre in nombres:
+        (carpeta / nombre).write_text("Time_send,lat,lon,Temp\n", encoding="utf-8")
+
+
+def test_el_serial_no_coincide_dentro_de_otro_numero(tmp_path):
+    _crear_archivos(tmp_path, ["123_TOTAL.csv", "1234_TOTAL.csv", "sonda_0123.csv", "123_202603.csv", "123.txt"])
+    indice = indexar_archivos_crudos(str(tmp_path))
+
+    assert [os.path.basename(ruta) for ruta in indice["123"]] == ["123_202603.csv", "123_TOTAL.csv"]
+    assert [os.path.basename(ruta) for ruta in indice["1234"]] == ["1234_TOTAL.csv"]
+    assert [os.path.basename(ruta) for ruta in indice["0123"]] == ["sonda_0123.csv"]
+
+
+def test_buscar_nombre_de_archivo_de_sonda_usa_el_serial_completo(tmp_path):
+    _crear_archivos(tmp_path, ["123_TOTAL.csv", "1234_TOTAL.csv", "sonda_0123.csv"])
+    contexto = crear_contexto_de_ejecucion(carpeta_de_datos_crudos=str(tmp_path), seriales_de_sondas=["123", "12"])
+    rutas, seriales = buscar_nombre_de_archivo_de_sonda(contexto=contexto)
+
+    assert [os.path.basename(ruta) for ruta in rutas] == ["123_TOTAL.csv"]
+    assert seriales == ["123"]
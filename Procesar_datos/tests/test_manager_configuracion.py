@@ -0,0 +1,35 @@
+import os
+
+import configs.configuracion_general
+from configs import manager_configuracion
+from configs.manager_configuracion import (acepta_contexto_de_ejecucion, crear_contexto_de_ejecucion, get_reglas_de_control_de_calidad,
+                                           get_seriales_sondas, usar_contexto_de_ejecucion)
+
+
+def test_los_get_no_releen_ni_copian_la_configuracion(monkeypatch):
+    ruta_de_la_configuracion = configs.configuracion_general.__file__
+    revisiones = []
+    stat_original = os.stat
+    def contar_revisiones(ruta, *args, **kwargs):
+        if ruta == ruta_de_la_configuracion:
+            revisiones.append(ruta)
+        return stat_original(ruta, *args, **kwargs)
+    monkeypatch.setattr(manager_configuracion.os, "stat", contar_revisiones)
+
+    @acepta_contexto_de_ejecucion
+    def etapa():
+        return [(get_reglas_de_control_de_calidad(), get_seriales_sondas()) for _ in range(100)]
+
+    valores = etapa()
+    assert len(revisiones) == 1 # una sola revisión del archivo por llamada a la función
+    assert all(reglas is valores[0][0] and seriales is valores[0][1] for reglas, seriales in valores) # sin copias
+    assert isinstance(valores[0][1], tuple)
+
+
+def test_el_contexto_activo_no_revisa_el_archivo(monkeypatch):
+    contexto = crear_contexto_de_ejecucion(seriales_de_sondas=["1"])
+    def no_releer():
+        raise AssertionError("Se volvió a leer la configuración general con un contexto activo.")
+    monkeypatch.setattr(manager_configuracion, "obtener_configuracion_general", no_releer)
+    with usar_contexto_de_ejecucion(contexto):
+        assert get_seriales_sondas() == ("1",)
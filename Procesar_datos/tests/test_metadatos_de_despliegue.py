@@ -0,0 +1,40 @@
+import os
+
+import pandas as pd
+
+from configs.manager_configuracion import crear_contexto_de_ejecucion, usar_contexto_de_ejecucion
+from services.Carga import metadatos_de_despliegue
+from services.Carga.metadatos_de_despliegue import leer_excel_de_despliegue, obtener_despliegue_de_sonda, unir_despliegue_a_sondas
+
+
+def test_el_excel_se_lee_una_vez_y_se_devuelven_copias(excel_de_despliegue, monkeypatch):
+    contexto = crear_contexto_de_ejecucion(ruta_al_excel_de_despliegue_de_sondas=excel_de_despliegue({"1": "2026-02-27 22:00"}))
+    lecturas = []
+    leer_excel_original = pd.read_excel
+    def contar_lecturas(*args, **kwargs):
+        lecturas.append(args)
+        return leer_excel_original(*args, **kwargs)
+    monkeypatch.setattr(metadatos_de_despliegue.pd, "read_excel", contar_lecturas)
+
+    with usar_contexto_de_ejecucion(contexto):
+        excel = leer_excel_de_despliegue()
+        excel.loc[0, "fecha_y_hora_de_despliegue_maniobra"] = pd.Timestamp("2000-01-01")
+        fila = obtener_despliegue_de_sonda("1")
+        fila["fecha_y_hora_de_despliegue_maniobra"] = pd.Timestamp("2000-01-01")
+
+        assert leer_excel_de_despliegue().loc[0, "fecha_y_hora_de_despliegue_maniobra"] == pd.Timestamp("2026-02-27 22:00")
+        assert obtener_despliegue_de_sonda("1")["fecha_y_hora_de_despliegue_maniobra"] == pd.Timestamp("2026-02-27 22:00")
+        assert unir_despliegue_a_sondas(["1", "2"])["fecha_y_hora_de_despliegue_maniobra"].isna().tolist() == [False, True]
+    assert len(lecturas) == 1
+
+
+def test_el_excel_se_vuelve_a_leer_si_cambia_su_fecha_de_modificacion(excel_de_despliegue):
+    ruta = excel_de_despliegue({"1": "2026-02-27 22:00"})
+    contexto = crear_contexto_de_ejecucion(ruta_al_excel_de_despliegue_de_sondas=ruta)
+    with usar_contexto_de_ejecucion(contexto):
+        assert obtener_despliegue_de_sonda("1")["fecha_y_hora_de_despliegue_maniobra"] == pd.Timestamp("2026-02-27 22:00")
+
+        excel_de_despliegue({"1": "2026-02-28 10:00"}) # se guarda el Excel corregido
+        mtime = os.stat(ruta + "_corregido.xlsx").st_mtime_ns + 10**9
+        os.utime(ruta + "_corregido.xlsx", ns=(mtime, mtime))
+        assert obtener_despliegue_de_sonda("1")["fecha_y_hora_de_despliegue_maniobra"] == pd.Timestamp("2026-02-28 10:00")
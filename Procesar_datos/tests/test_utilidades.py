@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from configs.manager_configuracion import crear_contexto_de_ejecucion, get_reglas_de_control_de_calidad, usar_contexto_de_ejecucion
+from services.Utils.utilidades import (asignar_intervalo_de_tiempo, auditar_copias, cargar_datos_procesados,
+                                      cargar_diccionario_parquet_particionado, guardar_datos_procesados,
+                                      guardar_diccionario_como_parquet_particionado)
+
+
+def test_parquet_particionado_conserva_filas_sin_fecha_y_reemplaza_la_sonda(tmp_path):
+    pytest.importorskip("pyarrow")
+    tiempos = pd.to_datetime(["2026-02-28 23:30", "2026-03-01 00:00", None])
+    df = pd.DataFrame({"tspan_rounded": tiempos, "Temp": [20.0, 21.0, 22.0]})
+    guardar_diccionario_como_parquet_particionado({"1": df}, str(tmp_path), "datos")
+    assert sorted(p.name for p in (tmp_path / "datos.parquet" / "serial=1").iterdir()) == ["anio_mes=2026-02", "anio_mes=2026-03", "anio_mes=sin_fecha", "columna_de_tiempo.txt"]
+
+    cargado = cargar_diccionario_parquet_particionado(str(tmp_path / "datos"))["1"]
+    assert len(cargado) == 3
+    assert cargado["tspan_rounded"].isna().sum() == 1
+
+    # Al volver a guardar la sonda se reemplazan sus particiones y no quedan carpetas temporales
+    guardar_diccionario_como_parquet_particionado({"1": df.iloc[:1]}, str(tmp_path), "datos")
+    assert sorted(p.name for p in (tmp_path / "datos.parquet").iterdir()) == ["serial=1"]
+    assert len(cargar_diccionario_parquet_particionado(str(tmp_path / "datos"))["1"]) == 1
+
+
+def test_parquet_particionado_conserva_los_datos_anteriores_si_falla_la_escritura(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    df = pd.DataFrame({"tspan_rounded": pd.to_datetime(["2026-03-01 00:00"]), "Temp": [21.0]})
+    guardar_diccionario_como_parquet_particionado({"1": df}, str(tmp_path), "datos")
+
+    def falla(*args, **kwargs):
+        raise OSError("disco lleno")
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", falla)
+    with pytest.raises(OSError):
+        guardar_diccionario_como_parquet_particionado({"1": df.assign(Temp=99.0)}, str(tmp_path), "datos")
+    monkeypatch.undo()
+
+    cargado = cargar_diccionario_parquet_particionado(str(tmp_path / "datos"))["1"]
+    assert cargado["Temp"].tolist() == [21.0]
+    assert sorted(p.name for p in (tmp_path / "datos.parquet").iterdir()) == ["serial=1"]
+
+
+def test_asignar_intervalo_de_tiempo_usa_el_inicio_del_intervalo():
+    tiempos = pd.Series(pd.to_datetime(["2026-03-01 10:47:00", "2026-03-01 10:30:00", "2026-03-01 10:59:59", None]), index=[5, 6, 7, 8])
+    asignadas = asignar_intervalo_de_tiempo(tiempos, "0.5h")
+    assert asignadas.index.tolist() == [5, 6, 7, 8]
+    assert asignadas.iloc[:3].tolist() == [pd.Timestamp("2026-03-01 10:30"), pd.Timestamp("2026-03-01 10:30"), pd.Timestamp("2026-03-01 10:30")]
+    assert pd.isna(asignadas.iloc[3])
+    assert asignar_intervalo_de_tiempo(tiempos.iloc[:1], "10min").iloc[0] == pd.Timestamp("2026-03-01 10:40")
+
+
+def test_asignar_intervalo_de_tiempo_rechaza_delta_no_positivo():
+    with pytest.raises(ValueError):
+        asignar_intervalo_de_tiempo(pd.Series(pd.to_datetime(["2026-03-01"])), "0h")
+
+
+def test_auditar_copias_reporta_solo_las_columnas_copiadas():
+    df = pd.DataFrame({"temperatura_mar": np.arange(1000, dtype=np.float64), "latitud": np.arange(1000, dtype=np.float64)})
+    antes = {"1": {columna: df[columna].array for columna in df.columns}}
+    despues = df.copy(deep=False)
+    despues["temperatura_mar"] = despues["temperatura_mar"] + 1
+    despues["rap_corriente"] = 0.0 # columna nueva: no cuenta como copia
+
+    reporte = auditar_copias("etapa", antes, {"1": despues})
+    assert reporte["columna"].tolist() == ["temperatura_mar"]
+    assert reporte["MB_copiados"].iloc[0] == 8000 / 1024**2
+
+
+def test_auditar_copias_revisa_fechas_y_categorias_y_omite_los_tipos_con_nulos():
+    df = pd.DataFrame({"tspan_rounded": pd.date_range("2026-03-01", periods=4, freq="30min"),
+                       "dir_corriente_texto": pd.Categorical(["N", "S", "N", "E"]),
+                       "numero_de_mensaje": pd.array([1, 2, None, 4], dtype="Int16")})
+    antes = {"1": {columna: df[columna].array for columna in df.columns}}
+    assert auditar_copias("etapa", antes, {"1": df.copy(deep=False)}).empty
+
+    copiado = df.copy(deep=True)
+    assert auditar_copias("etapa", antes, {"1": copiado})["columna"].tolist() == ["tspan_rounded", "dir_corriente_texto"]
+
+
+@pytest.mark.parametrize("version, activa", [("1.4.4", False), ("1.5.3", True), ("2.2.0", True), ("3.0.0", False)])
+def test_contexto_sin_copias_activa_copy_on_write_desde_pandas_1_5(monkeypatch, version, activa):
+    from services.Utils.utilidades import contexto_sin_copias
+
+    monkeypatch.setattr(pd, "__version__", version)
+    contexto = contexto_sin_copias(contexto=crear_contexto_de_ejecucion(modo_sin_copias=True))
+    assert isinstance(contexto, pd.option_context) == activa
+
+
+def test_cargar_datos_procesados_valida_los_bits_de_qc_flags(tmp_path):
+    df = pd.DataFrame({"tspan_rounded": pd.date_range("2026-03-01", periods=2, freq="30min"),
+                       "temperatura_mar": [20.0, 50.0], "qc_flags": np.array([0, 1 << 1], dtype=np.int16)})
+    ruta_archivo = str(tmp_path / "datos")
+    contexto = crear_contexto_de_ejecucion(formato_de_datos_procesados="pickle", compactar_tipos_de_datos=False)
+    with usar_contexto_de_ejecucion(contexto):
+        guardar_datos_procesados({"1": df}, str(tmp_path), "datos")
+        assert cargar_datos_procesados(ruta_archivo)["1"]["qc_flags"].tolist() == [0, 2]
+
+    # El bit 1 pasa a otra regla: las banderas guardadas ya no se pueden leer con la configuración actual
+    reglas = [dict(regla, bit=5) if regla["bit"] == 1 else regla for regla in get_reglas_de_control_de_calidad()]
+    with usar_contexto_de_ejecucion(crear_contexto_de_ejecucion(reglas_de_control_de_calidad=reglas, formato_de_datos_procesados="pickle")):
+        with pytest.raises(ValueError, match="bit 1"):
+            cargar_datos_procesados(ruta_archivo)
+
+
+def _datos_para_compactar():
+    malla = pd.date_range("2026-03-01 00:00", "2026-03-01 03:00", freq="30min")
+    recibida = np.array([True, False, True, True, False, False, True])
+    valores = np.where(recibida, np.arange(len(malla)) / 2, np.nan)
+    return pd.DataFrame({"tspan_rounded": malla, "tspan_de_envio": pd.Series(malla).where(recibida),
+                         "latitud": np.where(recibida, 18.5, np.nan), "longitud": np.where(recibida, -93.1, np.nan),
+                         "temperatura_mar": valores, "u_corriente": valores, "v_corriente": np.where(recibida, 0.0, np.nan),
+                         "rap_corriente": valores, "dir_corriente": np.where(recibida, 90.0, np.nan),
+                         "dir_corriente_texto": np.where(recibida, "E", ""), "numero_de_mensaje": np.arange(len(malla)),
+                         "qc_flags": np.zeros(len(malla), dtype=np.int16)})
+
+
+def test_aplicar_politica_de_tipos_compacta_y_reporta_la_memoria():
+    from services.Utils.utilidades import aplicar_politica_de_tipos
+
+    diccionario, reporte = aplicar_politica_de_tipos({"1": _datos_para_compactar()}, devolver_reporte=True)
+    tipos = diccionario["1"].dtypes
+    assert (tipos["temperatura_mar"], tipos["latitud"], tipos["numero_de_mensaje"], tipos["qc_flags"]) == (np.float32, np.float64, "Int8", np.int16)
+    assert isinstance(tipos["dir_corriente_texto"], pd.CategoricalDtype)
+    assert diccionario["1"]["dir_corriente_texto"].isna().tolist() == [False, True, False, False, True, True, False] # "" -> NaN
+    assert reporte["memoria_despues_MB"].iloc[0] <= reporte["memoria_antes_MB"].iloc[0]
+
+
+def test_los_datos_compactados_dan_los_mismos_resultados(tmp_path):
+    from services.Correctores.corrector_utils import interpolar_datos_faltantes
+    from services.Utils.utilidades import aplicar_politica_de_tipos, calcular_porcentaje_de_datos_recibidos
+
+    contexto = crear_contexto_de_ejecucion(delta_tiempo="0.5h", maximo_hueco_de_interpolacion="4h", compactar_tipos_de_datos=True,
+                                           formato_de_datos_procesados="pickle")
+    original = {"1": _datos_para_compactar()}
+    original["1"].loc[3, "qc_flags"] = 1 # rapidez_maxima: la fila se enmascara y se interpola
+    compactado = aplicar_politica_de_tipos({"1": original["1"].copy()})
+
+    # Guardar y cargar los datos compactados no cambia los tipos ni los valores
+    with usar_contexto_de_ejecucion(contexto):
+        guardar_datos_procesados(compactado, str(tmp_path), "datos")
+        cargado = cargar_datos_procesados(str(tmp_path / "datos"))
+    pd.testing.assert_frame_equal(cargado["1"], compactado["1"])
+
+    porcentajes = [calcular_porcentaje_de_datos_recibidos(datos, contexto=contexto) for datos in [original, compactado]]
+    pd.testing.assert_frame_equal(porcentajes[0], porcentajes[1])
+
+    interpolados = [interpolar_datos_faltantes(datos, contexto=contexto)["1"] for datos in [original, compactado]]
+    for columna in ["temperatura_mar", "u_corriente", "rap_corriente", "dir_corriente", "latitud"]:
+        np.testing.assert_allclose(interpolados[1][columna].to_numpy(dtype=float), interpolados[0][columna].to_numpy(dtype=float), rtol=1e-6)
+    assert interpolados[1]["qc_flags"].tolist() == interpolados[0]["qc_flags"].tolist() == [0, 0, 0, 1 | (1 << 14), 0, 0, 0]
@@ -1,10 +1,8 @@
-import os
-import dotenv
 import importlib
 import configs.configuracion_documentos
 importlib.reload(configs.configuracion_documentos)
 
-dotenv.load_dotenv()  # Carga las variables de entorno desde el archivo .env
+from Procesar_datos.configs.manager_rutas import resolver_ruta, validar_rutas # Misma resolución de rutas (.env leído una sola vez) que Procesar_datos
 
 def get_usar_NAS():
     """Obtiene un valor de la configuración general de forma dinámica"""
@@ -12,13 +10,8 @@ def get_usar_NAS():
 
 def get_ruta_al_excel_maestro():
     """Obtiene un valor de la configuración general de forma dinámica"""
-    ruta_al_NAS = os.getenv("ruta_al_NAS")
     carpeta = configs.configuracion_documentos.ruta_al_excel_de_despliegue_de_sondas
-    if get_usar_NAS() and ruta_al_NAS:
-        ruta_completa = os.path.join(ruta_al_NAS, carpeta)   
-    else:
-        ruta_completa = carpeta  # Si no se encuentra la variable de entorno, usar la ruta relativa     
-    return ruta_completa
+    return resolver_ruta(carpeta, usar_NAS=get_usar_NAS()) # Si no se encuentra la variable de entorno, usar la ruta relativa
 
 def get_hoja_del_excel():
     """Obtiene un valor de la configuración general de forma dinámica"""
@@ -26,25 +19,25 @@ def get_hoja_del_excel():
 
 def get_ruta_a_carpeta_de_las_figuras():
     """Obtiene un valor de la configuración general de forma dinámica"""
-    ruta_al_NAS = os.getenv("ruta_al_NAS")
     carpeta = configs.configuracion_documentos.ruta_a_carpeta_de_las_figuras
-    if get_usar_NAS() and ruta_al_NAS:
-        ruta_completa = os.path.join(ruta_al_NAS, carpeta)   
-    else:
-        ruta_completa = carpeta  # Si no se encuentra la variable de entorno, usar la ruta relativa     
-    return ruta_completa
+    return resolver_ruta(carpeta, usar_NAS=get_usar_NAS()) # Si no se encuentra la variable de entorno, usar la ruta relativa
 
 
 def get_ruta_a_carpeta_de_guardado_del_documento():
     """Obtiene un valor de la configuración general de forma dinámica"""
-    ruta_al_NAS = os.getenv("ruta_al_NAS")
     carpeta = configs.configuracion_documentos.ruta_a_carpeta_de_guardado_del_documento
-    if get_usar_NAS() and ruta_al_NAS:
-        ruta_completa = os.path.join(ruta_al_NAS, carpeta)   
-    else:
-        ruta_completa = carpeta  # Si no se encuentra la variable de entorno, usar la ruta relativa     
-    return ruta_completa
+    return resolver_ruta(carpeta, usar_NAS=get_usar_NAS()) # Si no se encuentra la variable de entorno, usar la ruta relativa
 
 
 def get_nombre_de_la_plantilla_de_word():
     return configs.configuracion_documentos.nombre_de_la_plantilla_de_word
+
+def validar_rutas_de_documentos() -> list:
+    """Verifica al inicio que existan el Excel maestro y las carpetas de figuras y de guardado del documento.
+    Retorna la lista con los nombres de las rutas que no existen."""
+    rutas = {
+        "ruta_al_excel_maestro": get_ruta_al_excel_maestro() + ".xlsx",
+        "ruta_a_carpeta_de_las_figuras": get_ruta_a_carpeta_de_las_figuras(),
+        "ruta_a_carpeta_de_guardado_del_documento": get_ruta_a_carpeta_de_guardado_del_documento(),
+    }
+    return validar_rutas(rutas)
@@ -9,6 +9,9 @@ from crear_documentos.configs.manager_doc_config import *
 
 def crear_documento_de_despliegue():
         
+    # Verificar las rutas antes de empezar
+    validar_rutas_de_documentos()
+
     # Leer datos del excel maestro
     nombre_de_hoja = get_hoja_del_excel()
     df_excel_maestro = leer_excel_maestro(nombre_de_hoja)